@@ -24,11 +24,21 @@ from tqdm import tqdm
 from shapely.geometry import Point
 import numpy as np
 ##################################
+import cacheStore
+import chunkIO
+import runJournal
+import gazetteer
+import regions
+from coords import CoordArray
+##################################
 
 class LocA:
-    def __init__(self, INPUT_FILE, KAKAO_API_KEY):
+    def __init__(self, INPUT_FILE, KAKAO_API_KEY, CACHE_DB = None, CACHE_TTL = None, PLACE_INDEX_FILE = None):
         self.INPUT_FILE = INPUT_FILE
         self.KAKAO_API_KEY = KAKAO_API_KEY
+        self.cache_store = None
+        self.PLACE_INDEX_FILE = PLACE_INDEX_FILE
+        self.REGION_FILE = None    # 스냅/장소 색인/도로 그래프 지역 정의 (GeoJSON, None이면 기본 bbox)
         self.dep = None
         self.acc_coord = None
         self.dst = None
@@ -43,11 +53,21 @@ class LocA:
         self.snap_dep_coord = None
         self.snap_acc_coord = None
         self.snap_dst_coord = None
+        self.snap_diagnostics = None
         self.dep_acc_route = None
         self.acc_dst_route = None
         self.total_route = None
+        self.route_summary = None
         file_path = "nearest_cache.json"
-        if os.path.exists(file_path):
+        if CACHE_DB:
+            # 영구 캐시 사용 시 기존 json 캐시는 지우지 않고 1회 가져오기
+            self.cache_store = cacheStore.SqliteCacheStore(CACHE_DB, ttl=CACHE_TTL)
+            cacheStore.import_json_cache(file_path, self.cache_store.namespace("nearest"))
+            cacheStore.import_json_cache('snap_cache_kakao_only.json', self.cache_store.namespace("snap"))
+            evicted = sum(self.cache_store.namespace(ns).evict_expired() for ns in ("nearest", "keyword", "revgeo", "snap", "route"))
+            if evicted:
+                self.cache_store.compact()
+        elif os.path.exists(file_path):
             try:
                 os.remove(file_path)
                 print(f"'{file_path}' Successfully Remove cahce file..!")
@@ -79,6 +99,13 @@ class LocA:
 
     def Series_2_coords(self, coord_series: pd.Series, 
                         return_type: str = 'tuple'):
+        if isinstance(coord_series, CoordArray):
+            df_coords = pd.DataFrame({'latitude': coord_series.lat, 'longitude': coord_series.lon},
+                                     index = coord_series.index)
+            if return_type == 'dataframe':
+                return df_coords
+            return df_coords['latitude'], df_coords['longitude']
+
         df_coords = coord_series.str.split(',', expand=True)
 
         if 0 not in df_coords.columns:
@@ -115,121 +142,293 @@ class LocA:
         except:
             return None
         
-    def nearest_coords(self, limit = None):
-        finder = NearestFinder.NearestFind(self.KAKAO_API_KEY)
+    def _cache(self, namespace, track_access = False):
+        if self.cache_store is None:
+            return None
+        return self.cache_store.namespace(namespace, track_access = track_access)
+
+    def _place_index(self, cache):
+        # 오프라인 장소 색인: 파일이 있으면 불러오고, 없으면 누적된 키워드 캐시로 생성
+        if not self.PLACE_INDEX_FILE:
+            return None
+        if self.REGION_FILE:
+            region_index = regions.RegionIndex.load(self.REGION_FILE)
+        else:
+            region_index = regions.RegionIndex.from_bboxes(regions.DEFAULT_REGION_BBOXES)
+        if os.path.exists(self.PLACE_INDEX_FILE):
+            index = gazetteer.PlaceIndex.load(self.PLACE_INDEX_FILE, region_index)
+        else:
+            index = gazetteer.PlaceIndex(regions = region_index)
+        index.update_from_cache(cache)
+        print(f"Place index: {len(index)} places loaded.")
+        return index
+
+    def _finder(self):
+        finder = NearestFinder.NearestFind(self.KAKAO_API_KEY, cache_store = self._cache("nearest"))
+        finder.place_index = self._place_index(finder.cache)
+        return finder
+
+    def _finish_finder(self, finder):
+        finder.finish()
+        if finder.place_index is not None:
+            finder.place_index.save(self.PLACE_INDEX_FILE)
+
+    def nearest_coords(self, limit = None, concurrency = None, rate_per_sec = None):
+        finder = self._finder()
         try:
             input_file, df = finder.run_pipeline(
                 self.INPUT_FILE, 
                 "routes_via_accident_resolved.xlsx", 
-                test_limit = limit 
+                test_limit = limit,
+                concurrency = concurrency,
+                rate_per_sec = rate_per_sec
             )
-            self.dep = input_file['dep']
-            self.acc_coord = input_file['acc_coord']
-            self.dst = input_file['dst']
-            self.dep_major_address = df["dep_major_address"]
-            self.dep_full_address = df["dep_full_address"]
-            self.dep_coord = df['dep_coord']
-            self.acc_full_address = df['acc_full_address']
-            self.acc_coord = df["acc_coord"]
-            self.dst_major_address = df["dst_major_address"]
-            self.dst_full_address = df["dst_full_address"]
-            self.dst_coord = df["dst_coord"]
+            self._set_nearest(input_file, df)
+            if finder.place_index is not None:
+                finder.place_index.save(self.PLACE_INDEX_FILE)
 
         except Exception as e:
             df = None
             print(f"\n❌ An error occurred during pipeline execution.: {e}")
             print(df)
         return df
-    def Snapper(self):
-        snapper =  snapCoords.SNAP(self.KAKAO_API_KEY)
-        data = {
-            "dep_full_address" : self.dep_full_address,
-            'dep_coord' : self.dep_coord,
-            'acc_full_address' : self.acc_full_address,
-            "acc_coord" : self.acc_coord,
-            "dst_full_address" : self.dst_full_address,
-            "dst_coord" : self.dst_coord
-        }
-        df = pd.DataFrame(data)
-        self.snap_dep_coord, self.snap_acc_coord, self.snap_dst_coord = snapper.run(df)
-        return self.snap_dep_coord, self.snap_acc_coord, self.snap_dst_coord
+
+    def _set_nearest(self, input_file, df):
+        self.dep = input_file['dep']
+        self.acc_coord = input_file['acc_coord']
+        self.dst = input_file['dst']
+        self.dep_major_address = df["dep_major_address"]
+        self.dep_full_address = df["dep_full_address"]
+        # 좌표 열은 float64 CoordArray로 (문자열/튜플은 저장할 때만)
+        self.dep_coord = CoordArray.from_pairs(df['dep_coord'])
+        self.acc_full_address = df['acc_full_address']
+        self.acc_coord = CoordArray.from_pairs(df["acc_coord"])
+        self.dst_major_address = df["dst_major_address"]
+        self.dst_full_address = df["dst_full_address"]
+        self.dst_coord = CoordArray.from_pairs(df["dst_coord"])
+
+    def _new_snapper(self, concurrent = False, backend = "kakao"):
+        snapper = snapCoords.SNAP(self.KAKAO_API_KEY, cache_store = self._cache("snap"), concurrent = concurrent,
+                                  backend = backend)
+        snapper.REGION_FILE = self.REGION_FILE
+        return snapper
+
+    def _new_extractor(self, concurrent = False, backend = "kakao"):
+        Extract = routeExtract.Extractor(self.KAKAO_API_KEY, cache_store = self._cache("route", track_access = True),
+                                         concurrent = concurrent, backend = backend)
+        Extract.REGION_FILE = self.REGION_FILE
+        return Extract
+
+    def Snapper(self, snapper = None, concurrent = False, backend = "kakao"):
+        if snapper is None:
+            snapper = self._new_snapper(concurrent, backend)
+        dep, acc, dst = (CoordArray.from_pairs(c) for c in (self.dep_coord, self.acc_coord, self.dst_coord))
+        self.snap_dep_coord, self.snap_acc_coord, self.snap_dst_coord, self.snap_diagnostics = \
+            snapper.snap_coords(dep, acc, dst)
+        return self.snap_dep_coord, self.snap_acc_coord, self.snap_dst_coord, self.snap_diagnostics
     ##################################
-    def route_extractor(self):
+    def route_extractor(self, Extract = None, concurrent = False, backend = "kakao"):
 
         snap_dep_lat, snap_dep_lon = self.Series_2_coords(self.snap_dep_coord)
         snap_acc_lat, snap_acc_lon = self.Series_2_coords(self.snap_acc_coord)
         snap_dst_lat, snap_dst_lon = self.Series_2_coords(self.snap_dst_coord)
 
+        if Extract is None:
+            Extract = self._new_extractor(concurrent, backend)
 
-        dep_acc_data = {
-            'lat': snap_dep_lat, 
-            'lon': snap_dep_lon,
-            'dest_lat': snap_acc_lat, 
-            'dest_lon': snap_acc_lon   
-        }
-        acc_dst_data = {
-            'lat': snap_acc_lat,  
-            'lon': snap_acc_lon,
-            'dest_lat': snap_dst_lat, 
-            'dest_lon': snap_dst_lon
-        }
+        # 출발지→사고지점, 사고지점→목적지 두 구간을 하나의 작업 목록으로 (같은 쌍은 한 번만 요청)
+        print("##### Extracting the routes (origin → accident location → destination) #####")
+        n = len(snap_dep_lat)
+        legs = np.vstack([
+            np.column_stack([snap_dep_lat, snap_dep_lon, snap_acc_lat, snap_acc_lon]),
+            np.column_stack([snap_acc_lat, snap_acc_lon, snap_dst_lat, snap_dst_lon]),
+        ]).astype(np.float64)
+        routes = Extract.fetch_routes(legs)
+        paths = [r["path"] if r else None for r in routes]
+        print(f"Extracted {sum(p is not None for p in paths)} paths out of {len(paths)} legs.")
 
-        dep_acc_df = pd.DataFrame(dep_acc_data)
-        acc_dst_df = pd.DataFrame(acc_dst_data)
+        # 구간별 요약: 점 수, 형상 길이, Kakao 거리/소요 시간
+        summary = routeExtract.route_summary(routes)
+        self.route_summary = pd.concat(
+            [summary.iloc[:n].add_prefix("dep_acc_").set_axis(snap_dep_lat.index),
+             summary.iloc[n:].add_prefix("acc_dst_").set_axis(snap_dep_lat.index)], axis = 1)
 
-        Extract = routeExtract.Extractor(self.KAKAO_API_KEY)
-
-        print("##### Extracting the route from the origin to the accident location #####")
-        res_dep_acc_df = Extract.process_routes_from_dataframe(dep_acc_df)
-        res_dep_acc_df.columns = ['lat', 'lon', 'dest_lat', 'dest_lon', "snap_dep_coord", "snap_acc_coord", "dep_acc_route", "src"]
-        
-        
-        print("##### Extracting the route from the accident location to the Destination #####")
-        res_acc_dst_df = Extract.process_routes_from_dataframe(acc_dst_df)
-        res_acc_dst_df.columns = ['lat', 'lon', 'dest_lat', 'dest_lon', "snap_acc_coord", "snap_dst_coord", "acc_dst_route", "src"]
-        
-        result_df = pd.concat([res_dep_acc_df['dep_acc_route'], res_acc_dst_df['acc_dst_route']], axis = 1)
-        result_df['total_route'] = (
-                                    result_df['dep_acc_route'].fillna('').astype(str) + 
-                                    '; ' + 
-                                    result_df['acc_dst_route'].fillna('').astype(str)
-                                    )
+        result_df = pd.DataFrame({"dep_acc_route": pd.Series(paths[:n], index = snap_dep_lat.index, dtype = object),
+                                  "acc_dst_route": pd.Series(paths[n:], index = snap_dep_lat.index, dtype = object)})
+        # 전체 경로 = 두 구간 배열을 이어 붙임 (둘 다 없으면 None)
+        result_df['total_route'] = pd.Series(
+            [self._join_routes(a, b) for a, b in zip(result_df['dep_acc_route'], result_df['acc_dst_route'])],
+            index = result_df.index, dtype = object)
         print("--- total_route --- ")
         print(result_df.head())
         self.dep_acc_route = result_df["dep_acc_route"]
         self.acc_dst_route = result_df["acc_dst_route"]
         self.total_route = result_df["total_route"]
 
-    def save_file(self, OUTPUT_FILE):
+    @staticmethod
+    def _join_routes(a, b):
+        legs = [leg for leg in (a, b) if leg is not None]
+        return np.vstack(legs) if legs else None
+
+    @staticmethod
+    def _route_strings(dep_acc, acc_dst):
+        """경로 배열 열 → 저장용 문자열 (total은 기존 형식 그대로 "dep_acc; acc_dst")"""
+        dep_acc = dep_acc.map(routeExtract.format_path)
+        acc_dst = acc_dst.map(routeExtract.format_path)
+        return dep_acc, acc_dst, dep_acc.fillna('').astype(str) + '; ' + acc_dst.fillna('').astype(str)
+
+    def _output_frame(self, route_text = True):
+        # 문자열 변환은 여기서 한 번만
+        # route_text=False면 경로 열에 점 개수만 (형상은 _write_routes로 따로 저장)
+        def pairs(c): return c.to_pairs() if isinstance(c, CoordArray) else c
+        def strings(c): return c.to_strings() if isinstance(c, CoordArray) else c
+        routes = (self.dep_acc_route, self.acc_dst_route, self.total_route)
+        if self.dep_acc_route is not None and self.acc_dst_route is not None:
+            if route_text:
+                routes = self._route_strings(self.dep_acc_route, self.acc_dst_route)
+            else:
+                routes = tuple(r.map(lambda p: 0 if p is None else len(p)) for r in routes)
         data = {
             "dep" : self.dep, 
-            "acc_coord" :  self.acc_coord,
+            "acc_coord" :  pairs(self.acc_coord),
             "dst" : self.dst,
             "dep_major_address" : self.dep_major_address,
             "dep_full_address" : self.dep_full_address,
-            "dep_coord" : self.dep_coord ,
+            "dep_coord" : pairs(self.dep_coord) ,
             "acc_full_addresss" : self.acc_full_address,
-            "acc_coord" : self.acc_coord,
+            "acc_coord" : pairs(self.acc_coord),
             "dst_major_address" : self.dst_major_address,
             "dst_full_address" : self.dst_full_address,
-            "dst_coord" : self.dst_coord,
-            "snap_dep_coord" :  self.snap_dep_coord,
-            "snap_acc_coord" :  self.snap_acc_coord,
-            "snap_dst_coord" :  self.snap_dst_coord,
-            "dep_acc_route" : self.dep_acc_route ,
-            "acc_dst_route" : self.acc_dst_route,
-            "total_route" : self.total_route,     
+            "dst_coord" : pairs(self.dst_coord),
+            "snap_dep_coord" :  strings(self.snap_dep_coord),
+            "snap_acc_coord" :  strings(self.snap_acc_coord),
+            "snap_dst_coord" :  strings(self.snap_dst_coord),
+            "dep_acc_route" : routes[0] ,
+            "acc_dst_route" : routes[1],
+            "total_route" : routes[2],     
         }
-        dataFrame = pd.DataFrame(data)
-        dataFrame.to_excel(OUTPUT_FILE)
+        if self.route_summary is not None:
+            data.update(self.route_summary.items())
+        return pd.DataFrame(data)
+
+    def _write_routes(self, route_writer):
+        route_writer.write(self.dep_acc_route.index, {"dep_acc_route": self.dep_acc_route.tolist(),
+                                                      "acc_dst_route": self.acc_dst_route.tolist()})
+
+    def save_file(self, OUTPUT_FILE, ROUTE_FILE = None):
+        """
+        ROUTE_FILE(.parquet/.arrow)이 있으면 경로 형상은 숫자 배열 그대로 ROUTE_FILE에 쓰고
+        OUTPUT_FILE의 경로 열에는 점 개수만 남김 (긴 경로 문자열이 엑셀 셀 한도를 넘지 않도록)
+        """
+        if ROUTE_FILE:
+            route_writer = chunkIO.RouteWriter(ROUTE_FILE)
+            try:
+                self._write_routes(route_writer)
+            finally:
+                route_writer.close()
+        dataFrame = self._output_frame(route_text = not ROUTE_FILE)
+        if self.snap_diagnostics is None:
+            dataFrame.to_excel(OUTPUT_FILE)
+        else:
+            # 스냅 진단표(거리, 도로명, 출처, 캐시 적중)는 별도 시트로
+            with pd.ExcelWriter(OUTPUT_FILE) as writer:
+                dataFrame.to_excel(writer)
+                self.snap_diagnostics.to_excel(writer, sheet_name = "snap_diagnostics")
         print("==== Save Finish ====")
 
+    def _clear_results(self):
+        for name in ("dep", "acc_coord", "dst", "dep_major_address", "dep_full_address", "dep_coord",
+                     "acc_full_address", "dst_major_address", "dst_full_address", "dst_coord",
+                     "snap_dep_coord", "snap_acc_coord", "snap_dst_coord", "snap_diagnostics",
+                     "dep_acc_route", "acc_dst_route", "total_route", "route_summary"):
+            setattr(self, name, None)
+
+    def run_streaming(self, OUTPUT_FILE, chunksize = 5000, limit = None, concurrency = None, rate_per_sec = None,
+                      JOURNAL_DIR = None, resume = True, ROUTE_FILE = None, route_backend = "kakao",
+                      snap_concurrent = False, snap_backend = "kakao"):
+        """
+        입력을 chunksize 행씩 읽어 nearest → snap → route 를 청크 단위로 처리하고
+        결과를 OUTPUT_FILE(.xlsx/.csv)에 바로 이어 씀 (메모리 사용량이 입력 크기와 무관)
+        ROUTE_FILE(.parquet/.arrow)이 있으면 경로 형상은 그 파일에 청크별로 이어 씀 (save_file 참고)
+        route_backend="osm"이면 경로는 도로 그래프 최단 경로 (못 찾은 구간만 카카오)
+        snap_concurrent/snap_backend는 Snapper의 concurrent/backend와 같음
+        resume=True 이면 JOURNAL_DIR(기본: OUTPUT_FILE + ".journal")에 청크/단계별 결과를 남기고,
+        같은 입력으로 다시 실행할 때 완료된 단계는 저널에서 읽어 건너뜀
+        """
+        journal = None
+        if resume:
+            journal = runJournal.RunJournal(JOURNAL_DIR or f"{OUTPUT_FILE}.journal", self.INPUT_FILE, chunksize, limit)
+            if journal.completed("route"):
+                print(f"Resuming: {journal.completed('route')} chunk(s) already completed.")
+
+        finder = self._finder()
+        snapper = self._new_snapper(snap_concurrent, snap_backend)
+        Extract = self._new_extractor(bool(concurrency), route_backend)
+        writer = chunkIO.ChunkWriter(OUTPUT_FILE)
+        route_writer = chunkIO.RouteWriter(ROUTE_FILE) if ROUTE_FILE else None
+        try:
+            for i, chunk in enumerate(chunkIO.iter_input_chunks(self.INPUT_FILE, chunksize, limit)):
+                print(f"===== Chunk {i} : rows {chunk.index[0]} ~ {chunk.index[-1]} =====")
+                self._process_chunk(i, chunk, finder, snapper, Extract, concurrency, rate_per_sec, journal)
+                if route_writer is not None:
+                    self._write_routes(route_writer)
+                writer.write(self._output_frame(route_text = route_writer is None))
+                self._clear_results()
+        finally:
+            self._finish_finder(finder)
+            writer.close()
+            if route_writer is not None:
+                route_writer.close()
+        print(f"==== Save Finish ({writer.rows} rows) ====")
+
+    def _process_chunk(self, i, chunk, finder, snapper, Extract, concurrency = None, rate_per_sec = None, journal = None):
+        for col in ("dep", "dst", "acc_coord"):
+            if col not in chunk.columns:
+                chunk[col] = None
+
+        if journal is not None and journal.is_done(i, "nearest"):
+            nearest = journal.load(i, "nearest")
+        else:
+            nearest = finder.resolve_frame(chunk, concurrency = concurrency, rate_per_sec = rate_per_sec)
+            nearest["dep"], nearest["dst"] = chunk["dep"], chunk["dst"]
+            if journal is not None:
+                finder._save_cache()
+                journal.save(i, "nearest", nearest)
+        self._set_nearest(nearest, nearest)
+
+        if journal is not None and journal.is_done(i, "snap"):
+            snap = journal.load(i, "snap")
+            prefixes = ["snap_dep", "snap_acc", "snap_dst"]
+            self.snap_dep_coord, self.snap_acc_coord, self.snap_dst_coord = (
+                CoordArray.from_frame(snap, p) for p in prefixes)
+            self.snap_diagnostics = snap.drop(columns = [f"{p}_{c}" for p in prefixes for c in ("lat", "lon")])
+        else:
+            self.Snapper(snapper)
+            if journal is not None:
+                journal.save(i, "snap", pd.concat([self.snap_dep_coord.to_frame("snap_dep"),
+                                                   self.snap_acc_coord.to_frame("snap_acc"),
+                                                   self.snap_dst_coord.to_frame("snap_dst"),
+                                                   self.snap_diagnostics], axis = 1))
+
+        if journal is not None and journal.is_done(i, "route"):
+            route = journal.load(i, "route")
+            route_cols = ["dep_acc_route", "acc_dst_route", "total_route"]
+            self.dep_acc_route, self.acc_dst_route, self.total_route = (route[c] for c in route_cols)
+            self.route_summary = route.drop(columns = route_cols)
+        else:
+            self.route_extractor(Extract)
+            if journal is not None:
+                journal.save(i, "route", pd.concat([pd.DataFrame({"dep_acc_route": self.dep_acc_route,
+                                                                  "acc_dst_route": self.acc_dst_route,
+                                                                  "total_route": self.total_route}),
+                                                    self.route_summary], axis = 1))
 
 if __name__ == "__main__":
     INPUT_FILE = "Samples/initial_input_data.xlsx"
     OUTPUT_FILE = "./result/total.xlsx"
     KAKAO_API_KEY = 'Input Your API KEY'
-    LocA_run = LocA(INPUT_FILE,KAKAO_API_KEY) 
+    CACHE_DB = "loca_cache.db"  # nearest/snap/route 영구 캐시 (None이면 nearest_cache.json을 지우고 새로 시작)
+    LocA_run = LocA(INPUT_FILE,KAKAO_API_KEY,CACHE_DB) 
     df = LocA_run.nearest_coords() # YH
     LocA_run.Snapper() # JW
     LocA_run.route_extractor() # SY
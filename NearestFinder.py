@@ -1,7 +1,16 @@
-import os, json, time, random, warnings, re, requests
+import os, json, time, random, warnings, re, requests, asyncio
 import pandas as pd
 from tqdm import tqdm
-from typing import Optional, Tuple, Dict, Iterable, Union
+from typing import Optional, Tuple, Dict, Iterable, List, Union
+from collections import OrderedDict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from rateLimit import TokenBucket
+from keywordCache import KeywordCache, QueryNormalizer, hav_m
+from cacheStore import CacheStore
+from gazetteer import PlaceIndex
+from coords import parse_coord, parse_coord_array, coord_pairs
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -9,29 +18,83 @@ warnings.filterwarnings("ignore", category=UserWarning)
 FLOAT_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
 RADIUS_STEPS = (3000, 10000, 20000)
 API_DELAY = 0.08
+KAKAO_LOCAL_URL = "https://dapi.kakao.com/v2/local"
+KAKAO_QPS = 30          # async 모드 기본 토큰 버킷 크기 (Kakao 쿼터 기준)
+ASYNC_CONCURRENCY = 16
+PROBE_WORKERS = 12      # 반경 동시 탐색(parallel_radius) 스레드 수
+MISS_CELL_ROUND = 2     # 실패 캐시 셀 (소수 2자리 ≈ 1km)
+KW_CELL_DEG = 0.005     # 공간 키워드 캐시 셀 크기 (≈ 500m)
+KW_PAGE_SIZE = 15       # 키워드 검색 한 번에 받는 결과 수 (공간 캐시 재정렬용, Kakao 최대 15)
+REVGEO_ROUND = 5        # 역지오코딩 메모 키 반올림 자릿수 (소수 5자리 ≈ 1m)
+REVGEO_LRU_SIZE = 50000
+OUT_COLUMNS = ("dep_major_address", "dep_full_address", "dep_coord", "acc_full_address",
+               "acc_coord", "dst_major_address", "dst_full_address", "dst_coord")
 
 
 class NearestFind:
-    def __init__(self, kakao_api_key: str, cache_path: str = "nearest_cache.json"):
+    def __init__(self, kakao_api_key: str, cache_path: str = "nearest_cache.json",
+                 api_base: str = KAKAO_LOCAL_URL, rate_limiter: Optional[TokenBucket] = None,
+                 parallel_radius: bool = False, kw_cell_deg: float = KW_CELL_DEG,
+                 cache_store: Optional[CacheStore] = None,
+                 revgeo_round: int = REVGEO_ROUND, revgeo_maxsize: int = REVGEO_LRU_SIZE,
+                 place_index: Optional[PlaceIndex] = None,
+                 alias_path: Optional[str] = "query_alias.json"):
         self.session = requests.Session()
         self.headers = {"Authorization": f"KakaoAK {kakao_api_key}"}
+        self.api_base = api_base.rstrip("/")
+        self.rate_limiter = rate_limiter
+
+        self.parallel_radius = parallel_radius
+        self.miss_cache = {}
+        self.miss_skipped = 0
+        self._probe_pool = None
+        self._probe_pool_lock = threading.Lock()
+
+        self.revgeo_round = revgeo_round
+        self.revgeo_maxsize = revgeo_maxsize
+        self._revgeo = OrderedDict()
+        self._revgeo_lock = threading.Lock()
+        self.revgeo_hits = 0
+        self.revgeo_calls = 0
         
         self.cache_path = cache_path
+        self.cache_store = cache_store
         self.cache = self._load_cache()
+        self.kw_cache = KeywordCache(kw_cell_deg)
+        self.kw_cache.load_from_dict(self.cache)
+        # 키워드 응답 목록(포함 반경, 장소들)은 같은 CacheStore의 keyword namespace에 보관해 재시작 후에도 재사용
+        self.kw_store = cache_store.namespace("keyword") if hasattr(cache_store, "namespace") else None
+        if self.kw_store is not None:
+            self.kw_cache.load_entries(self.kw_store.items())
+        # 역지오코딩 결과도 revgeo namespace에 보관 (LRU는 그 앞단의 메모리 메모)
+        self.revgeo_store = cache_store.namespace("revgeo") if hasattr(cache_store, "namespace") else None
+        self.place_index = place_index
+
+        self.normalizer = QueryNormalizer(alias_path)
+        self.normalizer.learn_from_cache(self.cache)
+        self._called_queries = {}
         
     def _load_cache(self) -> Dict:
+        if self.cache_store is not None:
+            return self.cache_store
         if os.path.exists(self.cache_path):
             with open(self.cache_path, "r", encoding="utf-8") as f:
                 return json.load(f)
         return {}
 
     def _save_cache(self):
+        self.normalizer.save()
+        if self.cache_store is not None:
+            self.cache_store.flush()
+            return
         with open(self.cache_path, "w", encoding="utf-8") as f:
             json.dump(self.cache, f, ensure_ascii=False, indent=2)
 
     def _http_get_with_retry(self, url, headers, params, timeout=8, max_retries=3):
         for attempt in range(max_retries):
             try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
                 r = self.session.get(url, headers=headers, params=params, timeout=timeout)
                 if r.status_code in (429, 500, 502, 503, 504):
                     time.sleep(0.3 * (2 ** attempt))
@@ -43,77 +106,275 @@ class NearestFind:
                     raise
                 time.sleep(0.3 * (2 ** attempt))
 
+    def _throttle(self):
+        # 토큰 버킷이 있으면 _http_get_with_retry에서 제한하므로 고정 sleep 생략
+        if self.rate_limiter is None:
+            time.sleep(API_DELAY)
+
     def _kakao_keyword_nearest(self, query, center_lat, center_lon, radius) -> Optional[Tuple[float, float, str, str]]:
+        return self._kakao_keyword_search(query, center_lat, center_lon, radius)[1]
+
+    def _kakao_keyword_search(self, query, center_lat, center_lon, radius) -> Tuple[bool, Optional[Tuple[float, float, str, str]]]:
+        """(응답 여부, 최근접 장소) — 요청 오류/재시도 소진은 (False, None), 빈 documents는 (True, None)"""
         if not query or str(query).strip() == "":
-            return None
+            return True, None
         params = {"query": str(query).strip(), "y": center_lat, "x": center_lon,
-                  "radius": radius, "sort": "distance", "page": 1, "size": 1}
-        time.sleep(API_DELAY)
+                  "radius": radius, "sort": "distance", "page": 1, "size": KW_PAGE_SIZE}
+        self._throttle()
         try:
-            data = self._http_get_with_retry(
-                "https://dapi.kakao.com/v2/local/search/keyword.json", 
+            resp = self._http_get_with_retry(
+                f"{self.api_base}/search/keyword.json", 
                 self.headers, params
-            ).json()
-        except requests.exceptions.RequestException:
-            return None
+            )
+            # 429/5xx 재시도를 모두 소진하면 None → 검색 실패로 처리
+            if resp is None: return False, None
+            data = resp.json()
+        except (requests.exceptions.RequestException, ValueError):
+            return False, None
             
         docs = data.get("documents") or []
-        if not docs: return None
-        d = docs[0]
-        return (float(d["y"]), float(d["x"]), d.get("place_name"), d.get("road_address_name") or d.get("address_name"))
+        if not docs: return True, None
+        places = [(float(d["y"]), float(d["x"]), d.get("place_name"), d.get("road_address_name") or d.get("address_name"))
+                  for d in docs]
+        # 마지막 페이지면 반경 안의 장소를 모두 받은 것
+        complete = (data.get("meta") or {}).get("is_end")
+        canon = self.normalizer.canonical(query)
+        self.kw_cache.put(canon, center_lat, center_lon, places, radius if complete else None)
+        if self.kw_store is not None:
+            self.kw_store[f"{canon}-{center_lat}-{center_lon}-{radius}"] = [radius if complete else None, places]
+        return True, places[0]
+
+    def _revgeo_key(self, lat, lon) -> Tuple[float, float]:
+        return round(lat, self.revgeo_round), round(lon, self.revgeo_round)
+
+    def _memo_reverse_geocode(self, key, addr):
+        with self._revgeo_lock:
+            self._revgeo[key] = addr
+            if len(self._revgeo) > self.revgeo_maxsize:
+                self._revgeo.popitem(last=False)
+
+    def _stored_reverse_geocodes(self, keys: list) -> Dict:
+        """revgeo namespace에 저장된 주소 {반올림 좌표: 주소} (값은 [주소]로 저장해 주소 없음(None)도 구분)"""
+        if self.revgeo_store is None or not keys:
+            return {}
+        found = self.revgeo_store.get_many(f"{lat}-{lon}" for lat, lon in keys)
+        addrs = {}
+        for lat, lon in keys:
+            value = found.get(f"{lat}-{lon}")
+            if isinstance(value, list) and len(value) == 1:
+                addrs[(lat, lon)] = value[0]
+                self._memo_reverse_geocode((lat, lon), value[0])
+        with self._revgeo_lock:
+            self.revgeo_hits += len(addrs)
+        return addrs
 
     def _kakao_reverse_geocode_fulladdr(self, lat, lon) -> Optional[str]:
+        key = self._revgeo_key(lat, lon)
+        with self._revgeo_lock:
+            if key in self._revgeo:
+                self._revgeo.move_to_end(key)
+                self.revgeo_hits += 1
+                return self._revgeo[key]
+        stored = self._stored_reverse_geocodes([key])
+        if key in stored:
+            return stored[key]
+
+        ok, addr = self._fetch_reverse_geocode(*key)
+        if ok:
+            self._memo_reverse_geocode(key, addr)
+            if self.revgeo_store is not None:
+                self.revgeo_store[f"{key[0]}-{key[1]}"] = [addr]
+        return addr
+
+    def _fetch_reverse_geocode(self, lat, lon) -> Tuple[bool, Optional[str]]:
+        """(성공 여부, 주소) — 실패한 요청은 메모하지 않음"""
+        with self._revgeo_lock:
+            self.revgeo_calls += 1
         try:
             params = {"y": lat, "x": lon}
-            time.sleep(API_DELAY)
-            data = self._http_get_with_retry(
-                "https://dapi.kakao.com/v2/local/geo/coord2address.json", 
+            self._throttle()
+            resp = self._http_get_with_retry(
+                f"{self.api_base}/geo/coord2address.json", 
                 self.headers, params
-            ).json()
+            )
+            if resp is None: return False, None
+            data = resp.json()
             docs = data.get("documents") or []
-            if not docs: return None
+            if not docs: return True, None
             addr = docs[0].get("road_address") or docs[0].get("address") or {}
-            return addr.get("address_name")
+            return True, addr.get("address_name")
         except Exception:
-            return None
+            return False, None
+
+    def _pending_reverse_geocodes(self, coords: Iterable[Tuple[float, float]]) -> Tuple[Dict, list]:
+        """
+        프레임 전체 고유 (반올림) 좌표 → (메모/revgeo 저장소에 있던 주소 dict, 아직 없는 좌표 목록)
+        주소 dict는 프레임 안에서만 쓰므로 LRU 크기보다 좌표가 많아도 밀려나지 않음
+        """
+        addrs, pending = {}, OrderedDict()
+        with self._revgeo_lock:
+            for c in coords:
+                if not c: continue
+                key = self._revgeo_key(c[0], c[1])
+                if key in addrs or key in pending: continue
+                if key in self._revgeo:
+                    self._revgeo.move_to_end(key)
+                    self.revgeo_hits += 1
+                    addrs[key] = self._revgeo[key]
+                else:
+                    pending[key] = True
+        stored = self._stored_reverse_geocodes(list(pending))
+        addrs.update(stored)
+        return addrs, [key for key in pending if key not in stored]
+
+    def prefetch_reverse_geocodes(self, coords: Iterable[Tuple[float, float]]) -> Dict:
+        """프레임의 고유 좌표를 한 번씩만 역지오코딩 → {반올림 좌표: 주소} (_row_output에 전달)"""
+        addrs, pending = self._pending_reverse_geocodes(coords)
+        for lat, lon in tqdm(pending, ncols=90, desc="Reverse geocoding"):
+            addrs[(lat, lon)] = self._kakao_reverse_geocode_fulladdr(lat, lon)
+        return addrs
+
+    def _frame_address(self, lat, lon, addrs: Optional[Dict]) -> Optional[str]:
+        key = self._revgeo_key(lat, lon)
+        if addrs is not None and key in addrs:
+            return addrs[key]
+        return self._kakao_reverse_geocode_fulladdr(lat, lon)
 
     @staticmethod
     def _parse_coord_series(val) -> Optional[Tuple[float, float]]:
-        if val is None: return None
-        nums = FLOAT_RE.findall(str(val))
-        if len(nums) < 2: return None
-        try:
-            lat, lon = float(nums[0]), float(nums[1])
-            if not (-90 <= lat <= 90 and -180 <= lon <= 180): return None
-            return lat, lon
-        except:
-            return None
+        return parse_coord(val)
+
+    @staticmethod
+    def _parse_acc_column(df: pd.DataFrame) -> list:
+        if "acc_coord" not in df.columns:
+            return [None] * len(df)
+        return coord_pairs(*parse_coord_array(df["acc_coord"]))
+
+    @staticmethod
+    def _query_column(df: pd.DataFrame, col: str) -> list:
+        return df[col].tolist() if col in df.columns else [None] * len(df)
 
     def _find_nearest_by_steps(self, query, acc_lat, acc_lon) -> Optional[Tuple[float, float, str, str]]:
+        if self.parallel_radius:
+            return self._find_nearest_parallel(query, acc_lat, acc_lon)
+        cached = self._cached_nearest(query, acc_lat, acc_lon)
+        if cached: return cached
         for r in RADIUS_STEPS:
-            key = f"{query}-{acc_lat}-{acc_lon}-{r}"
-            if key in self.cache: return self.cache[key]
-            
             res = self._kakao_keyword_nearest(query, acc_lat, acc_lon, r)
             
             if res:
-                self.cache[key] = res
+                self._store_nearest(query, acc_lat, acc_lon, r, res)
                 return res
         return None
 
-    def process_row(self, row: pd.Series) -> Dict:
-        dep_q, dst_q = row.get("dep"), row.get("dst")
-        acc_pair = self._parse_coord_series(row.get("acc_coord"))
-        
-        out = {"dep_full_address": None, "dep_coord": None,
-               "acc_full_address": None, "acc_coord": None,
-               "dst_full_address": None, "dst_coord": None}
-        
-        
+    def _cached_nearest(self, query, acc_lat, acc_lon):
+        """
+        RADIUS_STEPS 단계 탐색 전체를 대신하는 캐시 조회
+        단계 탐색 결과는 최대 반경 안의 최근접 장소이므로 공간 캐시/PlaceIndex는 최대 반경으로 한 번만 조회
+        """
+        canon = self.normalizer.canonical(query)
+        hit, spatial = None, False
+        for r in RADIUS_STEPS:
+            key = f"{canon}-{acc_lat}-{acc_lon}-{r}"
+            legacy_key = f"{query}-{acc_lat}-{acc_lon}-{r}"
+            if key in self.cache:
+                hit = self.cache[key]
+                break
+            if legacy_key != key and legacy_key in self.cache:
+                return self.cache[legacy_key]
+        else:
+            hit = self.kw_cache.get(canon, acc_lat, acc_lon, RADIUS_STEPS[-1])
+            if hit is None and self.place_index is not None:
+                hit = self.place_index.nearest(canon, acc_lat, acc_lon, RADIUS_STEPS[-1])
+            spatial = hit is not None
+        # 다른 표기의 검색어가 이미 API로 받아 둔 결과를 재사용한 경우
+        if hit and str(query).strip() not in self._called_queries.get(canon, (str(query).strip(),)):
+            self.normalizer.saved += 1
+        if spatial:
+            # 다음 조회(재실행 포함)는 정확한 키로 찾도록 단계 탐색이 멈췄을 반경의 키로 저장
+            d = hav_m(acc_lat, acc_lon, hit[0], hit[1])
+            r = next((r for r in RADIUS_STEPS if d <= r), RADIUS_STEPS[-1])
+            self._store_nearest(query, acc_lat, acc_lon, r, hit, called=False)
+        return hit
+
+    def _store_nearest(self, query, acc_lat, acc_lon, r, res, called=True):
+        """called=False: API 호출 없이 캐시에서 찾은 결과 (검색어 별칭 절감 집계에서 제외)"""
+        canon = self.normalizer.canonical(query)
+        key = f"{canon}-{acc_lat}-{acc_lon}-{r}"
+        self.cache[key] = res
+        if called:
+            self._called_queries.setdefault(canon, set()).add(str(query).strip())
+        if self.place_index is not None:
+            self.place_index.add_result(query, res, origin=(acc_lat, acc_lon))
+        self.normalizer.learn(query, res)
+
+    def _probe_executor(self) -> ThreadPoolExecutor:
+        # resolve_async의 여러 스레드가 동시에 처음 호출해도 풀은 하나만 생성
+        with self._probe_pool_lock:
+            if self._probe_pool is None:
+                self._probe_pool = ThreadPoolExecutor(max_workers=PROBE_WORKERS)
+            return self._probe_pool
+
+    def _find_nearest_parallel(self, query, acc_lat, acc_lon) -> Optional[Tuple[float, float, str, str]]:
+        """
+        RADIUS_STEPS를 동시에 요청하고 가장 작은 반경의 결과를 사용
+        모든 반경에서 빈 결과가 온 (query, 사고 셀)만 miss_cache에 기록해 재요청하지 않음 (요청 오류는 기록 안 함)
+        """
+        cached = self._cached_nearest(query, acc_lat, acc_lon)
+        if cached: return cached
+
+        miss_key = (self.normalizer.canonical(query), round(acc_lat, MISS_CELL_ROUND), round(acc_lon, MISS_CELL_ROUND))
+        if miss_key in self.miss_cache:
+            self.miss_skipped += 1
+            return None
+
+        probe_pool = self._probe_executor()
+        futures = [(r, probe_pool.submit(self._kakao_keyword_search, query, acc_lat, acc_lon, r))
+                   for r in RADIUS_STEPS]
+
+        hit, all_answered = None, True
+        for r, fut in futures:
+            if hit is not None:
+                fut.cancel()
+                continue
+            answered, res = fut.result()
+            all_answered &= answered
+            if res:
+                self._store_nearest(query, acc_lat, acc_lon, r, res)
+                hit = res
+
+        if hit is None and all_answered:
+            self.miss_cache[miss_key] = True
+        return hit
+
+    def _row_lookups(self, dep_q, dst_q, acc_pair):
+        """(acc_pair, dst 검색 결과, dep 검색 결과) — 키워드 검색까지만 수행"""
+        if not acc_pair: return None, None, None
+
+        acc_lat, acc_lon = acc_pair
+        nd = ns = None
+        if not self._is_blank(dst_q):
+            nd = self._find_nearest_by_steps(dst_q, acc_lat, acc_lon)
+        if not self._is_blank(dep_q):
+            ns = self._find_nearest_by_steps(dep_q, acc_lat, acc_lon)
+        return acc_pair, nd, ns
+
+    @staticmethod
+    def _is_blank(q) -> bool:
+        return pd.isna(q) or str(q).strip() == ""
+
+    @staticmethod
+    def _lookup_coords(lookups: Iterable) -> Iterable[Tuple[float, float]]:
+        for acc_pair, nd, ns in lookups:
+            if not acc_pair: continue
+            yield acc_pair
+            if nd: yield nd[0], nd[1]
+            if ns: yield ns[0], ns[1]
+
+    def _row_output(self, acc_pair, nd, ns, addrs: Optional[Dict] = None) -> Dict:
         out = {"dep_major_address" : None, "dep_full_address": None, "dep_coord": None,
                "acc_full_address": None, "acc_coord": None,
                "dst_major_address" : None, "dst_full_address": None, "dst_coord": None}
-    
 
         self._last_dep_major_address = None
         self._last_dst_major_address = None
@@ -122,35 +383,113 @@ class NearestFind:
 
         acc_lat, acc_lon = acc_pair
         
-        out["acc_full_address"] = self._kakao_reverse_geocode_fulladdr(acc_lat, acc_lon)
+        out["acc_full_address"] = self._frame_address(acc_lat, acc_lon, addrs)
         out["acc_coord"] = (acc_lat, acc_lon) # after
 
-        dep_is_none = pd.isna(dep_q) or str(dep_q).strip() == ""
-        dst_is_none = pd.isna(dst_q) or str(dst_q).strip() == ""
-
-        if not dst_is_none:
-            nd = self._find_nearest_by_steps(dst_q, acc_lat, acc_lon)
-            if nd:
-                d_lat, d_lon, place, addr = nd
-                full = self._kakao_reverse_geocode_fulladdr(d_lat, d_lon) or addr
-                self._last_dst_major_address = place 
-                out["dep_major_address"] = place    
-                out["dst_full_address"] = full           
-                out["dst_coord"] = (d_lat, d_lon)
+        if nd:
+            d_lat, d_lon, place, addr = nd
+            full = self._frame_address(d_lat, d_lon, addrs) or addr
+            self._last_dst_major_address = place 
+            out["dep_major_address"] = place    
+            out["dst_full_address"] = full           
+            out["dst_coord"] = (d_lat, d_lon)
         
-        if not dep_is_none:
-            ns = self._find_nearest_by_steps(dep_q, acc_lat, acc_lon)
-            if ns:
-                s_lat, s_lon, place, addr = ns
-                full = self._kakao_reverse_geocode_fulladdr(s_lat, s_lon) or addr
-                self._last_dep_major_address = place         
-                out["dst_major_address"] = place
-                out["dep_full_address"] = full                  
-                out["dep_coord"] = (s_lat, s_lon)
+        if ns:
+            s_lat, s_lon, place, addr = ns
+            full = self._frame_address(s_lat, s_lon, addrs) or addr
+            self._last_dep_major_address = place         
+            out["dst_major_address"] = place
+            out["dep_full_address"] = full                  
+            out["dep_coord"] = (s_lat, s_lon)
 
         return out
 
-    def run_pipeline(self, input_excel: str, output_excel: str, test_limit: Optional[int] = None):
+    def process_row(self, row: pd.Series) -> Dict:
+        acc_pair = self._parse_coord_series(row.get("acc_coord"))
+        return self._row_output(*self._row_lookups(row.get("dep"), row.get("dst"), acc_pair))
+
+    @staticmethod
+    def _assemble_frame(index, results: list) -> pd.DataFrame:
+        """행 결과 dict 목록을 미리 할당한 열 버퍼에 채운 뒤 DataFrame을 한 번만 생성"""
+        n = len(results)
+        cols = {c: [None] * n for c in OUT_COLUMNS}
+        for i, res in enumerate(results):
+            for c in OUT_COLUMNS:
+                cols[c][i] = res[c]
+        return pd.DataFrame(cols, index=index, columns=list(OUT_COLUMNS))
+
+    def resolve_rows(self, df: pd.DataFrame) -> list:
+        """
+        1) 모든 행의 키워드 검색 2) 프레임 전체 고유 좌표 역지오코딩을 한 번에 3) 행 조립
+        반환: df 행 순서의 process_row 결과 dict 목록
+        """
+        rows = zip(self._query_column(df, "dep"), self._query_column(df, "dst"), self._parse_acc_column(df))
+        lookups = [self._row_lookups(dep_q, dst_q, acc_pair)
+                   for dep_q, dst_q, acc_pair in tqdm(rows, total=len(df), ncols=90, desc="Resolving")]
+        addrs = self.prefetch_reverse_geocodes(self._lookup_coords(lookups))
+        return [self._row_output(*lk, addrs) for lk in lookups]
+
+    async def _resolve_async(self, df: pd.DataFrame, concurrency: int) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        inflight = asyncio.Semaphore(concurrency)
+        lookups = [None] * len(df)
+        rows = iter(enumerate(zip(self._query_column(df, "dep"), self._query_column(df, "dst"),
+                                  self._parse_acc_column(df))))
+
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+            async def call(fn, *args):
+                async with inflight:
+                    return await loop.run_in_executor(pool, fn, *args)
+
+            async def nearest(q, acc_lat, acc_lon):
+                if self._is_blank(q): return None
+                return await call(self._find_nearest_by_steps, q, acc_lat, acc_lon)
+
+            async def lookup_worker(pbar):
+                for i, (dep_q, dst_q, acc_pair) in rows:
+                    if not acc_pair:
+                        lookups[i] = (None, None, None)
+                    else:
+                        nd, ns = await asyncio.gather(nearest(dst_q, *acc_pair), nearest(dep_q, *acc_pair))
+                        lookups[i] = (acc_pair, nd, ns)
+                    pbar.update(1)
+
+            with tqdm(total=len(df), ncols=90, desc="Resolving(async)") as pbar:
+                await asyncio.gather(*(lookup_worker(pbar) for _ in range(concurrency)))
+
+            addrs, pending = self._pending_reverse_geocodes(self._lookup_coords(lookups))
+            pending = iter(pending)
+
+            async def revgeo_worker(pbar):
+                for lat, lon in pending:
+                    addrs[(lat, lon)] = await call(self._kakao_reverse_geocode_fulladdr, lat, lon)
+                    pbar.update(1)
+
+            with tqdm(ncols=90, desc="Reverse geocoding(async)") as pbar:
+                await asyncio.gather(*(revgeo_worker(pbar) for _ in range(concurrency)))
+
+        return [self._row_output(*lk, addrs) for lk in lookups]
+
+    def resolve_async(self, df: pd.DataFrame, concurrency: int = ASYNC_CONCURRENCY,
+                      rate_per_sec: Optional[float] = None) -> List[Dict]:
+        """
+        동시에 최대 concurrency개의 keyword/coord2address 요청을 유지하며 df 전체를 처리
+        반환: df 행 순서의 process_row 결과 dict 목록
+        공간 키워드 캐시는 최근접임이 보장될 때만 재사용하므로 결과는 처리 순서와 무관하게 resolve_rows와 같음
+        (API 호출 수는 동시에 진행된 같은 검색 때문에 더 많을 수 있음)
+        단, 학습된 검색어 별칭(alias_path)은 처리 순서에 따라 달라질 수 있음
+        """
+        if self.rate_limiter is None or rate_per_sec is not None:
+            self.rate_limiter = TokenBucket(rate_per_sec or KAKAO_QPS)
+        return asyncio.run(self._resolve_async(df, concurrency))
+
+    def run_pipeline(self, input_excel: str, output_excel: str, test_limit: Optional[int] = None,
+                     concurrency: Optional[int] = None, rate_per_sec: Optional[float] = None):
         try:
             df = pd.read_excel(input_excel)
         except FileNotFoundError:
@@ -160,17 +499,37 @@ class NearestFind:
         if test_limit: 
             df = df.head(test_limit)
             print(f"⚠️ Test mode: Processing only the top {test_limit} rows.")
-        out = pd.DataFrame(columns=[
-            "dep_major_address","dep_full_address", "dep_coord", "acc_full_address", 
-            "acc_coord","dst_major_address", "dst_full_address", "dst_coord"
-        ])
         print(f"Starting data processing. Total {len(df)} rows...")
         
-        for idx, row in tqdm(df.iterrows(), total=len(df), ncols=90, desc="Resolving"):
-            res = self.process_row(row)
-            out.loc[idx] = res
-
-        self._save_cache()
+        out = self.resolve_frame(df, concurrency=concurrency, rate_per_sec=rate_per_sec)
+        self.finish()
         out.to_excel(output_excel, index=False)
         print(f"✅ Processing complete and saved: {output_excel}")
-        return  df, out
\ No newline at end of file
+        return  df, out
+
+    def resolve_frame(self, df: pd.DataFrame, concurrency: Optional[int] = None,
+                      rate_per_sec: Optional[float] = None) -> pd.DataFrame:
+        """입력 프레임(또는 청크) → OUT_COLUMNS 결과 프레임 (파일 입출력 없음)"""
+        if concurrency:
+            results = self.resolve_async(df, concurrency=concurrency, rate_per_sec=rate_per_sec)
+        else:
+            results = self.resolve_rows(df)
+        return self._assemble_frame(df.index, results)
+
+    def finish(self):
+        """캐시 저장 및 통계 출력 (run_pipeline 종료 또는 스트리밍 처리 마지막에 호출)"""
+        self._save_cache()
+        kw = self.kw_cache.stats()
+        print(f"Keyword cache: {kw['hits']} hits / {kw['misses']} misses "
+              f"(hit rate {kw['hit_rate']:.1%}, cell {kw['cell_deg']} deg)")
+        print(f"Query normalization: {self.normalizer.saved} keyword calls saved, "
+              f"{len(self.normalizer.aliases)} learned aliases")
+        if self.place_index is not None:
+            pi = self.place_index.stats()
+            print(f"Place index: {pi['hits']} local hits / {pi['misses']} misses ({pi['places']} places)")
+        print(f"Reverse geocoding: {self.revgeo_calls} coord2address calls, {self.revgeo_hits} memo hits")
+        with self._probe_pool_lock:
+            if self._probe_pool is not None:
+                self._probe_pool.shutdown(wait=False, cancel_futures=True)
+                self._probe_pool = None
+            print(f"Skipped {self.miss_skipped} keyword lookups via negative cache.")
\ No newline at end of file
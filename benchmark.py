@@ -0,0 +1,268 @@
+import sys
+import time
+import random
+import numpy as np
+import pandas as pd
+
+import NearestFinder
+import snapCoords
+import routeExtract
+import chunkIO
+
+
+def _timeit(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _synthetic_rows(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        lat, lon = 36.3 + rng.random() / 10, 127.4 + rng.random() / 10
+        rows.append({
+            "dep_major_address": "삼성네거리", "dep_full_address": "대전 동구 삼성동",
+            "dep_coord": (lat + 0.01, lon), "acc_full_address": "대전 동구 한밭대로 1305",
+            "acc_coord": (lat, lon), "dst_major_address": "효동네거리",
+            "dst_full_address": "대전 동구 효동", "dst_coord": (lat, lon + 0.01),
+        })
+    return rows
+
+
+def bench_assembly(n=100_000, legacy_n=5_000):
+    """run_pipeline 결과 조립: out.loc[idx] = res (기존) vs 열 버퍼 + DataFrame 1회 생성"""
+    rows = _synthetic_rows(max(n, legacy_n))
+    cols = list(NearestFinder.OUT_COLUMNS)
+
+    def legacy():
+        out = pd.DataFrame(columns=cols)
+        for idx in range(legacy_n):
+            out.loc[idx] = rows[idx]
+
+    def columnar():
+        NearestFinder.NearestFind._assemble_frame(pd.RangeIndex(n), rows[:n])
+
+    t_legacy = _timeit(legacy, repeat=1) * (100_000 / legacy_n)
+    t_new = _timeit(columnar) * (100_000 / n)
+    print(f"[assembly] out.loc append : {t_legacy:8.2f} s / 100k rows (measured on {legacy_n} rows)")
+    print(f"[assembly] column buffers : {t_new:8.2f} s / 100k rows")
+
+    acc = pd.Series([f"{r['acc_coord'][0]}, {r['acc_coord'][1]}" for r in rows[:n]])
+    t_map = _timeit(lambda: acc.map(NearestFinder.NearestFind._parse_coord_series)) * (100_000 / n)
+    t_vec = _timeit(lambda: NearestFinder.parse_coord_array(acc)) * (100_000 / n)
+    print(f"[acc_coord] per-row parse : {t_map:8.3f} s / 100k rows")
+    print(f"[acc_coord] vectorized    : {t_vec:8.3f} s / 100k rows")
+
+
+def _synthetic_roads(n_roads, n_vertex, lat0=36.35, lon0=127.42, seed=0):
+    rng = np.random.default_rng(seed)
+    roads = []
+    for r in range(n_roads):
+        steps = rng.normal(0, 2e-4, size=(n_vertex, 2)).cumsum(axis=0)
+        verts = [(lon0 + dx, lat0 + dy) for dy, dx in steps.tolist()]
+        roads.append({"name": f"road{r}", "vertexes": verts})
+    return roads
+
+
+def _legacy_nearest_vertex(snap, lat, lon, roads):
+    best_pt, best_d, best_name = None, 1e18, ""
+    for rd in roads:
+        name = (rd.get("name") or "").strip()
+        for (vx, vy) in rd.get("vertexes", []):
+            d = snap.hav_km(lat, lon, vy, vx)
+            if d < best_d:
+                best_d, best_pt, best_name = d, (vy, vx), name
+    return best_pt, best_d, best_name
+
+
+def bench_snap(n_points=200, n_roads=400, n_vertex=50):
+    """스냅 1점당 CPU 비용: 정점 루프(hav_km) vs RoadBuffer 벡터 연산 (정점 / 선분 투영)"""
+    snap = snapCoords.SNAP("bench")
+    roads = _synthetic_roads(n_roads, n_vertex)
+    rng = np.random.default_rng(1)
+    pts = [(36.35 + a, 127.42 + b) for a, b in rng.normal(0, 2e-3, size=(n_points, 2)).tolist()]
+    n_v = n_roads * n_vertex
+
+    t_legacy = _timeit(lambda: [_legacy_nearest_vertex(snap, la, lo, roads) for la, lo in pts], repeat=1)
+    t_build = _timeit(lambda: snapCoords.RoadBuffer(roads))
+    buf = snapCoords.RoadBuffer(roads)
+    t_vertex = _timeit(lambda: [buf.nearest_vertex(la, lo) for la, lo in pts])
+    t_segment = _timeit(lambda: [buf.nearest_point(la, lo) for la, lo in pts])
+    print(f"[snap] {n_v} vertices per point")
+    print(f"[snap] python vertex loop   : {t_legacy / n_points * 1e3:8.3f} ms / point")
+    print(f"[snap] RoadBuffer build     : {t_build * 1e3:8.3f} ms / response")
+    print(f"[snap] vectorized vertex    : {t_vertex / n_points * 1e3:8.3f} ms / point")
+    print(f"[snap] vectorized segment   : {t_segment / n_points * 1e3:8.3f} ms / point")
+
+
+def _synthetic_coord_frame(n, n_places=50_000, seed=0):
+    # 사고 지점은 같은 장소가 반복되므로 n_places개 장소에서 뽑음
+    rng = np.random.default_rng(seed)
+    pool_lat = np.round(36.2 + rng.random(n_places) * 0.3, 6)
+    pool_lon = np.round(127.2 + rng.random(n_places) * 0.3, 6)
+    cols = {}
+    for c in ("dep_coord", "acc_coord", "dst_coord"):
+        pick = rng.integers(0, n_places, n)
+        lat, lon = pool_lat[pick], pool_lon[pick]
+        s = pd.Series(lat.astype(str)) + ", " + pd.Series(lon.astype(str))
+        swap = rng.random(n) < 0.05
+        s[swap] = pd.Series(lon[swap].astype(str)).values + ", " + pd.Series(lat[swap].astype(str)).values
+        cols[c] = s.astype(object)
+    return pd.DataFrame(cols)
+
+
+def _legacy_snap_prep(snap, df):
+    parsed = [df[c].map(snap.parse_latlon_str) for c in ("dep_coord", "acc_coord", "dst_coord")]
+
+    def key_of(t):
+        if not t: return None
+        return snap.uniq_key_from_latlon(t[0], t[1], nd=snap.DEDUP_ROUND)
+
+    valid_pts = [t for col in parsed for t in col.tolist() if t]
+    valid_pts = [t for t in valid_pts if snap.in_any_bbox(t[0], t[1])]
+    uniq = {}
+    for t in valid_pts:
+        k = key_of(t)
+        if k and k not in uniq:
+            uniq[k] = t
+    results = {k: "" for k in uniq}
+    return [col.map(lambda t: results.get(key_of(t), "") if t else "") for col in parsed]
+
+
+def bench_snap_prep(n=1_000_000, legacy_n=100_000):
+    """SNAP.run 전처리 (파싱, 위경도 교정, 영역 필터, 중복 키, 결과 매핑): 행별 map vs 배열 연산"""
+    import contextlib, io
+    snap = snapCoords.SNAP("bench")
+    df = _synthetic_coord_frame(max(n, legacy_n))
+
+    def vectorized():
+        sub = df.iloc[:n]
+        with contextlib.redirect_stdout(io.StringIO()):
+            codes, keys, uniq, region_of = snap.unique_points(sub)
+        res_u = np.array([""] * len(keys) + [""], dtype=object)
+        res_u[codes]
+
+    t_legacy = _timeit(lambda: _legacy_snap_prep(snap, df.iloc[:legacy_n]), repeat=1) * (1_000_000 / legacy_n)
+    t_new = _timeit(vectorized, repeat=1) * (1_000_000 / n)
+    print(f"[snap_prep] per-row map  : {t_legacy:8.2f} s / 1M rows (measured on {legacy_n} rows)")
+    print(f"[snap_prep] vectorized   : {t_new:8.2f} s / 1M rows")
+
+
+def bench_route_output(n=500, n_points=2000):
+    """경로 저장: "(lat, lon); ..." 문자열 + xlsx (기존) vs Arrow IPC 숫자 배열 (RouteWriter), 다시 읽기 포함"""
+    import os, tempfile
+    rng = np.random.default_rng(2)
+    paths = [np.round(np.array([36.35, 127.42]) + rng.normal(0, 2e-4, (n_points, 2)).cumsum(axis=0), 6)
+             for _ in range(n)]
+    tmp = tempfile.mkdtemp()
+    xlsx, arrow = os.path.join(tmp, "routes.xlsx"), os.path.join(tmp, "routes.arrow")
+
+    def legacy():
+        s = pd.Series([routeExtract.format_path(p) for p in paths])
+        pd.DataFrame({"dep_acc_route": s, "acc_dst_route": s}).to_excel(xlsx)
+
+    def columnar():
+        w = chunkIO.RouteWriter(arrow)
+        w.write(np.arange(n), {"dep_acc_route": paths, "acc_dst_route": paths})
+        w.close()
+
+    def read_back():
+        t = chunkIO.read_routes(arrow)
+        for _ in chunkIO.iter_route_arrays(t):
+            pass
+
+    t_legacy = _timeit(legacy, repeat=1)
+    t_new = _timeit(columnar)
+    t_read = _timeit(read_back)
+    print(f"[route_output] {n} x 2 routes of {n_points} points")
+    print(f"[route_output] strings + xlsx : {t_legacy:8.3f} s  ({os.path.getsize(xlsx) / 2**20:6.1f} MB)")
+    print(f"[route_output] Arrow IPC      : {t_new:8.3f} s  ({os.path.getsize(arrow) / 2**20:6.1f} MB)")
+    print(f"[route_output] Arrow mmap read: {t_read * 1e3:8.3f} ms")
+
+
+def _synthetic_route(n_points, seed=0):
+    # 도로처럼 대부분 직선 구간이고 가끔 꺾이는 경로 (정점 간격 약 5~15m)
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(np.where(rng.random(n_points) < 0.01, rng.normal(0, 0.8, n_points), 0.0))
+    step = rng.uniform(5, 15, n_points)
+    dy, dx = step * np.cos(heading), step * np.sin(heading)
+    lat = 36.35 + np.cumsum(dy) / routeExtract.M_PER_DEG
+    lon = 127.42 + np.cumsum(dx) / (routeExtract.M_PER_DEG * np.cos(np.radians(36.35)))
+    return np.round(np.column_stack([lat, lon]), 6)
+
+
+def bench_route_simplify(n_routes=200, n_points=3000, tolerance_m=5.0, step_m=50.0):
+    """경로 후처리: Douglas-Peucker (tolerance_m) / 재표본 (step_m) 시간과 남는 점 수"""
+    paths = [_synthetic_route(n_points, seed) for seed in range(n_routes)]
+    t_dp = _timeit(lambda: [routeExtract.simplify_path(p, tolerance_m) for p in paths], repeat=1)
+    t_rs = _timeit(lambda: [routeExtract.resample_path(p, step_m) for p in paths])
+    kept = sum(len(routeExtract.simplify_path(p, tolerance_m)) for p in paths)
+    resampled = sum(len(routeExtract.resample_path(p, step_m)) for p in paths)
+    total = n_routes * n_points
+    print(f"[route_simplify] {n_routes} routes x {n_points} points")
+    print(f"[route_simplify] Douglas-Peucker {tolerance_m:g} m : {t_dp / n_routes * 1e3:8.3f} ms / route, "
+          f"{kept / total:6.1%} points kept")
+    print(f"[route_simplify] resample {step_m:g} m       : {t_rs / n_routes * 1e3:8.3f} ms / route, "
+          f"{resampled / total:6.1%} points")
+
+
+def _synthetic_grid_graph(n=60, step=0.002, seed=0):
+    import networkx as nx
+    rng = np.random.default_rng(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(n):
+        for j in range(n):
+            G.add_node(i * n + j, y=36.3 + i * step, x=127.4 + j * step)
+    for i in range(n):
+        for j in range(n):
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di < n and j + dj < n:
+                    a, b = i * n + j, (i + di) * n + j + dj
+                    speed = float(rng.choice([20, 50, 80]))
+                    G.add_edge(a, b, speed_kph=speed)
+                    G.add_edge(b, a, speed_kph=speed)
+    return G
+
+
+def bench_route_osm(n_rows=2000, n_origins=50):
+    """오프라인 경로: 행마다 networkx shortest_path vs 출발 노드별 Dijkstra 트리 공유 (RoadGraph.route_many)"""
+    import networkx as nx
+    import roadGraph
+    G = _synthetic_grid_graph()
+    rg = roadGraph.RoadGraph(G)
+    rng = np.random.default_rng(3)
+    span = 59 * 0.002
+    origins = np.column_stack([36.3 + rng.random(n_origins) * span, 127.4 + rng.random(n_origins) * span])
+    s = origins[rng.integers(0, n_origins, n_rows)]
+    e = np.column_stack([36.3 + rng.random(n_rows) * span, 127.4 + rng.random(n_rows) * span])
+    t_build = _timeit(lambda: (setattr(rg, "_router", None), rg.route_many(s[:1, 0], s[:1, 1], e[:1, 0], e[:1, 1])),
+                      repeat=1)
+    nodes = list(G.nodes)
+    src, dst = rg.nearest_nodes(s[:, 0], s[:, 1]), rg.nearest_nodes(e[:, 0], e[:, 1])
+    legacy_n = min(n_rows, 200)
+    t_legacy = _timeit(lambda: [nx.shortest_path(G, nodes[a], nodes[b], weight="travel_time")
+                                for a, b in zip(src[:legacy_n], dst[:legacy_n])], repeat=1) * (n_rows / legacy_n)
+    t_new = _timeit(lambda: rg.route_many(s[:, 0], s[:, 1], e[:, 0], e[:, 1]))
+    print(f"[route_osm] {G.number_of_nodes()} nodes, {n_rows} rows from {n_origins} origins")
+    print(f"[route_osm] router build          : {t_build:8.3f} s (once)")
+    print(f"[route_osm] per-row shortest_path : {t_legacy:8.3f} s (measured on {legacy_n} rows)")
+    print(f"[route_osm] shared Dijkstra trees : {t_new:8.3f} s")
+
+
+BENCHES = {
+    "assembly": bench_assembly,
+    "snap": bench_snap,
+    "snap_prep": bench_snap_prep,
+    "route_output": bench_route_output,
+    "route_simplify": bench_route_simplify,
+    "route_osm": bench_route_osm,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHES)
+    for name in names:
+        BENCHES[name]()
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Iterator, Iterable, Tuple, Any, Dict
+
+
+class CacheStore(ABC):
+    """
+    NearestFind / SNAP / Extractor가 공유하는 캐시 백엔드 인터페이스 (dict처럼 사용)
+    값은 JSON 직렬화 가능한 객체 (tuple은 list로 복원됨)
+    """
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @abstractmethod
+    def __getitem__(self, key: str):
+        ...
+
+    @abstractmethod
+    def __setitem__(self, key: str, value):
+        ...
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """keys 중 캐시에 있는 것만 {key: value}로 반환 (값이 None인 항목 포함)"""
+        found = {}
+        for k in keys:
+            try:
+                found[k] = self[k]
+            except KeyError:
+                pass
+        return found
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def flush(self):
+        pass
+
+    def compact(self):
+        """저장 공간 정리 (백엔드별)"""
+        self.flush()
+
+    def evict_lru(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        """최근에 쓰지 않은 항목부터 지워 max_entries / max_bytes 안으로 (지원하지 않는 백엔드는 0)"""
+        return 0
+
+    def close(self):
+        self.flush()
+
+
+class JsonCacheStore(CacheStore):
+    """기존 json 파일 캐시 (flush 시 전체 파일을 원자적으로 다시 씀)"""
+    def __init__(self, path: str):
+        self.path = path
+        self._data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f) or {}
+            except (OSError, ValueError):
+                self._data = {}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def items(self):
+        return iter(list(self._data.items()))
+
+    def __len__(self):
+        return len(self._data)
+
+    def flush(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class SqliteCacheStore(CacheStore):
+    """
+    SQLite(WAL) 캐시. 조회 1건마다 upsert + autocommit 이라 중간에 죽어도 유지되고,
+    여러 프로세스가 동시에 읽을 수 있음. namespace로 한 파일을 여러 캐시가 공유
+    ttl(초)이 지정되면 오래된 항목은 조회되지 않고 evict_expired()로 삭제
+    track_access=True면 조회 시각(accessed)을 갱신해 evict_lru()가 LRU 순서로 지움
+    """
+    def __init__(self, path: str = "loca_cache.db", namespace: str = "default",
+                 ttl: Optional[float] = None, track_access: bool = False, _shared=None):
+        self.path = path
+        self.ns = namespace
+        self.ttl = ttl
+        self.track_access = track_access
+        self._owner = _shared is None    # 연결은 루트 store만 닫음 (namespace 뷰는 공유)
+        if _shared is not None:
+            self._conn, self._lock = _shared
+            return
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT, updated REAL NOT NULL,"
+                " accessed REAL, PRIMARY KEY (ns, key)) WITHOUT ROWID"
+            )
+            cols = [row[1] for row in self._conn.execute("PRAGMA table_info(cache)")]
+            if "accessed" not in cols:
+                # 이전 버전 파일: 조회 시각 열 추가 (없으면 updated 기준)
+                self._conn.execute("ALTER TABLE cache ADD COLUMN accessed REAL")
+
+    def namespace(self, namespace: str, ttl: Optional[float] = None,
+                  track_access: Optional[bool] = None) -> "SqliteCacheStore":
+        """같은 연결을 쓰는 다른 namespace 뷰 (ttl=None이면 상속, 0이면 만료 없음)"""
+        return SqliteCacheStore(self.path, namespace, ttl if ttl is not None else self.ttl,
+                                self.track_access if track_access is None else track_access,
+                                _shared=(self._conn, self._lock))
+
+    def _touch(self, keys):
+        with self._lock:
+            self._conn.executemany("UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?",
+                                   [(time.time(), self.ns, k) for k in keys])
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl if self.ttl else float("-inf")
+
+    def __getitem__(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, updated FROM cache WHERE ns = ? AND key = ?", (self.ns, key)
+            ).fetchone()
+        if row is None or row[1] < self._cutoff():
+            raise KeyError(key)
+        if self.track_access:
+            self._touch([key])
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO cache (ns, key, value, updated, accessed) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(ns, key) DO UPDATE SET value = excluded.value, updated = excluded.updated,"
+                " accessed = excluded.accessed",
+                (self.ns, key, payload, now, now),
+            )
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.ns, key))
+
+    def items(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM cache WHERE ns = ? AND updated >= ?", (self.ns, self._cutoff())
+            ).fetchall()
+        return ((k, json.loads(v)) for k, v in rows)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        cutoff = self._cutoff()
+        for s in range(0, len(keys), 500):
+            part = keys[s:s + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, value, updated FROM cache WHERE ns = ? AND key IN ({','.join('?' * len(part))})",
+                    (self.ns, *part),
+                ).fetchall()
+            found.update((k, json.loads(v)) for k, v, t in rows if t >= cutoff)
+        if self.track_access and found:
+            self._touch(found)
+        return found
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE ns = ? AND updated >= ?", (self.ns, self._cutoff())
+            ).fetchone()[0]
+
+    def update(self, pairs):
+        now = time.time()
+        rows = [(self.ns, k, json.dumps(v, ensure_ascii=False), now, now) for k, v in pairs]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO cache (ns, key, value, updated, accessed) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(ns, key) DO UPDATE SET value = excluded.value, updated = excluded.updated,"
+                    " accessed = excluded.accessed",
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def evict_expired(self) -> int:
+        if not self.ttl:
+            return 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE ns = ? AND updated < ?", (self.ns, self._cutoff()))
+        return cur.rowcount
+
+    def evict_lru(self, max_entries=None, max_bytes=None):
+        """
+        namespace 안에서 마지막 조회(없으면 저장) 시각이 오래된 항목부터 삭제
+        max_entries: 남길 최대 항목 수, max_bytes: 남길 key + value 최대 크기 합
+        """
+        recent = "COALESCE(accessed, updated) DESC, key"
+        removed = 0
+        with self._lock:
+            if max_entries is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM cache WHERE ns = ? AND key IN ("
+                    f" SELECT key FROM cache WHERE ns = ? ORDER BY {recent} LIMIT -1 OFFSET ?)",
+                    (self.ns, self.ns, int(max_entries)),
+                )
+                removed += cur.rowcount
+            if max_bytes is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM cache WHERE ns = ? AND key IN ("
+                    " SELECT key FROM (SELECT key, SUM(LENGTH(key) + LENGTH(value))"
+                    f"  OVER (ORDER BY {recent}) AS total FROM cache WHERE ns = ?) WHERE total > ?)",
+                    (self.ns, self.ns, int(max_bytes)),
+                )
+                removed += cur.rowcount
+        return removed
+
+    def compact(self):
+        """VACUUM 후 WAL을 본 파일에 반영 (VACUUM은 하나의 트랜잭션이라 중간에 죽어도 기존 내용 유지)"""
+        with self._lock:
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if not self._owner:
+            return
+        with self._lock:
+            self._conn.close()
+
+
+def import_json_cache(json_path: str, store: CacheStore, overwrite: bool = False) -> int:
+    """
+    기존 json 캐시(nearest_cache.json, snap_cache_kakao_only.json 등)를 store로 1회 가져오기
+    이미 가져온 파일은 "__meta__" namespace의 표시로 건너뜀
+    """
+    if not os.path.exists(json_path):
+        return 0
+    # 표시는 store의 ttl과 무관하게 만료되지 않아야 함 (만료되면 지워진 옛 항목을 다시 가져옴)
+    meta = store.namespace("__meta__", ttl=0) if isinstance(store, SqliteCacheStore) else None
+    marker = f"imported:{getattr(store, 'ns', '')}:{os.path.abspath(json_path)}"
+    if meta is not None and marker in meta:
+        return 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f) or {}
+    pairs = [(k, v) for k, v in data.items() if overwrite or k not in store]
+    if hasattr(store, "update"):
+        store.update(pairs)
+    else:
+        for k, v in pairs:
+            store[k] = v
+    if meta is not None:
+        meta[marker] = True
+    store.flush()
+    print(f"Imported {len(pairs)} cache entries from '{json_path}'.")
+    return len(pairs)
@@ -0,0 +1,228 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Iterator, Optional
+
+
+def _excel_columns(header) -> list:
+    # pd.read_excel과 같은 열 이름 (빈 헤더 → "Unnamed: i")
+    return [f"Unnamed: {i}" if h is None else h for i, h in enumerate(header)]
+
+
+def _iter_xlsx(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _excel_columns(header)
+        start, buf = 0, []
+        for r in rows:
+            if all(v is None for v in r):
+                continue
+            buf.append(r)
+            if len(buf) == chunksize:
+                yield pd.DataFrame(buf, columns=columns, index=pd.RangeIndex(start, start + len(buf)))
+                start, buf = start + len(buf), []
+        if buf:
+            yield pd.DataFrame(buf, columns=columns, index=pd.RangeIndex(start, start + len(buf)))
+    finally:
+        wb.close()
+
+
+def _iter_csv(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    for enc in ("utf-8", "cp949"):
+        try:
+            with open(path, "r", encoding=enc) as f:
+                f.read(1 << 16)
+        except UnicodeDecodeError:
+            continue
+        yield from pd.read_csv(path, chunksize=chunksize, encoding=enc)
+        return
+    raise ValueError(f"Could not detect the encoding of '{path}'.")
+
+
+def _iter_parquet(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet input requires 'pyarrow' (pip install pyarrow).") from e
+    start = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        df = batch.to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def iter_input_chunks(path: str, chunksize: int = 5000, limit: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    입력 파일을 chunksize 행씩 읽기 (xlsx: openpyxl read-only, csv/parquet: 청크 리더)
+    index는 청크 사이에서 이어짐 (0 ~ N-1)
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        chunks = _iter_xlsx(path, chunksize)
+    elif ext in (".csv", ".txt"):
+        chunks = _iter_csv(path, chunksize)
+    elif ext in (".parquet", ".pq"):
+        chunks = _iter_parquet(path, chunksize)
+    else:
+        raise ValueError(f"Unsupported input format: '{ext}'")
+
+    seen = 0
+    for chunk in chunks:
+        if limit is not None:
+            if seen >= limit:
+                break
+            chunk = chunk.iloc[:limit - seen]
+        seen += len(chunk)
+        yield chunk
+
+
+def _cell(v):
+    if v is None:
+        return None
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, (str, int, float, bool)):
+        return None if isinstance(v, float) and v != v else v
+    if pd.isna(v) is True:
+        return None
+    return str(v)
+
+
+class ChunkWriter:
+    """
+    결과 청크를 출력 파일에 바로 이어 쓰기 (xlsx: openpyxl write-only, csv: append)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        if self.ext not in (".xlsx", ".csv"):
+            raise ValueError(f"Unsupported output format: '{self.ext}'")
+        self.rows = 0
+        self._columns = None
+        self._wb = self._ws = None
+        if self.ext == ".xlsx":
+            import openpyxl
+            self._wb = openpyxl.Workbook(write_only=True)
+            self._ws = self._wb.create_sheet()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df: pd.DataFrame):
+        if self._columns is None:
+            self._columns = list(df.columns)
+            if self._ws is not None:
+                self._ws.append([""] + [str(c) for c in self._columns])
+        df = df.reindex(columns=self._columns)
+        if self._ws is not None:
+            for idx, row in zip(df.index, df.itertuples(index=False, name=None)):
+                self._ws.append([idx] + [_cell(v) for v in row])
+        else:
+            df.to_csv(self.path, mode="a", header=(self.rows == 0), encoding="utf-8-sig" if self.rows == 0 else "utf-8")
+        self.rows += len(df)
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.save(self.path)
+            self._wb = self._ws = None
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Writing/reading route geometries requires 'pyarrow' (pip install pyarrow).") from e
+    return pa
+
+
+ROUTE_COLUMNS = ("dep_acc_route", "acc_dst_route")
+
+
+def route_array(paths):
+    """
+    경로 배열 목록 ((k, 2) [lat, lon] 또는 None) → Arrow list<struct<lat: double, lon: double>>
+    좌표는 한 번에 이어 붙여 넘기므로 점 단위 파이썬 변환이 없음
+    """
+    pa = _pyarrow()
+    paths = list(paths)
+    ok = np.array([p is not None for p in paths], dtype=bool)
+    lengths = np.array([len(p) if p is not None else 0 for p in paths], dtype=np.int64)
+    offsets = np.zeros(len(paths) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    xy = np.concatenate([np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in paths if p is not None] or
+                        [np.empty((0, 2))])
+    values = pa.StructArray.from_arrays([pa.array(xy[:, 0]), pa.array(xy[:, 1])], names=["lat", "lon"])
+    return pa.ListArray.from_arrays(pa.array(offsets), values, mask=pa.array(~ok))
+
+
+class RouteWriter:
+    """
+    경로 형상을 숫자 그대로 청크 단위로 이어 쓰기 (문자열 변환 없음)
+    .parquet/.pq : Parquet (zstd 압축, 분석 도구 호환)
+    .arrow/.feather : Arrow IPC 파일 (비압축, read_routes로 memory map 후 복사 없이 읽음)
+    열: row (출력 행 index), dep_acc_route, acc_dst_route  (total_route는 두 구간을 이은 것이라 저장하지 않음)
+    """
+    def __init__(self, path: str):
+        pa = _pyarrow()
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        if self.ext not in (".parquet", ".pq", ".arrow", ".feather"):
+            raise ValueError(f"Unsupported route output format: '{self.ext}'")
+        point = pa.struct([("lat", pa.float64()), ("lon", pa.float64())])
+        self.schema = pa.schema([("row", pa.int64())] + [(c, pa.list_(point)) for c in ROUTE_COLUMNS])
+        self.rows = 0
+        if self.ext in (".parquet", ".pq"):
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, index, routes: dict):
+        """routes: {열 이름: 경로 배열 목록} (index와 같은 길이)"""
+        pa = _pyarrow()
+        arrays = [pa.array(np.asarray(index, dtype=np.int64))] + [route_array(routes[c]) for c in ROUTE_COLUMNS]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.ext in (".parquet", ".pq"):
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def read_routes(path: str):
+    """
+    RouteWriter 출력 → pyarrow.Table
+    Arrow IPC 파일은 memory map으로 열어 버퍼를 복사하지 않음 (Parquet은 압축 해제가 필요해 읽어 들임)
+    """
+    pa = _pyarrow()
+    if os.path.splitext(path)[1].lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def iter_route_arrays(table, column: str = "dep_acc_route"):
+    """
+    read_routes 결과에서 레코드 배치별 (row, offsets, lat, lon) numpy 배열 (Arrow 버퍼 위 view)
+    i번째 경로 = lat[offsets[i]:offsets[i+1]], lon[...]  (경로 없음은 길이 0)
+    """
+    for batch in table.to_batches():
+        routes = batch.column(column)
+        points = routes.values
+        yield (batch.column("row").to_numpy(),
+               routes.offsets.to_numpy(),
+               points.field("lat").to_numpy(zero_copy_only=True),
+               points.field("lon").to_numpy(zero_copy_only=True))
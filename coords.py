@@ -0,0 +1,200 @@
+import io
+import re
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+FLOAT_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_NUM = r"[-+]?\d+(?:\.\d+)?"
+# "lat,lon" / "lat, lon" / "(lat, lon)" 형태는 정규식 한 번으로 열 전체를 파싱
+_PAIR_RE = rf"^\s*\(?\s*({_NUM})\s*,\s*({_NUM})\s*\)?\s*$"
+_STRIP_PARENS = str.maketrans("", "", "()")
+_UNSAFE_CHARS = ("\r", '"', "e", "E")
+
+
+def _parse_pair(val) -> Optional[Tuple[float, float]]:
+    if val is None: return None
+    nums = FLOAT_RE.findall(str(val))
+    if len(nums) < 2: return None
+    try:
+        return float(nums[0]), float(nums[1])
+    except:
+        return None
+
+
+def parse_coord(val) -> Optional[Tuple[float, float]]:
+    p = _parse_pair(val)
+    if p is None: return None
+    lat, lon = p
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180): return None
+    return lat, lon
+
+
+def _csv_pairs(strs: list) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    "lat, lon" 문자열 목록을 pandas C 파서로 한 번에 변환
+    형식이 맞지 않는 값이 섞여 있으면 None (호출 측에서 정규식 경로로 처리)
+    """
+    text = "\n".join(strs).translate(_STRIP_PARENS)
+    if text.count("\n") != len(strs) - 1 or any(c in text for c in _UNSAFE_CHARS):
+        return None
+    try:
+        df = pd.read_csv(io.StringIO(text), header=None, names=["lat", "lon"], skipinitialspace=True,
+                         skip_blank_lines=False, float_precision="round_trip", na_filter=False)
+    except (pd.errors.ParserError, ValueError):
+        return None
+    if len(df) != len(strs) or not all(t.kind == "f" for t in df.dtypes):
+        return None
+    return df["lat"].to_numpy(dtype=float), df["lon"].to_numpy(dtype=float)
+
+
+def parse_coord_array(values, check_range: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    좌표 열 전체를 (lat, lon) float64 배열로 변환 (파싱 실패는 NaN)
+    parse_coord와 같은 결과: 정형 문자열은 벡터 연산, 나머지만 parse_coord로 처리
+    check_range=False면 위/경도 범위를 검사하지 않음 (앞의 두 숫자를 그대로 반환)
+    """
+    s = pd.Series(values, copy=False)
+    n = len(s)
+    lat = np.full(n, np.nan)
+    lon = np.full(n, np.nan)
+    if n == 0:
+        return lat, lon
+
+    vals = s.to_numpy()
+    if pd.api.types.infer_dtype(vals, skipna=False) == "string":
+        is_str = np.ones(n, dtype=bool)
+    else:
+        is_str = np.fromiter((type(v) is str for v in vals), dtype=bool, count=n)
+    if is_str.any():
+        idx = np.flatnonzero(is_str)
+        fast = _csv_pairs(vals[idx].tolist())
+        if fast is not None:
+            lat[idx], lon[idx] = fast
+        else:
+            # pd.to_numeric은 마지막 자리에서 float()과 다를 수 있어 astype(float) 사용
+            ext = s.iloc[idx].str.extract(_PAIR_RE)
+            ok = ext[0].notna().to_numpy()
+            lat[idx[ok]] = ext[0][ok].to_numpy().astype(float)
+            lon[idx[ok]] = ext[1][ok].to_numpy().astype(float)
+
+    parse_one = parse_coord if check_range else _parse_pair
+    rest = np.flatnonzero(np.isnan(lat) | np.isnan(lon))
+    for i in rest:
+        p = parse_one(vals[i])
+        lat[i], lon[i] = p if p else (np.nan, np.nan)
+
+    if not check_range:
+        return lat, lon
+    bad = ~((lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180))
+    lat[bad] = np.nan
+    lon[bad] = np.nan
+    return lat, lon
+
+
+def coord_pairs(lat: np.ndarray, lon: np.ndarray) -> list:
+    """(lat, lon) 배열 → tuple 리스트 (NaN은 None)"""
+    ok = ~(np.isnan(lat) | np.isnan(lon))
+    return [(a, b) if v else None for a, b, v in zip(lat.tolist(), lon.tolist(), ok.tolist())]
+
+
+def decimal_grid(x: np.ndarray, nd: int) -> np.ndarray:
+    """round(x, nd) * 10**nd 정수 배열 (파이썬 round와 같은 결과)"""
+    s = np.asarray(x, dtype=np.float64) * 10.0 ** nd
+    g = np.rint(s)
+    # .5 경계 근처는 곱셈 오차로 rint가 달라질 수 있어 파이썬 round로 다시 계산
+    near = np.abs(s - np.floor(s) - 0.5) <= np.abs(s) * 1e-12 + 1e-9
+    if near.any():
+        g[near] = np.rint(np.array([round(v, nd) for v in np.asarray(x, dtype=np.float64)[near].tolist()]) * 10.0 ** nd)
+    return g.astype(np.int64)
+
+
+def round_decimal(x: np.ndarray, nd: int) -> np.ndarray:
+    """float(f"{x:.{nd}f}")와 같은 값 (NaN 유지)"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    ok = ~np.isnan(x)
+    out[ok] = decimal_grid(x[ok], nd) / 10.0 ** nd
+    return out
+
+
+class CoordArray:
+    """
+    좌표 열: float64 lat/lon 배열 쌍 + index (결측은 NaN)
+    NearestFind → SNAP → Extractor 사이에는 이 형태로 넘기고, 문자열은 저장할 때만 생성
+    """
+    __slots__ = ("lat", "lon", "index")
+
+    def __init__(self, lat, lon, index=None):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        if len(self.lat) != len(self.lon):
+            raise ValueError("lat and lon must have the same length.")
+        self.index = pd.RangeIndex(len(self.lat)) if index is None else pd.Index(index)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __repr__(self):
+        return f"CoordArray({len(self)} points, {int((~self.isna()).sum())} valid)"
+
+    @classmethod
+    def parse(cls, values, index=None, check_range: bool = True) -> "CoordArray":
+        """문자열/튜플 열 → CoordArray (parse_coord_array)"""
+        if index is None and isinstance(values, pd.Series):
+            index = values.index
+        lat, lon = parse_coord_array(values, check_range=check_range)
+        return cls(lat, lon, index)
+
+    @classmethod
+    def from_pairs(cls, values, index=None) -> "CoordArray":
+        """(lat, lon) 튜플 열 → CoordArray (튜플은 문자열을 거치지 않고 그대로 변환)"""
+        if isinstance(values, CoordArray):
+            return values
+        if index is None and isinstance(values, pd.Series):
+            index = values.index
+        vals = pd.Series(values, copy=False).to_numpy(dtype=object)
+        n = len(vals)
+        lat = np.full(n, np.nan)
+        lon = np.full(n, np.nan)
+        is_pair = np.fromiter((isinstance(v, (tuple, list, np.ndarray)) and len(v) >= 2 for v in vals),
+                              dtype=bool, count=n)
+        idx = np.flatnonzero(is_pair)
+        if len(idx):
+            pairs = [(v[0], v[1]) for v in vals[idx]]
+            try:
+                arr = np.array(pairs, dtype=np.float64)
+            except (TypeError, ValueError):
+                arr = np.array([[a if isinstance(a, (int, float)) else np.nan for a in p] for p in pairs],
+                               dtype=np.float64)
+            lat[idx], lon[idx] = arr[:, 0], arr[:, 1]
+        rest = np.flatnonzero(~is_pair)
+        if len(rest):
+            lat[rest], lon[rest] = parse_coord_array(vals[rest])
+        return cls(lat, lon, index)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, prefix: str) -> "CoordArray":
+        return cls(df[f"{prefix}_lat"].to_numpy(), df[f"{prefix}_lon"].to_numpy(), df.index)
+
+    def to_frame(self, prefix: str) -> pd.DataFrame:
+        return pd.DataFrame({f"{prefix}_lat": self.lat, f"{prefix}_lon": self.lon}, index=self.index)
+
+    def isna(self) -> np.ndarray:
+        return np.isnan(self.lat) | np.isnan(self.lon)
+
+    def lat_series(self) -> pd.Series:
+        return pd.Series(self.lat, index=self.index)
+
+    def lon_series(self) -> pd.Series:
+        return pd.Series(self.lon, index=self.index)
+
+    def to_pairs(self) -> pd.Series:
+        """(lat, lon) 튜플 열 (NaN은 None)"""
+        return pd.Series(coord_pairs(self.lat, self.lon), index=self.index, dtype=object)
+
+    def to_strings(self, nd: int = 6) -> pd.Series:
+        """"lat,lon" 문자열 열 (소수 nd자리, NaN은 "")"""
+        ok = ~self.isna()
+        return pd.Series([f"{a:.{nd}f},{b:.{nd}f}" if v else "" for a, b, v
+                          in zip(self.lat.tolist(), self.lon.tolist(), ok.tolist())], index=self.index, dtype=object)
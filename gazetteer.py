@@ -0,0 +1,229 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple, Iterable, Dict
+
+from keywordCache import normalize_query
+from regions import RegionIndex
+
+R_M = 6371008.8
+
+
+def _hav_m(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    p1, p2 = np.radians(lat), np.radians(lats)
+    dphi = p2 - p1
+    dl = np.radians(lons - lon)
+    a = np.sin(dphi/2)**2 + np.cos(p1)*np.cos(p2)*np.sin(dl/2)**2
+    return R_M * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _NameBucket:
+    """
+    이름 하나의 장소 좌표와 최근접 보증
+    certs[(lat, lon)] = cover: 그 지점에서 검색했을 때 cover(m) 안에는 더 가까운 같은 이름의 장소가 없음
+    complete: 완전한 POI 파일에서 가져온 이름이라 모든 장소를 알고 있음
+    """
+    __slots__ = ("lat", "lon", "places", "certs", "complete", "_arr", "_cert_arr")
+
+    def __init__(self):
+        self.lat, self.lon, self.places = [], [], []
+        self.certs: Dict[Tuple[float, float], float] = {}
+        self.complete = False
+        self._arr = None
+        self._cert_arr = None
+
+    def add(self, lat, lon, place):
+        self.lat.append(lat); self.lon.append(lon); self.places.append(place)
+        self._arr = None
+
+    def certify(self, lat, lon, cover):
+        key = (round(lat, 6), round(lon, 6))
+        if cover > self.certs.get(key, -1.0):
+            self.certs[key] = cover
+            self._cert_arr = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._arr is None:
+            self._arr = (np.asarray(self.lat, dtype=np.float64), np.asarray(self.lon, dtype=np.float64))
+        return self._arr
+
+    def cert_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._cert_arr is None:
+            pts = np.asarray(list(self.certs.keys()), dtype=np.float64).reshape(-1, 2)
+            self._cert_arr = (pts[:, 0], pts[:, 1], np.asarray(list(self.certs.values()), dtype=np.float64))
+        return self._cert_arr
+
+    def proven(self, lat, lon, d) -> bool:
+        """알고 있는 최근접 장소까지 거리 d가 실제 최근접임이 보장되는지 (d <= cover - |AA'|)"""
+        if self.complete:
+            return True
+        if not self.certs:
+            return False
+        clats, clons, covers = self.cert_arrays()
+        return bool(np.any(d <= covers - _hav_m(lat, lon, clats, clons)))
+
+
+class PlaceIndex:
+    """
+    오프라인 장소 색인: 정규화된 이름(검색어 별칭 포함) → 좌표 배열
+    "사고지점 반경 r 안에서 이름이 X인 가장 가까운 장소"를 API 없이 벡터 연산으로 응답
+    체인점처럼 지점이 여럿인 이름은 KeywordCache와 같은 보증(d <= cover - |AA'|)이 있거나
+    POI 파일로 전체를 가져온 이름일 때만 응답 (모르는 더 가까운 지점이 있을 수 있으므로)
+    bboxes(left, bottom, right, top) 또는 regions(RegionIndex)가 주어지면 그 밖의 장소는 색인하지 않음
+    """
+    def __init__(self, bboxes: Optional[Iterable[Tuple[float, float, float, float]]] = None,
+                 regions: Optional[RegionIndex] = None):
+        self.bboxes = list(bboxes) if bboxes else None
+        self.regions = regions
+        self._names: Dict[str, _NameBucket] = {}
+        self._seen = set()
+        self.hits = 0
+        self.misses = 0
+        # add와 nearest가 여러 스레드에서 동시에 호출되므로 좌표 배열과 places를 함께 보호
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _in_region(self, lat, lon) -> bool:
+        if self.regions is not None:
+            return self.regions.contains(lat, lon)
+        if not self.bboxes:
+            return True
+        return any(l <= lon <= r and b <= lat <= t for l, b, r, t in self.bboxes)
+
+    def add(self, name, lat, lon, place_name=None, address=None, aliases: Iterable = ()) -> bool:
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            return False
+        if not self._in_region(lat, lon):
+            return False
+        place = (lat, lon, place_name or name, address)
+        added = False
+        with self._lock:
+            for key in {normalize_query(n) for n in (name, *aliases)}:
+                ident = (key, round(lat, 6), round(lon, 6))
+                if not key or ident in self._seen:
+                    continue
+                self._seen.add(ident)
+                self._names.setdefault(key, _NameBucket()).add(lat, lon, place)
+                added = True
+        return added
+
+    def certify(self, query, lat, lon, cover) -> None:
+        """(lat, lon)에서 검색어 query로 찾은 최근접 장소까지 거리 cover(m)를 보증으로 기록"""
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            self._names.setdefault(key, _NameBucket()).certify(float(lat), float(lon), float(cover))
+
+    def add_result(self, query, result, origin: Optional[Tuple[float, float]] = None) -> bool:
+        """
+        Kakao 키워드 검색 결과 (lat, lon, place_name, address)를 검색어/장소명 두 이름으로 색인
+        origin(검색 중심)이 주어지면 검색어 이름에 최근접 보증을 함께 기록
+        """
+        if not result:
+            return False
+        lat, lon, place_name, address = result
+        added = self.add(place_name or query, lat, lon, place_name, address, aliases=(query,))
+        if origin is not None:
+            try:
+                cover = float(_hav_m(float(origin[0]), float(origin[1]),
+                                     np.array([float(lat)]), np.array([float(lon)]))[0])
+            except (TypeError, ValueError):
+                return added
+            self.certify(query, origin[0], origin[1], cover)
+        return added
+
+    def mark_complete(self, name) -> None:
+        """모든 장소를 알고 있는 이름으로 표시 (완전한 POI 파일에서 가져온 이름)"""
+        key = normalize_query(name)
+        if not key:
+            return
+        with self._lock:
+            self._names.setdefault(key, _NameBucket()).complete = True
+
+    def nearest(self, query, lat, lon, radius) -> Optional[Tuple[float, float, str, str]]:
+        with self._lock:
+            bucket = self._names.get(normalize_query(query))
+            if bucket is not None and bucket.places:
+                lats, lons = bucket.arrays()
+                d = _hav_m(lat, lon, lats, lons)
+                i = int(np.argmin(d))
+                if d[i] <= radius and bucket.proven(lat, lon, d[i]):
+                    self.hits += 1
+                    return bucket.places[i]
+            self.misses += 1
+            return None
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"places": len(self), "names": len(self._names), "hits": self.hits,
+                "misses": self.misses, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+    @classmethod
+    def from_nearest_cache(cls, cache, bboxes=None) -> "PlaceIndex":
+        """nearest_cache (f"{query}-{lat}-{lon}-{r}" → [lat, lon, place, addr])로부터 색인 생성"""
+        idx = cls(bboxes)
+        idx.update_from_cache(cache)
+        return idx
+
+    def update_from_cache(self, cache) -> int:
+        n = 0
+        for key, place in cache.items():
+            parts = str(key).rsplit("-", 3)
+            if len(parts) != 4 or not isinstance(place, (list, tuple)) or len(place) < 4:
+                continue
+            n += self.add_result(parts[0], tuple(place[:4]), origin=(parts[1], parts[2]))
+        return n
+
+    def import_poi_file(self, path: str, name_col="name", lat_col="lat", lon_col="lon",
+                        address_col: Optional[str] = "address", complete: bool = True) -> int:
+        """POI 파일(csv/xlsx) 가져오기 (complete=True면 파일의 이름들은 모든 지점을 담은 것으로 간주)"""
+        if path.lower().endswith((".xlsx", ".xls")):
+            df = pd.read_excel(path)
+        else:
+            try:
+                df = pd.read_csv(path, encoding="utf-8")
+            except UnicodeDecodeError:
+                df = pd.read_csv(path, encoding="cp949")
+        addrs = df[address_col] if address_col and address_col in df.columns else [None] * len(df)
+        n = 0
+        for name, lat, lon, addr in zip(df[name_col], df[lat_col], df[lon_col], addrs):
+            if pd.isna(name):
+                continue
+            n += self.add(str(name), lat, lon, str(name), None if pd.isna(addr) else str(addr))
+            if complete:
+                self.mark_complete(str(name))
+        print(f"Imported {n} places from '{path}'.")
+        return n
+
+    def save(self, path: str):
+        with self._lock:
+            rows = [[key, *place] for key, bucket in self._names.items() for place in bucket.places]
+            certs = [[key, lat, lon, cover] for key, bucket in self._names.items()
+                     for (lat, lon), cover in bucket.certs.items()]
+            complete = [key for key, bucket in self._names.items() if bucket.complete]
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bboxes": self.bboxes, "places": rows, "certs": certs, "complete": complete},
+                      f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, regions: Optional[RegionIndex] = None) -> "PlaceIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        idx = cls(data.get("bboxes"), regions)
+        for key, lat, lon, place_name, address in data.get("places", []):
+            idx.add(key, lat, lon, place_name, address)
+        # 보증이 없는 예전 파일의 장소는 키워드 캐시로 다시 보증될 때까지 응답에 쓰지 않음
+        for key, lat, lon, cover in data.get("certs", []):
+            idx.certify(key, lat, lon, cover)
+        for key in data.get("complete", []):
+            idx.mark_complete(key)
+        return idx
@@ -4,7 +4,8 @@ import pandas as pd
 INPUT_FILE = "Samples/initial_input_data.xlsx"
 OUTPUT_FILE = "./result/total_inference.xlsx"
 KAKAO_API_KEY = "INPUT YOUR API KEY" 
-LocA_run = LocA.LocA(INPUT_FILE,KAKAO_API_KEY) 
+CACHE_DB = "loca_cache.db"
+LocA_run = LocA.LocA(INPUT_FILE,KAKAO_API_KEY,CACHE_DB) 
 df = LocA_run.nearest_coords() # YH
 LocA_run.Snapper() # JW
 LocA_run.route_extractor() # SY
@@ -0,0 +1,181 @@
+import os
+import json
+import math
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from collections import defaultdict
+from typing import Optional, Tuple, Dict, Iterable, Any
+
+_PUNCT_RE = re.compile(r"[\W_]+")          # 공백/구두점 (한글·영문·숫자는 유지)
+_SUFFIXES = ("부근", "인근", "근처", "주변", "일대", "방면", "방향", "앞")
+
+
+def normalize_query(query) -> str:
+    """NFKC → 소문자 → 공백/구두점 제거 → 위치 접미사("부근", "앞" 등) 제거"""
+    if query is None:
+        return ""
+    q = _PUNCT_RE.sub("", unicodedata.normalize("NFKC", str(query)).lower())
+    for suffix in _SUFFIXES:
+        if q.endswith(suffix) and len(q) - len(suffix) >= 2:
+            q = q[:-len(suffix)]
+            break
+    return q
+
+
+class QueryNormalizer:
+    """
+    검색어 → 정규 키. normalize_query 이후, 학습된 별칭 표(변형 → 정규 키)로 한 번 더 통합
+    두 검색어가 같은 장소로 검색되고 문자열 유사도가 similarity 이상이면 별칭으로 학습
+    saved: 정규 키 덕분에 API 호출 없이 캐시로 응답한 횟수
+    """
+    def __init__(self, alias_path: Optional[str] = None, similarity: float = 0.8):
+        self.alias_path = alias_path
+        self.similarity = similarity
+        self.aliases: Dict[str, str] = {}
+        self._places: Dict[Tuple[float, float], list] = {}
+        self.saved = 0
+        if alias_path and os.path.exists(alias_path):
+            with open(alias_path, "r", encoding="utf-8") as f:
+                self.aliases = json.load(f) or {}
+
+    def canonical(self, query) -> str:
+        q = normalize_query(query)
+        return self.aliases.get(q, q)
+
+    def learn(self, query, result):
+        if not result:
+            return
+        q = self.canonical(query)
+        if not q:
+            return
+        place_key = (round(float(result[0]), 4), round(float(result[1]), 4))
+        known = self._places.setdefault(place_key, [])
+        for c in known:
+            if c == q:
+                return
+            if SequenceMatcher(None, q, c).ratio() >= self.similarity:
+                self.aliases[q] = c
+                return
+        known.append(q)
+
+    def learn_from_cache(self, cache):
+        for key, place in cache.items():
+            parts = str(key).rsplit("-", 3)
+            if len(parts) == 4 and isinstance(place, (list, tuple)) and len(place) >= 2:
+                self.learn(parts[0], place)
+
+    def save(self):
+        if not self.alias_path:
+            return
+        tmp = f"{self.alias_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.aliases, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.alias_path)
+
+
+def hav_m(lat1, lon1, lat2, lon2) -> float:
+    R = 6371008.8
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dphi = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dl/2)**2
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
+class KeywordCache:
+    """
+    (정규화된 검색어, 격자 셀) 단위 키워드 검색 캐시
+    검색 지점 A마다 거리순 응답 목록과 포함 반경 cover(A에서 cover 이내 장소는 모두 목록에 있음)를 저장
+    새 지점 A'에서 목록을 거리순으로 다시 정렬해, 가장 가까운 장소까지 거리가
+    cover - |AA'| 이하일 때만 재사용 (목록 밖 장소는 그보다 가까울 수 없으므로 API 결과와 같음)
+    """
+    def __init__(self, cell_deg: float = 0.005):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[str, int, int], Dict[Tuple[float, float], tuple]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cell(self, lat, lon) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def put(self, query, acc_lat, acc_lon, places, cover_m: Optional[float] = None):
+        """
+        places: A=(acc_lat, acc_lon)에서 거리순 검색 결과 목록
+        cover_m: 빠짐없이 받은 반경 (모든 결과를 받았으면 검색 반경, 모르면 마지막 결과까지 거리)
+        """
+        q = normalize_query(query)
+        places = [tuple(p) for p in places or () if p]
+        if not q or not places:
+            return
+        far = max(hav_m(acc_lat, acc_lon, p[0], p[1]) for p in places)
+        cover = far if cover_m is None else max(float(cover_m), far)
+        cy, cx = self._cell(acc_lat, acc_lon)
+        with self._lock:
+            bucket = self._cells[(q, cy, cx)]
+            prev = bucket.get((acc_lat, acc_lon))
+            if prev is None or prev[0] < cover:
+                bucket[(acc_lat, acc_lon)] = (cover, places)
+
+    def get(self, query, acc_lat, acc_lon, radius) -> Optional[Tuple[float, float, str, str]]:
+        """radius 이내에서 가장 가까운 장소임이 보장될 때만 반환 (조회 한 번당 hit/miss 한 번 집계)"""
+        q = normalize_query(query)
+        cy, cx = self._cell(acc_lat, acc_lon)
+        best, best_d = None, None
+        with self._lock:
+            entries = [e for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                       for e in self._cells.get((q, cy + dy, cx + dx), {}).items()]
+        for (a_lat, a_lon), (cover, places) in entries:
+            slack = cover - hav_m(acc_lat, acc_lon, a_lat, a_lon)
+            if slack <= 0:
+                continue
+            d, place = min(((hav_m(acc_lat, acc_lon, p[0], p[1]), p) for p in places), key=lambda t: t[0])
+            if d <= slack and d <= radius and (best_d is None or d < best_d):
+                best, best_d = place, d
+        with self._lock:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def load_from_dict(self, cache: Dict):
+        """기존 nearest_cache 키(f"{query}-{lat}-{lon}-{r}")로부터 공간 캐시 복원"""
+        for key, place in cache.items():
+            parts = str(key).rsplit("-", 3)
+            if len(parts) != 4 or not isinstance(place, (list, tuple)) or len(place) < 2:
+                continue
+            try:
+                acc_lat, acc_lon = float(parts[1]), float(parts[2])
+            except ValueError:
+                continue
+            # 최근접 결과 하나만 남아 있으므로 그 장소까지 거리만큼만 포함 반경으로 인정
+            self.put(parts[0], acc_lat, acc_lon, [place])
+
+    def load_entries(self, items: Iterable[Tuple[str, Any]]) -> int:
+        """저장해 둔 응답 목록 (f"{query}-{lat}-{lon}-{radius}" → [cover_m, places]) 복원"""
+        n = 0
+        for key, value in items:
+            parts = str(key).rsplit("-", 3)
+            if len(parts) != 4 or not isinstance(value, (list, tuple)) or len(value) != 2:
+                continue
+            try:
+                acc_lat, acc_lon = float(parts[1]), float(parts[2])
+            except ValueError:
+                continue
+            cover_m, places = value
+            self.put(parts[0], acc_lat, acc_lon, places, cover_m)
+            n += 1
+        return n
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 4),
+                "cells": len(self._cells), "cell_deg": self.cell_deg}
@@ -0,0 +1,110 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+from shapely.geometry import box, shape, Point
+from shapely.ops import nearest_points
+from typing import Optional, Tuple, Iterable, List
+
+# 기본 스냅/색인 지역 (left, bottom, right, top) — 대전·충남·충북 일대
+DEFAULT_REGION_BBOXES = (
+    (127.19, 36.19, 127.54, 36.51),
+    (126.13, 36.10, 127.70, 37.05),
+    (127.20, 36.10, 128.35, 37.35),
+)
+
+
+class RegionIndex:
+    """
+    스냅 대상 지역(시군구 폴리곤 또는 bbox) STRtree 색인
+    좌표 → 지역 번호 (-1: 어느 지역에도 속하지 않음), 지역 밖 좌표 → 가장 가까운 지역 경계 위 점
+    """
+    def __init__(self, geoms: Iterable, names: Optional[List[str]] = None):
+        self.geoms = np.asarray(list(geoms), dtype=object)
+        if not len(self.geoms):
+            raise ValueError("At least one region is required.")
+        self.names = list(names) if names is not None else [str(i) for i in range(len(self.geoms))]
+        self.tree = STRtree(self.geoms)
+
+    def __len__(self):
+        return len(self.geoms)
+
+    @classmethod
+    def from_bboxes(cls, bboxes: Iterable[Tuple[float, float, float, float]]) -> "RegionIndex":
+        """(left, bottom, right, top) 목록 (SNAP.REGION_BBOXES 형식)"""
+        return cls([box(*b) for b in bboxes])
+
+    @classmethod
+    def from_geojson(cls, path: str, name_prop: str = "name") -> "RegionIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls._from_dict(data, name_prop)
+
+    @classmethod
+    def _from_dict(cls, data, name_prop="name") -> "RegionIndex":
+        if "bboxes" in data:
+            idx = cls.from_bboxes(data["bboxes"])
+            if data.get("names"):
+                idx.names = list(data["names"])
+            return idx
+        feats = data.get("features") if data.get("type") == "FeatureCollection" else [data]
+        geoms, names = [], []
+        for i, feat in enumerate(feats):
+            geom = feat.get("geometry") if feat.get("type") == "Feature" else feat
+            if not geom:
+                continue
+            props = feat.get("properties") or {}
+            geoms.append(shape(geom))
+            names.append(str(props.get(name_prop, props.get("id", i))))
+        return cls(geoms, names)
+
+    @classmethod
+    def load(cls, path: str, name_prop: str = "name") -> "RegionIndex":
+        """
+        GeoJSON (FeatureCollection / Feature / Geometry) 또는 {"bboxes": [[l, b, r, t], ...], "names": [...]}
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        idx = cls.from_geojson(path, name_prop)
+        print(f"Loaded {len(idx)} regions from '{path}'.")
+        return idx
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return tuple(shapely.total_bounds(self.geoms))
+
+    def union(self):
+        return shapely.union_all(self.geoms)
+
+    def locate(self, lat, lon) -> np.ndarray:
+        """
+        좌표 배열 → 지역 번호 배열 (경계 포함, 여러 지역이면 번호가 작은 지역)
+        같은 좌표가 반복되는 경우가 많아 고유 좌표만 색인에 질의
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        out = np.full(len(lat), -1, dtype=np.int64)
+        ok = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if not len(ok):
+            return out
+        codes, uniq = pd.factorize(lon[ok] + 1j * lat[ok])
+        pts = shapely.points(uniq.real, uniq.imag)
+        p_i, g_i = self.tree.query(pts, predicate="intersects")
+        region = np.full(len(uniq), len(self), dtype=np.int64)
+        np.minimum.at(region, p_i, g_i)
+        region[region == len(self)] = -1
+        out[ok] = region[codes]
+        return out
+
+    def contains(self, lat, lon) -> bool:
+        return len(self.tree.query(Point(lon, lat), predicate="intersects")) > 0
+
+    def nearest_inside(self, lat, lon) -> Tuple[float, float]:
+        """지역 안이면 그대로, 밖이면 가장 가까운 지역 경계 위 점 (경위도 평면 거리)"""
+        pt = Point(lon, lat)
+        if self.contains(lat, lon):
+            return (lat, lon)
+        g = self.geoms[int(self.tree.nearest(pt))]
+        p = nearest_points(g, pt)[0]
+        return (p.y, p.x)
@@ -0,0 +1,295 @@
+import os
+import math
+import heapq
+import hashlib
+import numpy as np
+import shapely
+import osmnx as ox
+from shapely import STRtree
+from shapely.geometry import LineString, box
+from typing import Optional, Tuple, Iterable
+
+ox.settings.use_cache = True
+ox.settings.log_console = False
+
+EARTH_R_M = 6371008.8
+M_PER_DEG = math.radians(1.0) * EARTH_R_M
+DEFAULT_SPEED_KPH = 30.0   # 속도 정보가 없는 간선의 travel_time 계산용
+REGION_ATTR = "loca_region"  # graphml 그래프 속성에 저장하는 내려받은 지역 (WKT)
+
+
+def graph_file(region, prefix: str = "road_graph") -> str:
+    """지역별 graphml 파일 이름 — 같은 지역이면 같은 파일, 다른 지역이면 다른 파일"""
+    wkt = shapely.to_wkt(shapely.normalize(region), rounding_precision=6)
+    return f"{prefix}_{hashlib.sha1(wkt.encode()).hexdigest()[:12]}.graphml"
+
+
+def _edge_name(data) -> str:
+    name = data.get("name") or ""
+    if isinstance(name, (list, tuple)):
+        name = ", ".join(str(n) for n in name)
+    return str(name)
+
+
+def _hav_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dl = np.radians(lon2 - lon1)
+    a = np.sin((p2 - p1) / 2)**2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2)**2
+    return EARTH_R_M * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class RoadGraph:
+    """
+    osmnx 도로 그래프의 간선을 STRtree로 색인해 좌표 열 전체를 한 번에 도로 위로 스냅
+    간선 형상은 그래프 중심 기준 등장방형 근사(m 단위) 좌표로 변환해 보관
+    G: osmnx MultiDiGraph (노드 x=lon, y=lat / 간선 geometry 없으면 두 노드를 잇는 직선)
+    region: 그래프가 덮는 지역 (None이면 노드 범위 bbox)
+    """
+    def __init__(self, G, region=None):
+        self.G = G
+        ys = [d["y"] for _, d in G.nodes(data=True)]
+        xs = [d["x"] for _, d in G.nodes(data=True)]
+        if not ys:
+            raise ValueError("Road graph has no nodes.")
+        self.region = region if region is not None else box(min(xs), min(ys), max(xs), max(ys))
+        self.lat0 = (min(ys) + max(ys)) / 2
+        self.lon0 = (min(xs) + max(xs)) / 2
+        self.kx = M_PER_DEG * math.cos(math.radians(self.lat0))
+        self.ky = M_PER_DEG
+
+        geoms, names, edges, seen = [], [], [], set()
+        for u, v, k, data in G.edges(keys=True, data=True):
+            # 양방향 간선은 형상이 같으므로 한 번만 색인
+            ident = (min(u, v), max(u, v), k)
+            if ident in seen:
+                continue
+            seen.add(ident)
+            geom = data.get("geometry")
+            if geom is None:
+                nu, nv = G.nodes[u], G.nodes[v]
+                geom = LineString([(nu["x"], nu["y"]), (nv["x"], nv["y"])])
+            xy = shapely.get_coordinates(geom)
+            geoms.append(LineString(self._to_local(xy[:, 1], xy[:, 0])))
+            names.append(_edge_name(data))
+            edges.append((u, v, k))
+        self.geoms = np.asarray(geoms, dtype=object)
+        self.names = names
+        self.edges = edges
+        self.tree = STRtree(self.geoms)
+        self._router = None
+
+    def __len__(self):
+        return len(self.edges)
+
+    def covers(self, lats, lons) -> np.ndarray:
+        """좌표별로 그래프 지역 안(경계 포함)인지"""
+        return shapely.intersects_xy(self.region, np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+    def covers_region(self, region) -> bool:
+        # 경계 좌표의 부동소수 오차는 무시
+        return self.region.buffer(1e-9).covers(region)
+
+    def _to_local(self, lat, lon) -> np.ndarray:
+        return np.column_stack([(np.asarray(lon, dtype=float) - self.lon0) * self.kx,
+                                (np.asarray(lat, dtype=float) - self.lat0) * self.ky])
+
+    def _to_latlon(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return xy[:, 1] / self.ky + self.lat0, xy[:, 0] / self.kx + self.lon0
+
+    def snap(self, lats, lons, max_dist_m: Optional[float] = None):
+        """
+        좌표 배열 → 가장 가까운 간선 위 투영점 (벡터 연산 1회)
+        반환: (snap_lat, snap_lon, dist_m, edge_idx)  (찾지 못한 점은 NaN / -1)
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        n = len(lats)
+        snap_lat = np.full(n, np.nan)
+        snap_lon = np.full(n, np.nan)
+        dist_m = np.full(n, np.nan)
+        edge_idx = np.full(n, -1, dtype=np.int64)
+        ok = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        if not len(ok) or not len(self):
+            return snap_lat, snap_lon, dist_m, edge_idx
+
+        pts = shapely.points(self._to_local(lats[ok], lons[ok]))
+        # 근사 좌표계 오차를 감안해 max_distance는 여유 있게 두고 실제 거리로 다시 거름
+        max_d = None if max_dist_m is None else max_dist_m * 1.05 + 1.0
+        p_i, g_i = self.tree.query_nearest(pts, max_distance=max_d, all_matches=False)
+        lines = self.geoms[g_i]
+        proj = shapely.line_interpolate_point(lines, shapely.line_locate_point(lines, pts[p_i]))
+        la, lo = self._to_latlon(shapely.get_coordinates(proj))
+
+        rows = ok[p_i]
+        d = _hav_m(lats[rows], lons[rows], la, lo)
+        keep = np.ones(len(rows), dtype=bool) if max_dist_m is None else d <= max_dist_m
+        rows = rows[keep]
+        snap_lat[rows], snap_lon[rows], dist_m[rows] = la[keep], lo[keep], d[keep]
+        edge_idx[rows] = g_i[keep]
+        return snap_lat, snap_lon, dist_m, edge_idx
+
+    def edge_name(self, i: int) -> str:
+        return self.names[i] if i >= 0 else ""
+
+    # --- 최단 경로 (travel_time)
+    def _ensure_travel_times(self):
+        G = self.G
+        if all("travel_time" in d for _, _, d in G.edges(data=True)):
+            return
+        try:
+            ox.add_edge_speeds(G)
+            ox.add_edge_travel_times(G)
+        except Exception:
+            pass   # highway / length 속성이 없는 그래프: 아래에서 기본 속도로 계산
+        for u, v, d in G.edges(data=True):
+            if "travel_time" not in d:
+                d["travel_time"] = self._edge_length(u, v, d) / ((d.get("speed_kph") or DEFAULT_SPEED_KPH) / 3.6)
+
+    def _edge_coords(self, u, v, data) -> np.ndarray:
+        # 간선 형상 (u → v 방향) [lat, lon]
+        geom = data.get("geometry")
+        if geom is None:
+            nu, nv = self.G.nodes[u], self.G.nodes[v]
+            return np.array([[nu["y"], nu["x"]], [nv["y"], nv["x"]]])
+        xy = shapely.get_coordinates(geom)
+        return xy[:, ::-1].copy()
+
+    def _edge_length(self, u, v, data) -> float:
+        if data.get("length") is not None:
+            return float(data["length"])
+        c = self._edge_coords(u, v, data)
+        return float(_hav_m(c[:-1, 0], c[:-1, 1], c[1:, 0], c[1:, 1]).sum())
+
+    def _routing(self):
+        """
+        노드 번호 기반 인접 리스트 (평행 간선은 travel_time이 가장 작은 것만) + 노드 STRtree
+        처음 경로를 찾을 때 한 번만 만들고 메모리에 유지
+        """
+        if self._router is None:
+            self._ensure_travel_times()
+            G = self.G
+            nodes = list(G.nodes)
+            idx = {n: i for i, n in enumerate(nodes)}
+            best = {}
+            for u, v, d in G.edges(data=True):
+                key = (idx[u], idx[v])
+                if key not in best or d["travel_time"] < best[key][0]:
+                    best[key] = (float(d["travel_time"]), u, v, d)
+            adj = [[] for _ in nodes]
+            edge_info = {}
+            for (i, j), (tt, u, v, d) in best.items():
+                adj[i].append((j, tt))
+                edge_info[(i, j)] = (tt, self._edge_length(u, v, d), self._edge_coords(u, v, d))
+            lat = np.array([G.nodes[n]["y"] for n in nodes], dtype=np.float64)
+            lon = np.array([G.nodes[n]["x"] for n in nodes], dtype=np.float64)
+            self._router = {"adj": adj, "edge": edge_info, "lat": lat, "lon": lon,
+                            "tree": STRtree(shapely.points(self._to_local(lat, lon)))}
+        return self._router
+
+    def nearest_nodes(self, lats, lons, max_dist_m: Optional[float] = None) -> np.ndarray:
+        """좌표 배열 → 가장 가까운 노드 번호 (max_dist_m 밖 / 결측은 -1)"""
+        r = self._routing()
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        out = np.full(len(lats), -1, dtype=np.int64)
+        ok = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        if not len(ok):
+            return out
+        pts = shapely.points(self._to_local(lats[ok], lons[ok]))
+        max_d = None if max_dist_m is None else max_dist_m * 1.05 + 1.0
+        p_i, n_i = r["tree"].query_nearest(pts, max_distance=max_d, all_matches=False)
+        rows = ok[p_i]
+        if max_dist_m is not None:
+            keep = _hav_m(lats[rows], lons[rows], r["lat"][n_i], r["lon"][n_i]) <= max_dist_m
+            rows, n_i = rows[keep], n_i[keep]
+        out[rows] = n_i
+        return out
+
+    def _shortest_tree(self, src: int, targets) -> dict:
+        """src에서 travel_time 기준 Dijkstra (targets를 모두 확정하면 중단) → 선행 노드 dict"""
+        adj = self._routing()["adj"]
+        dist = {src: 0.0}
+        pred = {src: -1}
+        remaining = set(targets)
+        done = set()
+        heap = [(0.0, src)]
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            remaining.discard(u)
+            for v, w in adj[u]:
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return pred
+
+    def _route_along(self, pred: dict, src: int, dst: int):
+        # 선행 노드를 따라 dst → src 노드 열 복원 후 간선 형상을 이어 붙임
+        if dst not in pred:
+            return None
+        r = self._routing()
+        chain = [dst]
+        while chain[-1] != src:
+            chain.append(pred[chain[-1]])
+        chain.reverse()
+        if len(chain) == 1:
+            return {"path": np.array([[r["lat"][src], r["lon"][src]]]), "distance": 0.0, "duration": 0.0}
+        infos = [r["edge"][(a, b)] for a, b in zip(chain[:-1], chain[1:])]
+        path = np.vstack([infos[0][2]] + [info[2][1:] for info in infos[1:]])
+        return {"path": path, "distance": sum(info[1] for info in infos),
+                "duration": sum(info[0] for info in infos)}
+
+    def route_many(self, start_lats, start_lons, end_lats, end_lons, max_snap_m: Optional[float] = None) -> list:
+        """
+        출발/도착 좌표 배열 → 행별 최단 경로 dict {"path": (k, 2) [lat, lon], "distance": m, "duration": s}
+        (가까운 노드가 없거나 경로가 없으면 None)
+        출발 노드가 같은 행들은 Dijkstra 한 번의 최단 경로 트리를 같이 씀
+        """
+        src = self.nearest_nodes(start_lats, start_lons, max_snap_m)
+        dst = self.nearest_nodes(end_lats, end_lons, max_snap_m)
+        out = [None] * len(src)
+        groups = {}
+        for row, (s, t) in enumerate(zip(src.tolist(), dst.tolist())):
+            if s >= 0 and t >= 0:
+                groups.setdefault(s, []).append((row, t))
+        for s, rows in groups.items():
+            pred = self._shortest_tree(s, {t for _, t in rows})
+            found = {}
+            for row, t in rows:
+                if t not in found:
+                    found[t] = self._route_along(pred, s, t)
+                out[row] = found[t]
+        return out
+
+    @classmethod
+    def from_bboxes(cls, bboxes: Iterable[Tuple[float, float, float, float]], path: Optional[str] = None,
+                    network_type: str = "drive") -> "RoadGraph":
+        """bboxes(left, bottom, right, top)를 합친 영역의 도로 그래프"""
+        return cls.from_region(shapely.union_all([box(*b) for b in bboxes]), path, network_type)
+
+    @classmethod
+    def from_region(cls, region, path: Optional[str] = None, network_type: str = "drive") -> "RoadGraph":
+        """
+        region(shapely 폴리곤) 안의 도로 그래프를 한 번만 내려받아 path(graphml)에 저장
+        path가 이미 있고 저장된 지역(없으면 노드 범위)이 region을 덮으면 내려받지 않고 읽음
+        덮지 못하면 region으로 다시 내려받아 path를 덮어씀
+        """
+        if path and os.path.exists(path):
+            G = ox.load_graphml(path)
+            stored = G.graph.get(REGION_ATTR)
+            rg = cls(G, shapely.from_wkt(stored) if stored else None)
+            if rg.covers_region(region):
+                print(f"Loading road graph from '{path}'.")
+                return rg
+            print(f"Road graph '{path}' does not cover the requested region. Rebuilding.")
+        print("Downloading road graph for the region (one-time)...")
+        G = ox.graph_from_polygon(region, network_type=network_type)
+        G.graph[REGION_ATTR] = shapely.to_wkt(region, rounding_precision=-1)
+        if path:
+            ox.save_graphml(G, path)
+            print(f"Saved road graph to '{path}'.")
+        return cls(G, region)
@@ -1,58 +1,480 @@
 import pandas as pd
+import numpy as np
+import re
 import requests
 import time
 import os
 import json
+import math
+import random
+import zlib
+import base64
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from shapely.geometry import Point
+from shapely.geometry import Point, box
 import osmnx as ox
 
+import cacheStore
+from coords import decimal_grid
+from rateLimit import TokenBucket
+
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=UserWarning)
 
 ox.settings.use_cache = True
 ox.settings.log_console = False
+
+RETRY_STATUS = (429, 500, 502, 503, 504)   # 잠시 후 다시 시도할 응답 코드
+EARTH_R_M = 6371008.8
+M_PER_DEG = math.radians(1.0) * EARTH_R_M
+FLOAT_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def format_path(path):
+    """경로 배열 (k, 2) [lat, lon] → "(lat, lon); (lat, lon); ..." 문자열 (소수 6자리, 경로 없음은 None)"""
+    if path is None or not len(path):
+        return None
+    return "; ".join([f"({lat:.6f}, {lon:.6f})" for lat, lon in np.asarray(path).tolist()])
+
+
+def parse_path(value):
+    """format_path 문자열 (또는 [[lat, lon], ...] 목록) → 경로 배열 (k, 2)"""
+    if isinstance(value, str):
+        nums = [float(x) for x in FLOAT_RE.findall(value)]
+        return np.array(nums[:len(nums) // 2 * 2], dtype=np.float64).reshape(-1, 2)
+    return np.asarray(value, dtype=np.float64).reshape(-1, 2)
+
+
+def encode_path(path) -> str:
+    """
+    경로 배열 (k, 2) → 캐시 저장용 문자열
+    마이크로도(1e-6°) int32 → 첫 점 이후는 이전 점과의 차이 → zlib → base64
+    """
+    grid = decimal_grid(np.asarray(path, dtype=np.float64).reshape(-1, 2), 6)
+    delta = np.diff(grid, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return base64.b64encode(zlib.compress(delta.astype("<i4").tobytes())).decode("ascii")
+
+
+def decode_path(data: str) -> np.ndarray:
+    """encode_path의 역변환 (좌표는 소수 6자리)"""
+    delta = np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype="<i4").reshape(-1, 2)
+    return np.cumsum(delta, axis=0, dtype=np.int64) / 1e6
+
+
+def _local_xy(path: np.ndarray) -> np.ndarray:
+    # 경로 중심 기준 등장방형 근사 (m)
+    lat0 = (path[:, 0].min() + path[:, 0].max()) / 2
+    return np.column_stack([(path[:, 1] - path[0, 1]) * M_PER_DEG * math.cos(math.radians(lat0)),
+                            (path[:, 0] - path[0, 0]) * M_PER_DEG])
+
+
+def path_length_m(path) -> float:
+    """경로 배열 (k, 2) [lat, lon]의 길이 (m, 하버사인)"""
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if len(path) < 2:
+        return 0.0
+    p = np.radians(path)
+    dphi = np.diff(p[:, 0])
+    dl = np.diff(p[:, 1])
+    a = np.sin(dphi / 2)**2 + np.cos(p[:-1, 0]) * np.cos(p[1:, 0]) * np.sin(dl / 2)**2
+    return float((EARTH_R_M * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).sum())
+
+
+def simplify_path(path, tolerance_m: float) -> np.ndarray:
+    """
+    Douglas-Peucker 단순화 (허용 오차 m, 선분까지의 거리 기준)
+    재귀 대신 단계별로 열려 있는 모든 구간의 최원점을 한 번에 계산
+    """
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    n = len(path)
+    if n < 3 or not tolerance_m or tolerance_m <= 0:
+        return path
+    xy = _local_xy(path)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    settled = np.zeros(n, dtype=bool)   # 이미 허용 오차 안으로 확인된 구간의 내부 점
+    while True:
+        idx = np.flatnonzero(keep)
+        s, e = idx[:-1], idx[1:]
+        gap = e - s - 1
+        is_open = (gap > 0) & ~settled[np.minimum(s + 1, n - 1)]
+        s, e, gap = s[is_open], e[is_open], gap[is_open]
+        if not len(s):
+            break
+        start = np.cumsum(gap) - gap
+        seg = np.repeat(np.arange(len(s)), gap)
+        pts = s[seg] + 1 + (np.arange(gap.sum()) - start[seg])
+
+        # 점 → 선분 (s, e) 거리
+        a, b, q = xy[s[seg]], xy[e[seg]], xy[pts]
+        ab = b - a
+        den = (ab**2).sum(axis=1)
+        t = np.clip(np.divide(((q - a) * ab).sum(axis=1), den, out=np.zeros_like(den), where=den > 0), 0.0, 1.0)
+        d = np.hypot(*(a + t[:, None] * ab - q).T)
+
+        dmax = np.maximum.reduceat(d, start)
+        far = dmax > tolerance_m
+        settled[pts[~far[seg]]] = True
+        if not far.any():
+            break
+        cand = np.flatnonzero((d == dmax[seg]) & far[seg])
+        first = cand[np.r_[True, seg[cand][1:] != seg[cand][:-1]]]
+        keep[pts[first]] = True
+    return path[keep]
+
+
+def resample_path(path, step_m: float) -> np.ndarray:
+    """경로를 따라 step_m 간격으로 다시 찍은 점 (시작점, 끝점 포함)"""
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if len(path) < 2 or not step_m or step_m <= 0:
+        return path
+    cum = np.r_[0.0, np.cumsum(np.hypot(*np.diff(_local_xy(path), axis=0).T))]
+    if cum[-1] <= 0:
+        return path[:1]
+    at = np.r_[np.arange(0.0, cum[-1], step_m), cum[-1]]
+    return np.column_stack([np.interp(at, cum, path[:, 0]), np.interp(at, cum, path[:, 1])])
+
+
+def route_summary(routes) -> pd.DataFrame:
+    """
+    경로 dict 목록 → 경로별 요약 (points: 단순화/재표본 전 점 수, length_m: 형상 길이,
+    distance_m / duration_s: Kakao summary 값, 없으면 NaN)
+    """
+    def get(r, k):
+        v = r.get(k) if r else None
+        return np.nan if v is None else v
+    return pd.DataFrame({
+        "points": pd.array([get(r, "points") for r in routes], dtype="Int64"),
+        "length_m": np.array([get(r, "length_m") for r in routes], dtype=np.float64),
+        "distance_m": np.array([get(r, "distance") for r in routes], dtype=np.float64),
+        "duration_s": np.array([get(r, "duration") for r in routes], dtype=np.float64),
+    })
+
+
 class Extractor:
-    def __init__(self, KAKAOAPI_KEY, API_DELAY = 0.05):
+    def __init__(self, KAKAOAPI_KEY, API_DELAY = 0.05, cache_store = None, concurrent = False, rate_limiter = None,
+                 backend = "kakao", road_graph = None):
         self.GEOCODE_CACHE_FILE = 'geocode_cache.json'
         self.KAKAO_API_KEY = KAKAOAPI_KEY
         self.API_DELAY = API_DELAY
+        self.DIRECTIONS_URL = "https://apis-navi.kakaomobility.com/v1/directions"
+        self.CACHE_STORE = cache_store   # cacheStore.CacheStore
+        self.ROUTE_CACHE_DB = 'route_cache.db'   # cache_store가 없을 때 쓰는 SQLite 캐시 (None이면 캐시 사용 안 함)
+        self.ROUTE_CACHE_MAX_ENTRIES = 500_000   # 넘으면 오래 쓰지 않은 경로부터 삭제 (None이면 제한 없음)
+        self.ROUTE_CACHE_MAX_MB = 1024
+        self.ROUTE_MISS_TTL = 6 * 3600           # 경로가 없던 쌍을 다시 요청하지 않는 시간 (초, None이면 실패는 캐시 안 함)
+        self._miss_cache = None
+
+        self.CONCURRENT = concurrent     # True면 고유 (출발, 도착) 쌍을 ROUTE_WORKERS 스레드로 동시에 요청
+        self.RATE_LIMITER = rate_limiter # rateLimit.TokenBucket (있으면 API_DELAY 대신 사용)
+        self.ROUTE_QPS = 20              # CONCURRENT인데 RATE_LIMITER가 없을 때 기본값
+        self.ROUTE_WORKERS = 8
+        self.MAX_TRIES = 4               # 429/5xx/연결 오류 시 최대 시도 횟수
+        self.BACKOFF_BASE = 0.5          # 재시도 대기 (초): BACKOFF_BASE * 2**i (+ 지터)
+
+        self.BACKEND = backend           # "kakao": 카카오 길찾기 / "osm": 도로 그래프 최단 경로 (실패한 쌍은 카카오로)
+        self.ROAD_GRAPH = road_graph     # roadGraph.RoadGraph (None이면 처음 쓸 때 GRAPH_FILE에서 로드/생성)
+        self.GRAPH_FILE = None           # graphml 경로 (None이면 지역별 파일 roadGraph.graph_file(region))
+        self.REGION_FILE = None          # 그래프를 새로 받을 지역 (None이면 경로 좌표 범위 + GRAPH_PAD_DEG)
+        self.GRAPH_PAD_DEG = 0.05
+        self._graph_auto = False         # ROAD_GRAPH를 좌표 범위로 직접 만들었는지 (범위 밖 좌표가 오면 넓혀 다시 만듦)
+        self.OSM_SNAP_METERS = 300       # 출발/도착 좌표와 가장 가까운 노드의 최대 거리
+        self.OSM_FALLBACK = True         # osm에서 경로를 못 찾은 쌍은 카카오로
+
+        self.SESSION = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=64)
+        self.SESSION.mount("https://", adapter)
+        self.SESSION.mount("http://", adapter)
+        self.HEADERS = {"Authorization": f"KakaoAK {self.KAKAO_API_KEY}"}
+        self.DEDUP_ROUND = 6             # (출발, 도착) 쌍 중복 판단 자릿수 (6 ≈ 0.1m)
+        self.SIMPLIFY_METERS = None      # 경로 단순화 허용 오차 (m, Douglas-Peucker / None이면 사용 안 함)
+        self.RESAMPLE_METERS = None      # 경로 재표본 간격 (m / None이면 사용 안 함)
+        self.dedup_saved = 0             # 중복 제거로 줄인 길찾기 요청 수 (누적)
 
     # --- 카카오 길찾기 함수
     def get_route(self, start_lat, start_lon, end_lat, end_lon):
-        url = "https://apis-navi.kakaomobility.com/v1/directions"
-        headers = {"Authorization": f"KakaoAK {self.KAKAO_API_KEY}"}
+        cache = self.load_route_cache()
+        cache_key = self._cache_key(start_lat, start_lon, end_lat, end_lon)
+        cached = cache.get_many([cache_key]) if cache is not None else {}
+        if cache_key in cached:
+            return self._route_from_cache(cached[cache_key])
+        misses = self.load_route_miss_cache()
+        if misses is not None and cache_key in misses:
+            return None
+        answered, route = self._fetch_route(start_lat, start_lon, end_lat, end_lon)
+        if route and cache is not None:
+            cache[cache_key] = self._route_to_cache(route)
+        elif answered and not route and misses is not None:
+            misses[cache_key] = True
+        return route
+
+    def load_route_cache(self):
+        if self.CACHE_STORE is None and self.ROUTE_CACHE_DB:
+            # 경로 1건마다 upsert, 조회 시각을 남겨 evict_route_cache가 LRU로 정리
+            self.CACHE_STORE = cacheStore.SqliteCacheStore(self.ROUTE_CACHE_DB, namespace="route", track_access=True)
+        return self.CACHE_STORE
+
+    def load_route_miss_cache(self):
+        # 실패한 쌍: 같은 SQLite 파일의 "route_miss" namespace에 ROUTE_MISS_TTL 동안만 보관
+        cache = self.load_route_cache()
+        if self._miss_cache is None and self.ROUTE_MISS_TTL and hasattr(cache, "namespace"):
+            self._miss_cache = cache.namespace("route_miss", ttl=self.ROUTE_MISS_TTL)
+            self._miss_cache.evict_expired()
+        return self._miss_cache
+
+    def evict_route_cache(self):
+        if self.CACHE_STORE is None:
+            return 0
+        max_bytes = None if self.ROUTE_CACHE_MAX_MB is None else int(self.ROUTE_CACHE_MAX_MB * 2**20)
+        removed = self.CACHE_STORE.evict_lru(self.ROUTE_CACHE_MAX_ENTRIES, max_bytes)
+        if removed:
+            print(f"Route cache: evicted {removed} least recently used routes.")
+        return removed
+
+    def _cache_key(self, start_lat, start_lon, end_lat, end_lon):
+        nd = self.DEDUP_ROUND
+        return f"{round(start_lat, nd)},{round(start_lon, nd)}-{round(end_lat, nd)},{round(end_lon, nd)}"
+
+    @staticmethod
+    def _route_to_cache(route):
+        return {"geom": encode_path(route["path"]), "source": route["source"],
+                "distance": route.get("distance"), "duration": route.get("duration")}
+
+    @staticmethod
+    def _route_from_cache(value):
+        """캐시 값 → 경로 dict (이전 형식의 [[lat, lon], ...] / 문자열 경로도 읽음)"""
+        path = decode_path(value["geom"]) if value.get("geom") else parse_path(value.get("path") or [])
+        if not len(path):
+            return None
+        return {"start_node": tuple(path[0].tolist()), "end_node": tuple(path[-1].tolist()),
+                "path": path, "source": value.get("source", "Kakao"),
+                "distance": value.get("distance"), "duration": value.get("duration")}
+
+    def postprocess_route(self, route):
+        """
+        원본 형상의 점 수 / 길이를 기록한 뒤 SIMPLIFY_METERS 단순화 → RESAMPLE_METERS 재표본
+        (캐시에는 원본 형상을 저장)
+        """
+        if not route:
+            return route
+        path = route["path"]
+        out = dict(route, points=len(path), length_m=path_length_m(path))
+        if self.SIMPLIFY_METERS:
+            path = simplify_path(path, self.SIMPLIFY_METERS)
+        if self.RESAMPLE_METERS:
+            path = resample_path(path, self.RESAMPLE_METERS)
+        out["path"] = path
+        return out
+
+    def _retry_get(self, params):
+        """
+        keep-alive 세션으로 길찾기 요청 (RATE_LIMITER 공유)
+        429/5xx/연결 오류는 지수 백오프로 MAX_TRIES번까지 재시도, 그 밖의 오류 응답은 None
+        """
+        for i in range(self.MAX_TRIES):
+            if self.RATE_LIMITER is not None:
+                self.RATE_LIMITER.acquire()
+            else:
+                time.sleep(self.API_DELAY)
+            retry_after = 0.0
+            try:
+                r = self.SESSION.get(self.DIRECTIONS_URL, headers=self.HEADERS, params=params, timeout=10)
+                if r.status_code not in RETRY_STATUS:
+                    r.raise_for_status()
+                    return r
+                try:
+                    retry_after = float(r.headers.get("Retry-After", 0))
+                except ValueError:
+                    pass
+            except requests.exceptions.HTTPError:
+                return None
+            except requests.exceptions.RequestException:
+                pass
+            if i + 1 < self.MAX_TRIES:
+                time.sleep(max(retry_after, self.BACKOFF_BASE * 2 ** i * (1 + random.random() / 4)))
+        return None
+
+    def _fetch_route(self, start_lat, start_lon, end_lat, end_lon):
+        """
+        (응답 여부, 경로) — 4xx/재시도 소진/시간 초과/연결 오류는 (False, None)
+        200 응답인데 경로가 없으면 (True, None) (이때만 실패 캐시에 기록)
+        """
         params = {"origin": f"{start_lon},{start_lat}", "destination": f"{end_lon},{end_lat}"}
         
         try:
-            time.sleep(self.API_DELAY)
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._retry_get(params)
+            if response is None:
+                return False, None
             result = response.json()
 
             if "routes" in result and result["routes"] and "sections" in result["routes"][0] and result["routes"][0]["sections"]:
                 route = result["routes"][0]
-                all_vertexes = []
-                for section in route["sections"]:
-                    for road in section["roads"]:
-                        vertex_list = road["vertexes"]
-                        path_coords = [(vertex_list[i], vertex_list[i+1]) for i in range(0, len(vertex_list), 2)]
-                        all_vertexes.extend(path_coords)
-                
-                if all_vertexes:
-                    unique_path = [all_vertexes[i] for i in range(len(all_vertexes)) if i == 0 or all_vertexes[i] != all_vertexes[i-1]]
-                    
-                    start_node = f"({unique_path[0][1]:.6f}, {unique_path[0][0]:.6f})"
-                    end_node = f"({unique_path[-1][1]:.6f}, {unique_path[-1][0]:.6f})"
-                    path_str = "; ".join([f"({lat:.6f}, {lon:.6f})" for lon, lat in unique_path])
-                    
-                    return {"start_node": start_node, "end_node": end_node, "path": path_str, "source": "Kakao"}
+                # vertexes: [lon, lat, lon, lat, ...] → (k, 2) [lon, lat]
+                parts = [np.asarray(road["vertexes"], dtype=np.float64).reshape(-1, 2)
+                         for section in route["sections"] for road in section["roads"]]
+                all_vertexes = np.concatenate(parts) if parts else np.empty((0, 2))
+
+                if len(all_vertexes):
+                    # 연속으로 같은 정점 제거 후 [lat, lon] 순서로 (캐시에서 읽은 경로와 같도록 소수 6자리)
+                    grid = decimal_grid(all_vertexes[:, ::-1], 6)
+                    keep = np.r_[True, np.any(grid[1:] != grid[:-1], axis=1)]
+                    path = grid[keep] / 1e6
+
+                    start_node = tuple(path[0].tolist())
+                    end_node = tuple(path[-1].tolist())
+
+                    summary = route.get("summary") or {}
+                    return True, {"start_node": start_node, "end_node": end_node, "path": path, "source": "Kakao",
+                                  "distance": summary.get("distance"), "duration": summary.get("duration")}
 
         except requests.exceptions.RequestException:
-            pass
+            return False, None
 
-        return None
+        return True, None
+
+    def unique_pairs(self, coords: np.ndarray):
+        """
+        (n, 4) [start_lat, start_lon, end_lat, end_lon] → DEDUP_ROUND 자리로 반올림한 같은 쌍끼리 묶음
+        반환: (codes, first)  codes: 행별 고유 쌍 번호 (처음 나온 순서), first: 고유 쌍별 첫 행 위치
+        """
+        grid = pd.DataFrame({j: decimal_grid(coords[:, j], self.DEDUP_ROUND) for j in range(4)})
+        codes = grid.groupby(list(range(4)), sort=False).ngroup().to_numpy()
+        _, first = np.unique(codes, return_index=True)
+        return codes, first
+
+    def fetch_routes(self, coords: np.ndarray, desc: str = "Path extraction progress", backend = None) -> list:
+        """
+        (n, 4) 좌표 배열 → 행별 경로 dict 목록 (좌표 결측/실패는 None)
+        같은 (출발, 도착) 쌍은 한 번만 요청하고 결과를 해당 행 모두에 나눠 줌
+        경로는 postprocess_route를 거침 (points / length_m 추가, 설정 시 단순화 / 재표본)
+        backend: None이면 BACKEND
+        """
+        backend = backend or self.BACKEND
+        if backend not in ("kakao", "osm"):
+            raise ValueError(f"Unknown route backend: '{backend}'")
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+        out = [None] * len(coords)
+        valid = np.flatnonzero(~np.isnan(coords).any(axis=1))
+        if not len(valid):
+            return out
+
+        codes, first = self.unique_pairs(coords[valid])
+        saved = len(valid) - len(first)
+        self.dedup_saved += saved
+        print(f"Route dedup: {len(valid)} rows → {len(first)} unique pairs ({saved} requests saved)")
+
+        pairs = [tuple(coords[valid[f]].tolist()) for f in first]
+        if backend == "osm":
+            results = self.routes_osm(pairs)
+            todo = [i for i, r in enumerate(results) if r is None]
+            print(f"OSM routing: {len(pairs) - len(todo)} routes, {len(todo)} without a graph route")
+            if todo and self.OSM_FALLBACK:
+                for i, r in zip(todo, self._fetch_unique([pairs[i] for i in todo], desc)):
+                    results[i] = r
+        else:
+            results = self._fetch_unique(pairs, desc)
+        results = [self.postprocess_route(r) for r in results]
+        for pos, c in zip(valid.tolist(), codes.tolist()):
+            out[pos] = results[c]
+        return out
+
+    def _pairs_region(self, arr):
+        # 좌표 범위 + GRAPH_PAD_DEG를 0.01도 격자로 넓힌 bbox (비슷한 입력이면 같은 그래프 파일)
+        lats, lons = arr[:, [0, 2]], arr[:, [1, 3]]
+        pad = self.GRAPH_PAD_DEG
+        return box(math.floor((np.nanmin(lons) - pad) * 100) / 100, math.floor((np.nanmin(lats) - pad) * 100) / 100,
+                   math.ceil((np.nanmax(lons) + pad) * 100) / 100, math.ceil((np.nanmax(lats) + pad) * 100) / 100)
+
+    def road_graph(self, pairs = None):
+        """
+        REGION_FILE이 있으면 그 지역, 없으면 pairs 좌표 범위의 도로 그래프
+        좌표 범위로 만든 그래프는 이후 pairs(예: 다음 청크)가 범위를 벗어나면 두 범위를 합쳐 다시 만듦
+        (직접 넘긴 road_graph / REGION_FILE 그래프는 그대로 쓰고, 밖의 쌍은 경로 없음 → OSM_FALLBACK)
+        """
+        import roadGraph
+        arr = None if pairs is None else np.asarray(pairs, dtype=np.float64).reshape(-1, 4)
+        if self.ROAD_GRAPH is not None:
+            if not self._graph_auto or arr is None or not len(arr):
+                return self.ROAD_GRAPH
+            if self.ROAD_GRAPH.covers(arr[:, [0, 2]].ravel(), arr[:, [1, 3]].ravel()).all():
+                return self.ROAD_GRAPH
+            region = self.ROAD_GRAPH.region.union(self._pairs_region(arr))
+        elif self.REGION_FILE:
+            from regions import RegionIndex
+            region = RegionIndex.load(self.REGION_FILE).union()
+        elif arr is not None and len(arr):
+            region = self._pairs_region(arr)
+        else:
+            raise ValueError("Route pairs or REGION_FILE are required to build the road graph.")
+        self.ROAD_GRAPH = roadGraph.RoadGraph.from_region(region, self.GRAPH_FILE or roadGraph.graph_file(region))
+        self._graph_auto = not self.REGION_FILE
+        return self.ROAD_GRAPH
+
+    def routes_osm(self, pairs):
+        """
+        고유 (출발, 도착) 쌍 → 도로 그래프 travel_time 최단 경로 목록 (API 호출 없음, 캐시 사용 안 함)
+        경로를 찾지 못한 쌍은 None
+        """
+        if not pairs:
+            return []
+        arr = np.asarray(pairs, dtype=np.float64).reshape(-1, 4)
+        routes = self.road_graph(arr).route_many(arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3],
+                                                 max_snap_m=self.OSM_SNAP_METERS)
+        out = []
+        for r in routes:
+            if r is None:
+                out.append(None)
+                continue
+            path = r["path"]
+            out.append({"start_node": tuple(path[0].tolist()), "end_node": tuple(path[-1].tolist()),
+                        "path": path, "source": "OSM", "distance": r["distance"], "duration": r["duration"]})
+        return out
+
+    def _fetch_unique(self, pairs, desc):
+        """
+        캐시는 한 번에 조회하고, 없는 쌍만 요청
+        CONCURRENT면 ROUTE_WORKERS 스레드 풀에서 (모든 요청이 하나의 RATE_LIMITER 공유), 캐시 쓰기는 호출한 스레드에서만
+        """
+        cache = self.load_route_cache()
+        keys = [self._cache_key(*pair) for pair in pairs]
+        cached = cache.get_many(keys) if cache is not None else {}
+        results = [self._route_from_cache(cached[k]) if k in cached else None for k in keys]
+        missing = [i for i, k in enumerate(keys) if k not in cached]
+        misses = self.load_route_miss_cache()
+        known_bad = misses.get_many([keys[i] for i in missing]) if misses is not None and missing else {}
+        missing = [i for i in missing if keys[i] not in known_bad]
+        print(f"Route cache: {len(pairs) - len(missing) - len(known_bad)} hits, "
+              f"{len(known_bad)} known no-route pairs, {len(missing)} to fetch")
+        if not missing:
+            return results
+
+        def store(i, fetched):
+            # 요청 자체가 실패한 쌍(answered=False)은 기록하지 않고 다음 실행에서 다시 요청
+            answered, route = fetched
+            results[i] = route
+            if route and cache is not None:
+                cache[keys[i]] = self._route_to_cache(route)
+            elif answered and not route and misses is not None:
+                misses[keys[i]] = True
+
+        if not self.CONCURRENT:
+            for i in tqdm(missing, total=len(missing), desc=desc):
+                store(i, self._fetch_route(*pairs[i]))
+        else:
+            if self.RATE_LIMITER is None:
+                self.RATE_LIMITER = TokenBucket(self.ROUTE_QPS)
+            with ThreadPoolExecutor(max_workers=max(1, self.ROUTE_WORKERS)) as pool:
+                futures = {pool.submit(self._fetch_route, *pairs[i]): i for i in missing}
+                try:
+                    for fut in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                        store(futures[fut], fut.result())
+                finally:
+                    for fut in futures:
+                        fut.cancel()
+        self.evict_route_cache()
+        return results
 
     def process_routes_from_dataframe(self, input_df: pd.DataFrame) -> pd.DataFrame:      
         print("--- Accident path node extraction initialization (INPUT DataFrame) ---")
@@ -66,33 +488,29 @@ class Extractor:
         df['노드 경로(path)'] = None
         df['경로 탐색 소스'] = None
 
-        df_processed = df[['lat', 'lon', 'dest_lat', 'dest_lon']].copy()
-        df_processed.columns = ['start_lat', 'start_lon', 'dest_lat', 'dest_lon']
-
-        df_processed.dropna(subset=['start_lat', 'start_lon', 'dest_lat', 'dest_lon'], inplace=True)
-        if df_processed.empty:
+        coords = df[required_cols].to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(coords).any(axis=1))
+        if not len(valid):
             print("❌ There is no data with valid start/destination coordinates. Route extraction will be skipped.")
             return df
 
-        print(f"✅ Start extracting a total of {len(df_processed)} paths")
+        print(f"✅ Start extracting a total of {len(valid)} paths")
 
         print("\n--- Path node extraction Start... (KaKao API)")
-        
-        results_dict = {}
-        for idx, row in tqdm(df_processed.iterrows(), total=df_processed.shape[0], desc="Path extraction progress"):
-            route_info = self.get_route(
-                row['start_lat'], row['start_lon'], 
-                row['dest_lat'], row['dest_lon']
-            )
-            results_dict[idx] = route_info
 
-        # 결과 업데이트
-        for idx, result in results_dict.items():
+        # 경로는 (k, 2) [lat, lon] 배열 그대로 열에 담음 (문자열은 저장할 때 format_path로)
+        out = {c: np.full(len(df), None, dtype=object) for c in
+               ('사고지점 노드 좌표(path)', '목적지 노드 좌표(path)', '노드 경로(path)', '경로 탐색 소스')}
+        for pos, result in enumerate(self.fetch_routes(coords)):
             if result:
-                df.loc[idx, '사고지점 노드 좌표(path)'] = result.get('start_node')
-                df.loc[idx, '목적지 노드 좌표(path)'] = result.get('end_node')
-                df.loc[idx, '노드 경로(path)'] = result.get('path')
-                df.loc[idx, '경로 탐색 소스'] = result.get('source')
+                out['사고지점 노드 좌표(path)'][pos] = result.get('start_node')
+                out['목적지 노드 좌표(path)'][pos] = result.get('end_node')
+                out['노드 경로(path)'][pos] = result.get('path')
+                out['경로 탐색 소스'][pos] = result.get('source')
+
+        # 결과 업데이트
+        for col, values in out.items():
+            df[col] = pd.Series(values, index=df.index, dtype=object)
 
         print("\n--- Path node extraction Complete! ---")
         print(f"Extracted {df['노드 경로(path)'].notna().sum()} paths out of {len(df)} total records.")
@@ -138,7 +556,8 @@ if __name__ == '__main__':
     res_acc_dst_df = Extract.process_routes_from_dataframe(acc_dst_df)
     res_acc_dst_df.columns = ['lat', 'lon', 'dest_lat', 'dest_lon', "snap_acc_coord", "snap_dst_coord", "acc_dst_route", "src"]
     
-    result_df = pd.concat([res_dep_acc_df['dep_acc_route'], res_acc_dst_df['acc_dst_route']], axis = 1)
+    result_df = pd.concat([res_dep_acc_df['dep_acc_route'].map(format_path),
+                           res_acc_dst_df['acc_dst_route'].map(format_path)], axis = 1)
     result_df['total_route'] = (
                                 result_df['dep_acc_route'].fillna('').astype(str) + 
                                 '; ' + 
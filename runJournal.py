@@ -0,0 +1,86 @@
+import os
+import re
+import json
+import pandas as pd
+from typing import Optional, Dict
+
+
+class RunJournal:
+    """
+    청크/단계별 완료 기록과 중간 결과를 디스크에 남기는 실행 저널
+    같은 입력(경로, 크기, 수정 시각, chunksize, limit)으로 다시 실행하면 완료된 단계는 건너뜀
+    - journal.json  : 입력 서명
+    - journal.jsonl : 완료 기록 (한 줄 = 한 청크의 한 단계)
+    - c{chunk}_{stage}.pkl.gz : 중간 결과 DataFrame
+    입력이 바뀌면 위 파일들만 지움 (저널 표시가 없는 비어 있지 않은 폴더는 건드리지 않고 오류)
+    """
+    _CHUNK_RE = re.compile(r"^c\d{6}_\w+\.pkl\.gz(\.tmp)?$")
+
+    def __init__(self, journal_dir: str, input_path: str, chunksize: int, limit: Optional[int] = None):
+        self.dir = journal_dir
+        st = os.stat(input_path)
+        self.signature = {
+            "input": os.path.abspath(input_path), "size": st.st_size, "mtime": st.st_mtime,
+            "chunksize": chunksize, "limit": limit,
+        }
+        self._meta_path = os.path.join(self.dir, "journal.json")
+        self._log_path = os.path.join(self.dir, "journal.jsonl")
+        self._done: Dict = {}
+
+        if os.path.isdir(self.dir) and self._read_signature() != self.signature:
+            if not os.path.exists(self._meta_path) and os.listdir(self.dir):
+                raise FileExistsError(f"'{self.dir}' is not empty and is not a run journal. "
+                                      "Choose an empty or dedicated JOURNAL_DIR.")
+            print(f"Input changed since the last run. Resetting journal '{self.dir}'.")
+            self._reset()
+        os.makedirs(self.dir, exist_ok=True)
+        if not os.path.exists(self._meta_path):
+            with open(self._meta_path, "w", encoding="utf-8") as f:
+                json.dump(self.signature, f, ensure_ascii=False)
+        self._load_log()
+
+    def _reset(self):
+        # 저널이 만든 파일만 삭제
+        for name in os.listdir(self.dir):
+            if name in ("journal.json", "journal.jsonl") or self._CHUNK_RE.match(name):
+                os.remove(os.path.join(self.dir, name))
+
+    def _read_signature(self) -> Optional[Dict]:
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_log(self):
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue   # 기록 도중 중단된 마지막 줄
+                if os.path.exists(os.path.join(self.dir, rec["file"])):
+                    self._done[(rec["chunk"], rec["stage"])] = rec["file"]
+
+    def is_done(self, chunk: int, stage: str) -> bool:
+        return (chunk, stage) in self._done
+
+    def load(self, chunk: int, stage: str) -> pd.DataFrame:
+        return pd.read_pickle(os.path.join(self.dir, self._done[(chunk, stage)]))
+
+    def save(self, chunk: int, stage: str, df: pd.DataFrame):
+        name = f"c{chunk:06d}_{stage}.pkl.gz"
+        path = os.path.join(self.dir, name)
+        tmp = path + ".tmp"
+        df.to_pickle(tmp, compression={"method": "gzip", "compresslevel": 1})
+        os.replace(tmp, path)
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"chunk": chunk, "stage": stage, "file": name, "rows": len(df)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._done[(chunk, stage)] = name
+
+    def completed(self, stage: str) -> int:
+        return sum(1 for (_, s) in self._done if s == stage)
@@ -5,14 +5,277 @@ import os
 import json
 import math
 import re
+import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from rateLimit import TokenBucket
+import cacheStore
+from coords import parse_coord_array, decimal_grid, round_decimal, CoordArray
+from regions import RegionIndex, DEFAULT_REGION_BBOXES
+
+EARTH_R_M = 6371008.8
+
+
+class RoadBuffer:
+    """
+    kakao_route_roads 결과(roads 리스트)를 정점/선분 배열로 보관
+    가장 가까운 정점 또는 선분 위 투영점을 NumPy 벡터 연산으로 계산
+    """
+    def __init__(self, roads):
+        arrs, names = [], []
+        for rd in roads:
+            verts = rd.get("vertexes", []) or []
+            if not len(verts):
+                continue
+            names.append((rd.get("name") or "").strip())
+            arrs.append(np.asarray(verts, dtype=np.float64).reshape(-1, 2))
+        xy = np.concatenate(arrs) if arrs else np.empty((0, 2))
+        self.lon = np.ascontiguousarray(xy[:, 0])
+        self.lat = np.ascontiguousarray(xy[:, 1])
+        self.road = np.repeat(np.arange(len(arrs), dtype=np.int32), [len(a) for a in arrs])
+        self.names = names
+        # 같은 도로 안에서 연속한 두 정점 (i, i+1)이 하나의 선분
+        seg = np.flatnonzero(self.road[1:] == self.road[:-1]) if len(self.road) > 1 else np.empty(0, dtype=np.int64)
+        self.seg = seg
+        self._a_lat, self._a_lon = self.lat[seg], self.lon[seg]
+        self._d_lat, self._d_lon = self.lat[seg + 1] - self._a_lat, self.lon[seg + 1] - self._a_lon
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _local_xy(self, lat, lon):
+        # 기준점 주변 등장방형 근사 (수백 m 범위에서 오차 무시 가능)
+        k = np.radians(1.0) * EARTH_R_M
+        x = (self.lon - lon) * k * math.cos(math.radians(lat))
+        y = (self.lat - lat) * k
+        return x, y
+
+    def nearest_vertex(self, lat, lon):
+        if not len(self):
+            return None, 1e18, ""
+        x, y = self._local_xy(lat, lon)
+        i = int(np.argmin(x * x + y * y))
+        pt = (float(self.lat[i]), float(self.lon[i]))
+        return pt, _hav_km(lat, lon, pt[0], pt[1]), self.names[self.road[i]]
+
+    def nearest_point(self, lat, lon):
+        """선분 투영 포함 최근접점: ((lat, lon), 거리 km, 도로명)"""
+        if not len(self.seg):
+            return self.nearest_vertex(lat, lon)
+        j, plat, plon = _project_segments(lat, lon, self._a_lat, self._a_lon, self._d_lat, self._d_lon)
+        return (plat, plon), _hav_km(lat, lon, plat, plon), self.names[self.road[self.seg[j]]]
+
+
+def _project_segments(lat, lon, a_lat, a_lon, d_lat, d_lon):
+    """선분 (a, a + d) 배열 중 (lat, lon)에 가장 가까운 선분 번호와 투영점"""
+    # 경도 방향을 cos(lat)로 줄인 도(degree) 좌표에서 투영 (등장방형 근사)
+    c = math.cos(math.radians(lat))
+    ax, ay = (a_lon - lon) * c, a_lat - lat
+    dx, dy = d_lon * c, d_lat
+    l2 = dx * dx + dy * dy
+    l2[l2 == 0] = np.inf
+    t = -(ax * dx + ay * dy) / l2
+    np.clip(t, 0.0, 1.0, out=t)
+    px, py = ax + t * dx, ay + t * dy
+    j = int(np.argmin(px * px + py * py))
+    tj = float(t[j])
+    return j, float(a_lat[j] + tj * d_lat[j]), float(a_lon[j] + tj * d_lon[j])
+
+
+def _first_occurrence(codes):
+    """pd.factorize 결과(첫 등장 순서로 번호가 매겨짐) → 번호별 첫 위치 (정렬 없이 O(n))"""
+    if not len(codes):
+        return np.empty(0, dtype=np.int64)
+    run_max = np.maximum.accumulate(codes)
+    return np.flatnonzero(np.diff(run_max, prepend=-1) > 0)
+
+
+class SegmentIndex:
+    """
+    길찾기 응답으로 받은 도로 선분을 격자 셀(cell_deg) 단위로 모아두는 공간 색인
+    이웃 사고지점은 이미 받아 둔 선분으로 먼저 스냅해 방향 탐색 요청을 줄임
+    save/load: npz 파일 (선분 끝점 배열 + 도로명)
+    """
+    def __init__(self, cell_deg=0.003):
+        self.cell_deg = cell_deg
+        self._a_lat, self._a_lon, self._b_lat, self._b_lon, self._name = [], [], [], [], []
+        self.names = []
+        self._name_id = {}
+        self._cells = {}
+        self._seen = set()
+        self._arr = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._a_lat)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    @staticmethod
+    def _micro(v):
+        # 선분 식별용 정수 좌표 (1e-6도) — load의 np.rint와 같은 반올림
+        return round(v * 1e6)
+
+    def _add_segment(self, a, b, name_id):
+        # a, b: (lon, lat) / 방향만 다른 같은 선분은 한 번만 저장
+        m = self._micro
+        pa, pb = (m(a[0]), m(a[1])), (m(b[0]), m(b[1]))
+        if pa == pb:
+            return False
+        ident = pa + pb if pa < pb else pb + pa
+        if ident in self._seen:
+            return False
+        self._seen.add(ident)
+        sid = len(self._a_lat)
+        self._a_lon.append(a[0]); self._a_lat.append(a[1])
+        self._b_lon.append(b[0]); self._b_lat.append(b[1])
+        self._name.append(name_id)
+        i0, j0 = self._cell(min(a[1], b[1]), min(a[0], b[0]))
+        i1, j1 = self._cell(max(a[1], b[1]), max(a[0], b[0]))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._cells.setdefault((i, j), []).append(sid)
+        return True
+
+    def add_roads(self, roads):
+        """kakao_route_roads 결과를 선분으로 나눠 색인 → 새로 추가된 선분 수"""
+        added = 0
+        with self._lock:
+            for rd in roads:
+                verts = rd.get("vertexes", []) or []
+                if len(verts) < 2:
+                    continue
+                name = (rd.get("name") or "").strip()
+                if name not in self._name_id:
+                    self._name_id[name] = len(self.names)
+                    self.names.append(name)
+                nid = self._name_id[name]
+                for a, b in zip(verts[:-1], verts[1:]):
+                    added += self._add_segment(a, b, nid)
+            if added:
+                self._arr = None
+        return added
+
+    def _arrays(self):
+        if self._arr is None:
+            a_lat = np.asarray(self._a_lat, dtype=np.float64)
+            a_lon = np.asarray(self._a_lon, dtype=np.float64)
+            self._arr = (a_lat, a_lon, np.asarray(self._b_lat) - a_lat, np.asarray(self._b_lon) - a_lon)
+        return self._arr
+
+    def nearest(self, lat, lon, max_m):
+        """max_m 안의 이미 아는 선분 위 최근접점: ((lat, lon), 거리 km, 도로명) / 없으면 (None, 1e18, "")"""
+        with self._lock:
+            ci, cj = self._cell(lat, lon)
+            cell_m = self.cell_deg * 111320.0 * max(0.1, math.cos(math.radians(lat)))
+            ring = int(math.ceil(max_m / cell_m))
+            ids = set()
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    ids.update(self._cells.get((i, j), ()))
+            if ids:
+                a_lat, a_lon, d_lat, d_lon = self._arrays()
+                sel = np.fromiter(ids, dtype=np.int64, count=len(ids))
+                j, plat, plon = _project_segments(lat, lon, a_lat[sel], a_lon[sel], d_lat[sel], d_lon[sel])
+                d_km = _hav_km(lat, lon, plat, plon)
+                if d_km * 1000.0 <= max_m:
+                    self.hits += 1
+                    return (plat, plon), d_km, self.names[self._name[sel[j]]]
+            self.misses += 1
+            return None, 1e18, ""
+
+    def save(self, path):
+        with self._lock:
+            tmp = f"{path}.tmp.npz"
+            np.savez_compressed(tmp, a_lat=np.asarray(self._a_lat), a_lon=np.asarray(self._a_lon),
+                                b_lat=np.asarray(self._b_lat), b_lon=np.asarray(self._b_lon),
+                                name=np.asarray(self._name, dtype=np.int32), names=np.asarray(self.names, dtype=str),
+                                cell_deg=self.cell_deg)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """저장된 선분은 이미 중복이 제거돼 있으므로 식별자 / 셀 목록을 배열 연산으로 한 번에 복원"""
+        data = np.load(path)
+        idx = cls(float(data["cell_deg"]))
+        idx.names = data["names"].tolist()
+        idx._name_id = {n: i for i, n in enumerate(idx.names)}
+        a_lat, a_lon, b_lat, b_lon = (np.asarray(data[k], dtype=np.float64) for k in ("a_lat", "a_lon", "b_lat", "b_lon"))
+        idx._a_lat, idx._a_lon, idx._b_lat, idx._b_lon = a_lat.tolist(), a_lon.tolist(), b_lat.tolist(), b_lon.tolist()
+        idx._name = data["name"].tolist()
+        if not len(a_lat):
+            return idx
+
+        # 식별자: (lon, lat) 정수 좌표 두 끝점을 정렬해 이은 4-튜플 (_add_segment와 같은 형식)
+        ma = np.rint(np.column_stack([a_lon, a_lat]) * 1e6).astype(np.int64)
+        mb = np.rint(np.column_stack([b_lon, b_lat]) * 1e6).astype(np.int64)
+        swap = (ma[:, 0] > mb[:, 0]) | ((ma[:, 0] == mb[:, 0]) & (ma[:, 1] > mb[:, 1]))
+        lo, hi = np.where(swap[:, None], mb, ma), np.where(swap[:, None], ma, mb)
+        idx._seen = set(zip(lo[:, 0].tolist(), lo[:, 1].tolist(), hi[:, 0].tolist(), hi[:, 1].tolist()))
+
+        # 선분이 걸친 셀 범위를 펼쳐 (셀, 선분 번호) 목록으로 만든 뒤 셀별로 묶음
+        i0 = np.floor(np.minimum(a_lat, b_lat) / idx.cell_deg).astype(np.int64)
+        i1 = np.floor(np.maximum(a_lat, b_lat) / idx.cell_deg).astype(np.int64)
+        j0 = np.floor(np.minimum(a_lon, b_lon) / idx.cell_deg).astype(np.int64)
+        j1 = np.floor(np.maximum(a_lon, b_lon) / idx.cell_deg).astype(np.int64)
+        w = j1 - j0 + 1
+        counts = (i1 - i0 + 1) * w
+        sid = np.repeat(np.arange(len(a_lat)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ci = np.repeat(i0, counts) + k // np.repeat(w, counts)
+        cj = np.repeat(j0, counts) + k % np.repeat(w, counts)
+        order = np.lexsort((sid, cj, ci))
+        ci, cj, sid = ci[order], cj[order], sid[order]
+        starts = np.flatnonzero(np.r_[True, (ci[1:] != ci[:-1]) | (cj[1:] != cj[:-1])])
+        groups = np.split(sid, starts[1:])
+        idx._cells = {(i, j): g.tolist() for i, j, g in zip(ci[starts].tolist(), cj[starts].tolist(), groups)}
+        return idx
+
+
+def _hav_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dphi = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dl/2)**2
+    return EARTH_R_M / 1000.0 * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
 class SNAP:
-    def __init__(self, KAKAO_API_KEY):
+    def __init__(self, KAKAO_API_KEY, cache_store=None, concurrent=False, rate_limiter=None,
+                 backend="kakao", road_graph=None):
         self.SNAP_CACHE_FILE = 'snap_cache_kakao_only.json'        
+        self.SNAP_CACHE_DB = 'snap_cache.db'     # cache_store가 없을 때 쓰는 SQLite 캐시 (None이면 json 파일)
+        self.CACHE_STORE = cache_store   # cacheStore.CacheStore
         self.KAKAO_API_KEY = KAKAO_API_KEY    
         self.API_DELAY = 0.05      
+        self.DIRECTIONS_URL = "https://apis-navi.kakaomobility.com/v1/directions"
+
+        self.CONCURRENT = concurrent         # True면 방향 탐색 / 고유 좌표를 동시에 처리
+        self.RATE_LIMITER = rate_limiter     # rateLimit.TokenBucket (있으면 API_DELAY 대신 사용)
+        self.SNAP_QPS = 20                   # CONCURRENT인데 RATE_LIMITER가 없을 때 기본값
+        self.SNAP_WORKERS = 8                # 고유 좌표 동시 처리 스레드 수
+        self.PROBE_FANOUT = 4                # 한 좌표에서 동시에 보내는 방향 탐색 수
+        self._probe_pool = None
+        self._probe_pool_lock = threading.Lock()
+
+        self.BACKEND = backend               # "kakao": 길찾기 방향 탐색 / "osm": 도로 그래프 (API 호출 없음)
+        self.ROAD_GRAPH = road_graph         # roadGraph.RoadGraph (None이면 처음 쓸 때 GRAPH_FILE에서 로드/생성)
+        self.GRAPH_FILE = None               # graphml 경로 (None이면 지역별 파일 roadGraph.graph_file(region))
+
+        self.USE_SEGMENT_CACHE = True        # 받아 둔 도로 선분으로 먼저 스냅 (SEGMENT_CACHE_FILE에 누적)
+        self.SEGMENT_CACHE_FILE = 'snap_segments.npz'
+        self.SEGMENT_INDEX = None            # SegmentIndex (run에서 로드)
+        self.segment_hits = 0
                                         
         self.SESSION = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=64)
+        self.SESSION.mount("https://", adapter)
+        self.SESSION.mount("http://", adapter)
         self.HEADERS = {"Authorization": f"KakaoAK {self.KAKAO_API_KEY}"}
 
         self.DEDUP_ROUND = 4                 
@@ -20,15 +283,15 @@ class SNAP:
         self.MAX_SNAP_METERS = 200           
         self.EARLY_HIT_METERS = 80           
         self.MAX_CALLS_PER_POINT = 4         
+        self.SEGMENT_PROJECTION = True       # False면 기존처럼 정점에만 스냅
 
         self.DIRS = [(1,0), (0,1), (-1,0), (0,-1)]
 
         self.USE_REGION_FILTER = True
-        self.REGION_BBOXES = [
-            (127.19, 36.19, 127.54, 36.51),
-            (126.13, 36.10, 127.70, 37.05),
-            (127.20, 36.10, 128.35, 37.35),
-        ]
+        self.REGION_FILE = None              # GeoJSON / {"bboxes": [...]} 지역 정의 (None이면 REGION_BBOXES)
+        self.REGION_BATCH = 200              # CONCURRENT에서 한 작업으로 묶는 같은 지역 좌표 수
+        self._regions = None
+        self.REGION_BBOXES = list(DEFAULT_REGION_BBOXES)
 
     def fix_latlon_order(self, lat, lon):
         def in_kr(a,b): return 32.0 <= a <= 39.5 and 124.0 <= b <= 132.5
@@ -47,6 +310,19 @@ class SNAP:
         lat, lon = float(nums[0]), float(nums[1])
         return self.fix_latlon_order(lat, lon)
 
+    def parse_latlon_array(self, values):
+        """parse_latlon_str의 벡터 버전 → (lat, lon) float64 배열 (실패는 NaN, 뒤바뀐 위/경도는 교정)"""
+        lat, lon = parse_coord_array(values, check_range=False)
+        return self.fix_latlon_order_array(lat, lon)
+
+    def fix_latlon_order_array(self, lat, lon):
+        """fix_latlon_order의 벡터 버전 (입력 배열을 바꾸지 않음)"""
+        lat, lon = np.array(lat, dtype=np.float64), np.array(lon, dtype=np.float64)
+        def in_kr(a, b): return (a >= 32.0) & (a <= 39.5) & (b >= 124.0) & (b <= 132.5)
+        swap = ~in_kr(lat, lon) & in_kr(lon, lat)
+        lat[swap], lon[swap] = lon[swap], lat[swap]
+        return lat, lon
+
     def fmt_latlon(self, lat, lon, nd=6):
         return f"{lat:.{nd}f},{lon:.{nd}f}"
 
@@ -67,12 +343,45 @@ class SNAP:
         nd = self.DEDUP_ROUND
         return f"{round(lat, nd)},{round(lon, nd)}"
 
+    def dedup_codes(self, lat, lon):
+        """
+        좌표 배열 → (codes, keys): codes[i]는 keys 번호 (NaN은 -1)
+        keys는 uniq_key_from_latlon과 같은 문자열이며 고유 좌표에 대해서만 생성
+        """
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        codes = np.full(len(lat), -1, dtype=np.int64)
+        if not valid.any():
+            return codes, []
+        gl, gn = decimal_grid(lat[valid], self.DEDUP_ROUND), decimal_grid(lon[valid], self.DEDUP_ROUND)
+        span = int(gn.max()) - int(gn.min()) + 1
+        if (int(gl.max()) - int(gl.min()) + 1) * span < 2**62:
+            comb = (gl - gl.min()) * span + (gn - gn.min())
+        else:
+            comb = gl + 1j * gn
+        c, _ = pd.factorize(comb)
+        first = _first_occurrence(c)
+        codes[valid] = c
+        scale = 10 ** self.DEDUP_ROUND
+        keys = [f"{a / scale},{b / scale}" for a, b in zip(gl[first].tolist(), gn[first].tolist())]
+        return codes, keys
+
+    def region_index(self):
+        if self._regions is None:
+            if self.REGION_FILE:
+                self._regions = RegionIndex.load(self.REGION_FILE)
+            else:
+                self._regions = RegionIndex.from_bboxes(self.REGION_BBOXES)
+        return self._regions
+
+    def region_ids(self, lat, lon):
+        """좌표 배열 → 지역 번호 배열 (-1: 지역 밖)"""
+        return self.region_index().locate(lat, lon)
+
+    def in_bbox_array(self, lat, lon):
+        return self.region_ids(lat, lon) >= 0
+
     def in_any_bbox(self, lat, lon):
-        bboxes = self.REGION_BBOXES
-        for left, bottom, right, top in bboxes:
-            if (left <= lon <= right) and (bottom <= lat <= top):
-                return True
-        return False
+        return self.region_index().contains(lat, lon)
 
     def clamp_to_bbox(self, lat, lon, bbox):
         left, bottom, right, top = bbox
@@ -80,10 +389,9 @@ class SNAP:
         lat_c = min(max(lat, bottom), top)
         return (lat_c, lon_c)
 
-    def clamp_to_nearest_bbox(self, lat, lon, bboxes):
-        bboxes = self.REGION_BBOXES
-        if self.in_any_bbox(lat, lon, bboxes):
-            return (lat, lon)
+    def clamp_to_nearest_bbox(self, lat, lon, bboxes=None):
+        if bboxes is None:
+            return self.region_index().nearest_inside(lat, lon)
         best_pt, best_d = None, 1e18
         for bbox in bboxes:
             lat_c, lon_c = self.clamp_to_bbox(lat, lon, bbox)
@@ -98,6 +406,12 @@ class SNAP:
         return lat2, lon2
 
     def load_snap_cache(self):
+        if self.CACHE_STORE is None and self.SNAP_CACHE_DB:
+            # 스냅 1건마다 upsert (체크포인트 사이에 죽어도 유실 없음), 기존 json 캐시는 1회만 가져옴
+            self.CACHE_STORE = cacheStore.SqliteCacheStore(self.SNAP_CACHE_DB, namespace="snap")
+            cacheStore.import_json_cache(self.SNAP_CACHE_FILE, self.CACHE_STORE)
+        if self.CACHE_STORE is not None:
+            return self.CACHE_STORE
         if os.path.exists(self.SNAP_CACHE_FILE):
             try:
                 with open(self.SNAP_CACHE_FILE, 'r', encoding='utf-8') as f:
@@ -107,15 +421,40 @@ class SNAP:
         return {}
 
     def save_snap_cache(self, cache):
+        if cache is self.CACHE_STORE:
+            cache.flush()
+            return
         with open(self.SNAP_CACHE_FILE, 'w', encoding='utf-8') as f:
             json.dump(cache, f, ensure_ascii=False, indent=2)
 
+    def compact_snap_cache(self):
+        if self.CACHE_STORE is not None:
+            self.CACHE_STORE.compact()
+
 
 
+    def load_segment_index(self):
+        if self.SEGMENT_INDEX is None:
+            if os.path.exists(self.SEGMENT_CACHE_FILE):
+                try:
+                    self.SEGMENT_INDEX = SegmentIndex.load(self.SEGMENT_CACHE_FILE)
+                except Exception:
+                    self.SEGMENT_INDEX = SegmentIndex()
+            else:
+                self.SEGMENT_INDEX = SegmentIndex()
+        return self.SEGMENT_INDEX
+
+    def save_segment_index(self):
+        if self.SEGMENT_INDEX is not None and len(self.SEGMENT_INDEX):
+            self.SEGMENT_INDEX.save(self.SEGMENT_CACHE_FILE)
+
     def _retry_get(self, url, params, tries=3, base_sleep=0.35):
         for i in range(tries):
             try:
-                time.sleep(self.API_DELAY)
+                if self.RATE_LIMITER is not None:
+                    self.RATE_LIMITER.acquire()
+                else:
+                    time.sleep(self.API_DELAY)
                 r = self.SESSION.get(url, headers=self.HEADERS, params=params, timeout=10)
                 if r.status_code == 429:
                     time.sleep(base_sleep * (i+1) + 0.5) 
@@ -131,7 +470,7 @@ class SNAP:
         카카오 길찾기 요청 → roads 리스트 반환
         각 road: {'name': str, 'vertexes': [(lon,lat), ...]}
         """
-        url = "https://apis-navi.kakaomobility.com/v1/directions"
+        url = self.DIRECTIONS_URL
         params = {
             "origin": f"{start_lon:.6f},{start_lat:.6f}",     
             "destination": f"{end_lon:.6f},{end_lat:.6f}",    
@@ -160,158 +499,342 @@ class SNAP:
         return roads_all
 
     def nearest_vertex(self, lat, lon, roads):
-        best_pt, best_d = None, 1e18
-        best_name = ""
-        for rd in roads:
-            name = (rd.get("name") or "").strip()
-            for (vx, vy) in rd.get("vertexes", []): 
-                d = self.hav_km(lat, lon, vy, vx)
-                if d < best_d:
-                    best_d = d
-                    best_pt = (vy, vx)
-                    best_name = name
-        return best_pt, best_d, best_name
+        buf = roads if isinstance(roads, RoadBuffer) else RoadBuffer(roads)
+        return buf.nearest_vertex(lat, lon)
+
+    def nearest_on_roads(self, lat, lon, roads):
+        buf = roads if isinstance(roads, RoadBuffer) else RoadBuffer(roads)
+        if self.SEGMENT_PROJECTION:
+            return buf.nearest_point(lat, lon)
+        return buf.nearest_vertex(lat, lon)
+
+    def _probe_target(self, lat, lon, ex, ny):
+        lat2, lon2 = self.offset_latlon(lat, lon, east_m=ex*self.FAST_OFFSET_M, north_m=ny*self.FAST_OFFSET_M)
+        if self.USE_REGION_FILTER and not self.in_any_bbox(lat2, lon2):
+            lat2, lon2 = self.clamp_to_nearest_bbox(lat2, lon2)
+        return self.ensure_moved(lat, lon, lat2, lon2)
+
+    def _probe_direction(self, lat, lon, ex, ny, cancel=None):
+        """한 방향 탐색 → (pt, 거리 m, 도로명) 또는 None (cancel이 set이면 요청하지 않음)"""
+        if cancel is not None and cancel.is_set():
+            return None
+        lat2, lon2 = self._probe_target(lat, lon, ex, ny)
+        roads = self.kakao_route_roads(lat, lon, lat2, lon2)
+        if not roads:
+            return None
+        if self.SEGMENT_INDEX is not None:
+            self.SEGMENT_INDEX.add_roads(roads)
+        pt, d_km, name = self.nearest_on_roads(lat, lon, roads)
+        if not pt:
+            return None
+        return pt, d_km * 1000.0, name
+
+    def _known_segment(self, lat, lon):
+        """이미 색인된 선분 중 MAX_SNAP_METERS 안의 최근접점 → (pt, 거리 m, 도로명) 또는 None"""
+        if self.SEGMENT_INDEX is None:
+            return None
+        pt, d_km, name = self.SEGMENT_INDEX.nearest(lat, lon, self.MAX_SNAP_METERS)
+        if not pt:
+            return None
+        return pt, d_km * 1000.0, name
+
+    def _probe_executor(self) -> ThreadPoolExecutor:
+        # 여러 작업 스레드가 동시에 처음 호출해도 풀은 하나만 생성
+        with self._probe_pool_lock:
+            if self._probe_pool is None:
+                self._probe_pool = ThreadPoolExecutor(max_workers=max(1, self.SNAP_WORKERS * self.PROBE_FANOUT))
+            return self._probe_pool
+
+    def _snap_point_concurrent(self, lat, lon, best=None):
+        """
+        방향 탐색을 PROBE_FANOUT개씩 동시에 요청
+        EARLY_HIT_METERS 이내 결과가 먼저 오면 즉시 반환하고 남은 탐색은 취소
+        """
+        probe_pool = self._probe_executor()
+        dirs = self.DIRS[:self.MAX_CALLS_PER_POINT]
+        fanout = max(1, self.PROBE_FANOUT)
+        cancel = threading.Event()
+        for s in range(0, len(dirs), fanout):
+            pending = {probe_pool.submit(self._probe_direction, lat, lon, ex, ny, cancel)
+                       for ex, ny in dirs[s:s + fanout]}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    res = fut.result()
+                    if res is None:
+                        continue
+                    pt, d_m, name = res
+                    if d_m <= self.EARLY_HIT_METERS:
+                        cancel.set()
+                        for f in pending:
+                            f.cancel()
+                        return (pt[0], pt[1], round(d_m,1), name)
+                    if best is None or d_m < best[1]:
+                        best = res
+        if best and best[1] <= self.MAX_SNAP_METERS:
+            return (best[0][0], best[0][1], round(best[1],1), best[2])
+        return None
 
     def snap_point_kakao_nearby(self, lat, lon):
         if self.USE_REGION_FILTER and not self.in_any_bbox(lat, lon):
             return None
 
-        collected_roads = []
+        # 색인된 선분이 EARLY_HIT_METERS 안이면 요청 없이 확정, 그 밖이면 탐색 결과와 비교할 후보로만 사용
+        known = self._known_segment(lat, lon)
+        if known and known[1] <= self.EARLY_HIT_METERS:
+            self.segment_hits += 1
+            return (known[0][0], known[0][1], round(known[1],1), known[2])
+        if self.CONCURRENT:
+            return self._snap_point_concurrent(lat, lon, best=known)
+
         calls = 0
-        early_pt = None
-        early_d_m = None
-        early_name = ""
+        early_pt, early_d_m, early_name = known if known else (None, None, "")
 
         for ex, ny in self.DIRS:
             if calls >= self.MAX_CALLS_PER_POINT:
                 break
-            lat2, lon2 = self.offset_latlon(lat, lon, east_m=ex*self.FAST_OFFSET_M, north_m=ny*self.FAST_OFFSET_M)
-            if self.USE_REGION_FILTER and not self.in_any_bbox(lat2, lon2):
-                lat2, lon2 = self.clamp_to_nearest_bbox(lat2, lon2)
-            lat2, lon2 = self.ensure_moved(lat, lon, lat2, lon2)
-
-            roads = self.kakao_route_roads(lat, lon, lat2, lon2)
+            res = self._probe_direction(lat, lon, ex, ny)
             calls += 1
-            if not roads:
-                continue
-
-            pt, d_km, name = self.nearest_vertex(lat, lon, roads)
-            if pt:
-                d_m = d_km * 1000.0
+            if res:
+                pt, d_m, name = res
                 if d_m <= self.EARLY_HIT_METERS:
                     return (pt[0], pt[1], round(d_m,1), name) 
                 if (early_pt is None) or (d_m < early_d_m):
                     early_pt, early_d_m, early_name = pt, d_m, name
 
-            collected_roads.extend(roads)
-
-        if collected_roads:
-            pt, d_km, name = self.nearest_vertex(lat, lon, collected_roads)
-            if pt:
-                d_m = d_km * 1000.0
-                if d_m <= self.MAX_SNAP_METERS:
-                    return (pt[0], pt[1], round(d_m,1), name)
-
+        # 전체 응답에 대한 최근접점 = 응답별 최근접점 중 최소 (early_pt) 이므로 재탐색하지 않음
         if early_pt and early_d_m is not None and early_d_m <= self.MAX_SNAP_METERS:
             return (early_pt[0], early_pt[1], round(early_d_m,1), early_name)
 
         return None
 
-    def run(self, df):
-        print("--- Starting nearby road snapping (Kakao-only, for Chungcheong/Daejeon region) ---")
+    def road_graph(self):
+        if self.ROAD_GRAPH is None:
+            import roadGraph
+            region = self.region_index().union()
+            self.ROAD_GRAPH = roadGraph.RoadGraph.from_region(region, self.GRAPH_FILE or roadGraph.graph_file(region))
+        return self.ROAD_GRAPH
 
-        df["dep_parsed"] = df["dep_coord"].map(self.parse_latlon_str)
-        df["acc_parsed"] = df["acc_coord"].map(self.parse_latlon_str)
-        df["dst_parsed"] = df["dst_coord"].map(self.parse_latlon_str)
-
-        def key_of(t):
-            if not t: return None
-            lat, lon = t
-            return self.uniq_key_from_latlon(lat, lon, nd=self.DEDUP_ROUND)
+    def snap_points_osm(self, pts):
+        """
+        좌표 리스트 [(lat, lon), ...] → [(y, x, dist_m, road) 또는 None, ...]
+        도로 그래프 간선에 한 번에 스냅 (MAX_SNAP_METERS 밖은 None)
+        """
+        if not pts:
+            return []
+        g = self.road_graph()
+        arr = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        lat, lon, dist_m, edge = g.snap(arr[:, 0], arr[:, 1], max_dist_m=self.MAX_SNAP_METERS)
+        return [None if e < 0 else (y, x, round(d, 1), g.edge_name(e))
+                for y, x, d, e in zip(lat.tolist(), lon.tolist(), dist_m.tolist(), edge.tolist())]
+
+    def _snap_batch(self, batch):
+        return [(k, self.snap_point_kakao_nearby(lat, lon)) for k, (lat, lon) in batch]
+
+    def _region_batches(self, pending, region_of):
+        """지역별로 묶은 뒤 REGION_BATCH개씩 나눈 작업 목록 (같은 지역 좌표는 한 스레드에서 이어서 처리)"""
+        groups = {}
+        for k, pt in pending.items():
+            groups.setdefault(region_of.get(k, -1), []).append((k, pt))
+        size = max(1, self.REGION_BATCH)
+        return [g[s:s + size] for g in groups.values() for s in range(0, len(g), size)]
+
+    def _snap_pending(self, pending, region_of=None):
+        """
+        캐시에 없는 고유 좌표를 스냅해 (key, snap)을 차례로 반환
+        CONCURRENT면 지역별 작업을 SNAP_WORKERS 크기의 스레드 풀에서 처리 (모든 요청이 하나의 RATE_LIMITER 공유)
+        캐시 쓰기는 호출한 스레드에서만 하도록 결과만 넘김
+        """
+        if not self.CONCURRENT:
+            for k, (lat, lon) in pending.items():
+                yield k, self.snap_point_kakao_nearby(lat, lon)
+            return
+
+        if self.RATE_LIMITER is None:
+            self.RATE_LIMITER = TokenBucket(self.SNAP_QPS)
+        batches = iter(self._region_batches(pending, region_of or {}))
+        window = max(1, self.SNAP_WORKERS) * 2
+        self._probe_executor()
+        with ThreadPoolExecutor(max_workers=max(1, self.SNAP_WORKERS)) as pool:
+            running = set()
+            try:
+                while True:
+                    for batch in batches:
+                        running.add(pool.submit(self._snap_batch, batch))
+                        if len(running) >= window:
+                            break
+                    if not running:
+                        break
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield from fut.result()
+            finally:
+                for fut in running:
+                    fut.cancel()
+                with self._probe_pool_lock:
+                    if self._probe_pool is not None:
+                        self._probe_pool.shutdown(wait=False, cancel_futures=True)
+                        self._probe_pool = None
+
+    def unique_points(self, df, cols=("dep_coord", "acc_coord", "dst_coord")):
+        """
+        세 좌표 열을 이어 붙여 한 번에 파싱 / 위경도 교정 / 영역 필터 / 중복 제거
+        반환: (codes, keys, uniq, region_of)  codes는 열 순서대로 이어 붙인 좌표별 keys 번호 (-1: 파싱 실패)
+              uniq = {key: (lat, lon)} 영역 안 고유 좌표 (키별 첫 좌표, 등장 순서)
+              region_of = {key: 지역 번호}
+        """
+        lat, lon = self.parse_latlon_array(np.concatenate([df[c].to_numpy(dtype=object) for c in cols]))
+        return self._unique_from_arrays(lat, lon)
 
-        all_pts = []
-        for c in ["dep_parsed","acc_parsed","dst_parsed"]:
-            all_pts.extend(df[c].tolist())
-        valid_pts = [t for t in all_pts if t]
+    def _unique_from_arrays(self, lat, lon):
+        codes, keys = self.dedup_codes(lat, lon)
+        rid = self.region_ids(lat, lon)
 
+        valid = codes >= 0
+        region = valid
         if self.USE_REGION_FILTER:
-            before = len(valid_pts)
-            valid_pts = [t for t in valid_pts if self.in_any_bbox(t[0], t[1])]
-            print(f"Coordinates passed region filter: {len(valid_pts)} / Total valid coordinates: {before}")
-
-        uniq = {}
-        for t in valid_pts:
-            k = key_of(t)
-            if k and k not in uniq:
-                uniq[k] = t
-
-        print(f"Unique coordinates to snap: {len(uniq)} / Total rows: {len(df)}")
-
-        snap_cache = self.load_snap_cache()
+            region = valid & (rid >= 0)
+            print(f"Coordinates passed region filter: {int(region.sum())} / Total valid coordinates: {int(valid.sum())}")
+
+        ridx = np.flatnonzero(region)
+        sub, ucodes = pd.factorize(codes[ridx])
+        first = ridx[_first_occurrence(sub)]
+        ukeys = [keys[c] for c in ucodes.tolist()]
+        uniq = dict(zip(ukeys, zip(lat[first].tolist(), lon[first].tolist())))
+        region_of = dict(zip(ukeys, rid[first].tolist()))
+        return codes, keys, uniq, region_of
+
+    def run(self, df, backend=None):
+        """
+        df의 dep_coord / acc_coord / dst_coord (문자열 또는 튜플) 스냅
+        반환: (snap_dep, snap_acc, snap_dst, diagnostics)  스냅 좌표는 "lat,lon" 문자열 열
+        """
+        coords = [CoordArray(*self.parse_latlon_array(df[c].to_numpy(dtype=object)), index=df.index)
+                  for c in ("dep_coord", "acc_coord", "dst_coord")]
+        dep, acc, dst, diagnostics = self.snap_coords(*coords, backend=backend)
+        return tuple(s.to_strings().rename(name) for s, name
+                     in zip((dep, acc, dst), ("dep_parsed", "acc_parsed", "dst_parsed"))) + (diagnostics,)
 
-        results = {}
+    def snap_coords(self, dep, acc, dst, backend=None):
+        """
+        CoordArray 세 열(dep, acc, dst)을 스냅
+        반환: (snap_dep, snap_acc, snap_dst, diagnostics)  스냅 좌표는 소수 6자리 CoordArray (실패는 NaN)
+        """
+        backend = backend or self.BACKEND
+        if backend not in ("kakao", "osm"):
+            raise ValueError(f"Unknown snap backend: '{backend}'")
+        label = "OSM road graph" if backend == "osm" else "Kakao-only"
+        print(f"--- Starting nearby road snapping ({label}) ---")
+
+        index = dep.index
+        n = len(dep)
+        lat, lon = self.fix_latlon_order_array(np.concatenate([dep.lat, acc.lat, dst.lat]),
+                                               np.concatenate([dep.lon, acc.lon, dst.lon]))
+        codes, keys, uniq, region_of = self._unique_from_arrays(lat, lon)
+
+        print(f"Unique coordinates to snap: {len(uniq)} / Total rows: {n}")
+
+        # 도로 그래프 스냅은 API 호출이 없으므로 스냅 캐시를 거치지 않음
+        snap_cache = {} if backend == "osm" else self.load_snap_cache()
+        if backend == "kakao" and self.USE_SEGMENT_CACHE:
+            seg_index = self.load_segment_index()
+            print(f"Known road segments: {len(seg_index)}")
+
+        snap_y = {}
+        snap_x = {}
         src_meta = {}
         dist_meta = {}
         road_meta = {}
-
-        processed = 0
-        for k, (lat, lon) in tqdm(uniq.items(), total=len(uniq), desc="SNAP :"):
-            if k in snap_cache:
-                v = snap_cache[k]
+        hit_meta = {}
+
+        if isinstance(snap_cache, cacheStore.CacheStore):
+            cached = snap_cache.get_many(uniq)
+        else:
+            cached = {k: snap_cache[k] for k in uniq if k in snap_cache}
+
+        pending = {}
+        for k, (lat, lon) in uniq.items():
+            if k in cached:
+                v = cached[k]
+                hit_meta[k] = True
                 if isinstance(v, dict) and "y" in v and "x" in v:
-                    results[k]  = self.fmt_latlon(v["y"], v["x"])
+                    snap_y[k], snap_x[k] = v["y"], v["x"]
                     src_meta[k] = "kakao"
-                    dist_meta[k]= v.get("dist_m","")
+                    dist_meta[k]= v.get("dist_m")
                     road_meta[k]= v.get("road","")
-                else:
-                    results[k]  = ""
-                    src_meta[k] = ""
-                    dist_meta[k]= ""
-                    road_meta[k]= ""
                 continue
+            pending[k] = (lat, lon)
+
+        if backend == "osm":
+            snapped = zip(pending, self.snap_points_osm(list(pending.values())))
+        else:
+            snapped = self._snap_pending(pending, region_of)
 
-            snap = self.snap_point_kakao_nearby(lat, lon)
+        processed = 0
+        for k, snap in tqdm(snapped, total=len(pending), desc="SNAP :"):
             if snap:
                 y, x, dist_m, rname = snap
-                results[k] = self.fmt_latlon(y, x)
-                src_meta[k] = "kakao"
+                snap_y[k], snap_x[k] = y, x
+                src_meta[k] = backend
                 dist_meta[k]= dist_m
                 road_meta[k]= rname
                 snap_cache[k] = {"y": y, "x": x, "dist_m": dist_m, "road": rname}
             else:
-                results[k]  = ""
-                src_meta[k] = ""
-                dist_meta[k]= ""
-                road_meta[k]= ""
                 snap_cache[k] = None
 
             processed += 1
-            if processed % 300 == 0:   # 중간 체크포인트 저장
+            if backend == "kakao" and processed % 300 == 0:   # 중간 체크포인트 저장 (선분 색인은 마지막에 한 번만)
                 self.save_snap_cache(snap_cache)
 
-        def map_res(t):
-            if not t: return ""
-            return results.get(key_of(t), "")
-
-        def map_src(t):
-            if not t: return ""
-            return src_meta.get(key_of(t), "")
-
-        def map_dist(t):
-            if not t: return ""
-            return dist_meta.get(key_of(t), "")
-
-        def map_road(t):
-            if not t: return ""
-            return road_meta.get(key_of(t), "")
-        
-        data = {
-            "snap_dep_coord" : df["dep_parsed"].map(map_res),
-            "snap_acc_coord" : df["acc_parsed"].map(map_res),
-            "snap_dst_coord" : df["dst_parsed"].map(map_res)
-        }
-        snap_df = pd.DataFrame(data)
-        return df["dep_parsed"].map(map_res),df["acc_parsed"].map(map_res), df["dst_parsed"].map(map_res)
+        if backend == "kakao" and processed:
+            self.save_snap_cache(snap_cache)
+            self.save_segment_index()
+            if self.SEGMENT_INDEX is not None:
+                print(f"Snapped {self.segment_hits} points from known road segments "
+                      f"({len(self.SEGMENT_INDEX)} segments).")
+
+        # 고유 키별 결과를 codes로 한 번에 펼침 (codes == -1 → 마지막 빈 값)
+        diagnostics = self._diagnostics_table(index, codes, keys, snap_y, snap_x, dist_meta,
+                                              road_meta, src_meta, hit_meta)
+        # 이후 단계로 넘기는 좌표는 fmt_latlon과 같은 소수 6자리
+        snaps = tuple(CoordArray(round_decimal(diagnostics[f"{role}_snap_lat"].to_numpy(), 6),
+                                 round_decimal(diagnostics[f"{role}_snap_lon"].to_numpy(), 6), index)
+                      for role in ("dep", "acc", "dst"))
+        return snaps + (diagnostics,)
+
+    @staticmethod
+    def _diagnostics_table(index, codes, keys, snap_y, snap_x, dist_meta, road_meta, src_meta, hit_meta):
+        """
+        행별 스냅 진단표: {dep,acc,dst}_snap_lat/lon (float64), _dist_m (float32),
+        _road/_src (category, 스냅 실패는 NaN), _cache_hit (bool)
+        """
+        def per_key(meta, default, dtype):
+            return np.array([meta.get(k, default) for k in keys] + [default], dtype=dtype)
+
+        def num(v):
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                return np.nan
+
+        lat = per_key(snap_y, np.nan, np.float64)[codes]
+        lon = per_key(snap_x, np.nan, np.float64)[codes]
+        dist = np.array([num(dist_meta.get(k)) for k in keys] + [np.nan], dtype=np.float32)[codes]
+        road = pd.Categorical(per_key(road_meta, None, object)[codes])
+        src = pd.Categorical(per_key(src_meta, None, object)[codes])
+        hit = per_key(hit_meta, False, bool)[codes]
+
+        n = len(index)
+        data = {}
+        for i, role in enumerate(("dep", "acc", "dst")):
+            s = slice(i * n, (i + 1) * n)
+            data[f"{role}_snap_lat"] = lat[s]
+            data[f"{role}_snap_lon"] = lon[s]
+            data[f"{role}_dist_m"] = dist[s]
+            data[f"{role}_road"] = road[s]
+            data[f"{role}_src"] = src[s]
+            data[f"{role}_cache_hit"] = hit[s]
+        return pd.DataFrame(data, index=index)
 
 if __name__ == "__main__":
     INPUT_FILE = 'routes_via_accident_resolved.xlsx'
@@ -329,7 +852,7 @@ if __name__ == "__main__":
         if c not in df.columns:
             raise KeyError(f"The column '{c}' could not be found. The current columns are: {list(df.columns)}")
     snapper = SNAP('Input Your API KEY')
-    mod_df = snapper.run(df)
-    print(mod_df.keys())
-    print(mod_df.head())
+    snap_dep, snap_acc, snap_dst, diagnostics = snapper.run(df)
+    print(diagnostics.dtypes)
+    print(diagnostics.head())
     
\ No newline at end of file
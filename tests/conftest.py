@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import math
+import random
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import networkx as nx
+import pytest
+
+# 저장소 루트의 평면 모듈(NearestFinder, roadGraph 등)을 테스트에서 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAIL_QUERY = "서버오류"     # 항상 503을 돌려주는 검색어
+
+
+def hav_m(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((p2 - p1) / 2) ** 2
+         + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 6371008.8 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def grid_graph(n=20, step=0.002, seed=0, lat0=36.3, lon0=127.4, attrs=False):
+    """
+    n x n 격자 도로 그래프 (osmnx 형식, 노드 y=lat / x=lon, 양방향 간선)
+    attrs=False: 간선마다 speed_kph / True: highway 종류 + length (속도는 RoadGraph가 채움)
+    """
+    rng = np.random.default_rng(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(n):
+        for j in range(n):
+            G.add_node(i * n + j, y=lat0 + i * step, x=lon0 + j * step)
+    for i in range(n):
+        for j in range(n):
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di < n and j + dj < n:
+                    a, b = i * n + j, (i + di) * n + j + dj
+                    if attrs:
+                        data = {"highway": str(rng.choice(["primary", "residential"])), "length": step * 111320.0,
+                                "name": f"{i}-{j}"}
+                    else:
+                        data = {"speed_kph": float(rng.choice([20, 50, 80])), "name": f"{i}-{j}"}
+                    G.add_edge(a, b, **data)
+                    G.add_edge(b, a, **data)
+    return G
+
+
+class KakaoWorld:
+    """
+    고정된 장소 목록으로 응답하는 Kakao Local/Directions 모의 서버
+    keyword: 이름이 검색어로 시작하는 장소를 거리순으로 (radius/size/is_end 반영)
+    coord2address: 좌표 문자열 주소, directions: 직선 경로
+    (FAIL_ROUTE_LAT 위도 출발은 경로 없음 응답, ERROR_ROUTE_LAT 위도 출발은 503)
+    """
+    FAIL_ROUTE_LAT = 36.0
+    ERROR_ROUTE_LAT = 35.0
+
+    def __init__(self, seed=0, n_branches=6):
+        rnd = random.Random(seed)
+        self.places = [(36.30 + rnd.random() * 0.08, 127.36 + rnd.random() * 0.08, f"{name} {i}호점", f"{name} 주소 {i}")
+                       for name in ("편의점", "은행", "약국") for i in range(n_branches)]
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def nearest(self, query, lat, lon, radius=None):
+        """단계 탐색이 돌려줘야 할 정답 (lat, lon, place_name, address)"""
+        found = self.search(query, lat, lon, radius or 10 ** 9)
+        return found[0] if found else None
+
+    def search(self, query, lat, lon, radius):
+        q = query.replace(" ", "")
+        hits = [p for p in self.places if p[2].replace(" ", "").startswith(q) and hav_m(lat, lon, p[0], p[1]) <= radius]
+        return sorted(hits, key=lambda p: hav_m(lat, lon, p[0], p[1]))
+
+    def respond(self, path, q):
+        with self._lock:
+            self.calls[path.rsplit("/", 1)[-1]] += 1
+        if path.endswith("keyword.json"):
+            if q["query"] == FAIL_QUERY:
+                return 503, {}
+            found = self.search(q["query"], float(q["y"]), float(q["x"]), int(q["radius"]))
+            size = int(q.get("size", 15))
+            docs = [{"y": str(p[0]), "x": str(p[1]), "place_name": p[2], "address_name": p[3]} for p in found[:size]]
+            return 200, {"documents": docs, "meta": {"is_end": len(found) <= size}}
+        if path.endswith("coord2address.json"):
+            return 200, {"documents": [{"road_address": {"address_name": f"road {float(q['y']):.5f} {float(q['x']):.5f}"}}]}
+        if path.endswith("directions"):
+            o = [float(v) for v in q["origin"].split(",")]
+            d = [float(v) for v in q["destination"].split(",")]
+            if abs(o[1] - self.ERROR_ROUTE_LAT) < 1e-6:
+                return 503, {}
+            if abs(o[1] - self.FAIL_ROUTE_LAT) < 1e-6:
+                return 200, {"routes": [{"result_code": 104, "result_msg": "no route"}]}
+            verts = [v for t in range(11) for v in (o[0] + (d[0] - o[0]) * t / 10, o[1] + (d[1] - o[1]) * t / 10)]
+            return 200, {"routes": [{"result_code": 0, "summary": {"distance": 1000, "duration": 100},
+                                     "sections": [{"roads": [{"name": "R", "vertexes": verts}]}]}]}
+        return 404, {}
+
+
+@pytest.fixture
+def kakao_world():
+    world = KakaoWorld()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            status, body = world.respond(u.path, {k: v[0] for k, v in parse_qs(u.query).items()})
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    world.base_url = f"http://127.0.0.1:{srv.server_port}"
+    yield world
+    srv.shutdown()
+    srv.server_close()
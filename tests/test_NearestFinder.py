@@ -0,0 +1,142 @@
+import random
+
+import pandas as pd
+import pytest
+
+import NearestFinder as NF
+from conftest import FAIL_QUERY
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    # 고정 지연과 429/5xx 재시도 대기를 생략
+    monkeypatch.setattr(NF, "API_DELAY", 0)
+    monkeypatch.setattr(NF.time, "sleep", lambda s: None)
+
+
+def _finder(world, tmp_path, **kw):
+    kw.setdefault("revgeo_maxsize", 10)
+    return NF.NearestFind("test-key", cache_path=str(tmp_path / "nearest_cache.json"),
+                          api_base=f"{world.base_url}/v2/local", alias_path=None, **kw)
+
+
+def _frame(n=60, seed=1):
+    rnd = random.Random(seed)
+    queries = ["편의점", "은행", "약국", "없는가게", None, FAIL_QUERY]
+    rows = []
+    for i in range(n):
+        lat, lon = 36.30 + rnd.random() * 0.08, 127.36 + rnd.random() * 0.08
+        rows.append({"dep": rnd.choice(queries), "dst": rnd.choice(queries[:4]),
+                     "acc_coord": f"{lat}, {lon}" if i % 17 else None})
+    return pd.DataFrame(rows)
+
+
+def test_retry_exhaustion_is_a_miss(kakao_world, tmp_path):
+    nf = _finder(kakao_world, tmp_path)
+    assert nf._kakao_keyword_nearest(FAIL_QUERY, 36.33, 127.40, 3000) is None
+    assert kakao_world.calls["keyword.json"] == 3
+
+
+def test_sequential_rows_return_true_nearest(kakao_world, tmp_path):
+    df = _frame()
+    out = _finder(kakao_world, tmp_path).resolve_frame(df)
+    for (_, row), (_, res) in zip(df.iterrows(), out.iterrows()):
+        acc = NF.parse_coord(row["acc_coord"])
+        if acc is None:
+            assert res.isna().all()
+            continue
+        want = kakao_world.nearest(row["dst"], *acc, radius=NF.RADIUS_STEPS[-1])
+        assert res["dst_coord"] == (want[:2] if want else None)
+
+
+def test_async_matches_sequential(kakao_world, tmp_path):
+    df = _frame()
+    seq = _finder(kakao_world, tmp_path / "seq").resolve_frame(df)
+    # 호출 수는 처리 순서에 따라 다를 수 있지만 결과는 같아야 함
+    par = _finder(kakao_world, tmp_path / "async").resolve_frame(df, concurrency=8, rate_per_sec=10000)
+    pd.testing.assert_frame_equal(seq, par)
+
+
+@pytest.mark.parametrize("concurrency", [None, 4])
+def test_reverse_geocodes_once_per_unique_coord(kakao_world, tmp_path, concurrency):
+    # 고유 좌표 수가 LRU 크기(10)보다 많아도 프레임 안에서는 좌표당 한 번만 호출
+    df = _frame(n=40)
+    nf = _finder(kakao_world, tmp_path, revgeo_maxsize=10)
+    results = nf.resolve_async(df, concurrency=concurrency, rate_per_sec=10000) if concurrency else nf.resolve_rows(df)
+    coords = {nf._revgeo_key(*lk) for lk in NF.NearestFind._lookup_coords(
+        (r["acc_coord"], r["dst_coord"], r["dep_coord"]) for r in results)}
+    assert len(coords) > 10
+    assert kakao_world.calls["coord2address.json"] == nf.revgeo_calls == len(coords)
+
+
+def test_parallel_radius_does_not_remember_errors(kakao_world, tmp_path):
+    nf = _finder(kakao_world, tmp_path, parallel_radius=True)
+    # 요청 오류(503)는 miss로 기록하지 않고, 모든 반경의 빈 결과만 기록
+    assert nf._find_nearest_parallel(FAIL_QUERY, 36.33, 127.40) is None
+    assert nf._find_nearest_parallel("없는가게", 36.33, 127.40) is None
+    assert list(nf.miss_cache) == [("없는가게", 36.33, 127.4)]
+    calls = kakao_world.calls["keyword.json"]
+    assert nf._find_nearest_parallel(FAIL_QUERY, 36.33, 127.40) is None
+    assert kakao_world.calls["keyword.json"] > calls
+    assert nf._find_nearest_parallel("없는가게", 36.33, 127.40) is None and nf.miss_skipped == 1
+    nf.finish()
+
+
+def test_parallel_radius_async_single_probe_pool(kakao_world, tmp_path, monkeypatch):
+    created = []
+    real = NF.ThreadPoolExecutor
+
+    def counting(*args, **kw):
+        pool = real(*args, **kw)
+        if kw.get("max_workers") == NF.PROBE_WORKERS:
+            created.append(pool)
+        return pool
+
+    monkeypatch.setattr(NF, "ThreadPoolExecutor", counting)
+    nf = _finder(kakao_world, tmp_path, parallel_radius=True)
+    df = _frame(n=40)
+    par = nf.resolve_frame(df, concurrency=8, rate_per_sec=10000)
+    seq = _finder(kakao_world, tmp_path / "seq").resolve_frame(df)
+    pd.testing.assert_frame_equal(seq, par)
+    assert len(created) == 1
+    nf.finish()
+
+
+def test_warm_rerun_reuses_spatial_hits(kakao_world, tmp_path):
+    from cacheStore import SqliteCacheStore
+    db = str(tmp_path / "c.db")
+    # 가까운 두 사고지점: 두 번째는 첫 번째 응답 목록(공간 캐시)으로 해결
+    points = [(36.3300, 127.4000), (36.3302, 127.4001)]
+    store = SqliteCacheStore(db, namespace="nearest")
+    nf = _finder(kakao_world, tmp_path, cache_store=store)
+    first = [nf._find_nearest_by_steps("편의점", *p) for p in points]
+    calls = kakao_world.calls["keyword.json"]
+    assert nf.kw_cache.hits >= 1
+    store.close()
+
+    # 재실행: 정확한 키와 (포함 반경, 응답 목록)이 모두 남아 있어 키워드 호출 없음
+    store = SqliteCacheStore(db, namespace="nearest")
+    nf = _finder(kakao_world, tmp_path, cache_store=store)
+    assert [nf._find_nearest_by_steps("편의점", *p) for p in points] == [list(r) for r in first]
+    assert nf._find_nearest_by_steps("편의점", 36.3301, 127.4000) is not None
+    assert kakao_world.calls["keyword.json"] == calls
+    store.close()
+
+
+def test_reverse_geocodes_persist_in_store(kakao_world, tmp_path):
+    from cacheStore import SqliteCacheStore
+    db = str(tmp_path / "c.db")
+    df = _frame(n=30)
+    store = SqliteCacheStore(db, namespace="nearest")
+    first = _finder(kakao_world, tmp_path, cache_store=store).resolve_frame(df)
+    calls = kakao_world.calls["coord2address.json"]
+    assert calls > 0
+    store.close()
+
+    # 재실행: 역지오코딩은 revgeo namespace에서 읽어 coord2address 호출 없음
+    store = SqliteCacheStore(db, namespace="nearest")
+    nf = _finder(kakao_world, tmp_path, cache_store=store)
+    pd.testing.assert_frame_equal(nf.resolve_frame(df), first)
+    assert nf._kakao_reverse_geocode_fulladdr(*NF.parse_coord(df["acc_coord"][1])) is not None
+    assert kakao_world.calls["coord2address.json"] == calls
+    store.close()
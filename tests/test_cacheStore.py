@@ -0,0 +1,27 @@
+import json
+import time
+
+import cacheStore
+
+
+def test_import_marker_survives_ttl(tmp_path, monkeypatch):
+    src = tmp_path / "nearest_cache.json"
+    src.write_text(json.dumps({"a": [1, 2]}), encoding="utf-8")
+    store = cacheStore.SqliteCacheStore(str(tmp_path / "c.db"), namespace="nearest", ttl=1)
+    assert cacheStore.import_json_cache(str(src), store) == 1
+
+    # ttl이 지나 항목이 지워진 뒤에도 같은 json을 다시 가져오지 않음
+    now = time.time() + 10
+    monkeypatch.setattr(cacheStore.time, "time", lambda: now)
+    assert store.evict_expired() == 1
+    assert cacheStore.import_json_cache(str(src), store) == 0
+    assert "a" not in store
+
+
+def test_namespace_close_keeps_shared_connection(tmp_path):
+    root = cacheStore.SqliteCacheStore(str(tmp_path / "c.db"))
+    route, nearest = root.namespace("route"), root.namespace("nearest")
+    route.close()
+    nearest["k"] = 1
+    assert nearest["k"] == 1
+    root.close()
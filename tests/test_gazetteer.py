@@ -0,0 +1,60 @@
+import threading
+
+from gazetteer import PlaceIndex
+
+
+def test_chain_branch_needs_nearest_certificate():
+    idx = PlaceIndex()
+    # 사고지점 (36.35, 127.38)에서 검색해 찾은 지점 A만 알고 있음
+    idx.add_result("gs25", (36.35, 127.38, "GS25 대전점", "a"), origin=(36.35, 127.38))
+    # 멀리 떨어진 다른 사고지점에서는 A보다 가까운 모르는 지점이 있을 수 있으므로 응답하지 않음
+    assert idx.nearest("gs25", 36.48, 127.30, 20000) is None
+    # 검색했던 지점에서는 응답
+    assert idx.nearest("gs25", 36.35, 127.38, 20000)[2] == "GS25 대전점"
+    # 5km 안에 다른 지점이 없다는 보증이 있으면 1.1km 떨어진 지점에서도 응답
+    idx.certify("gs25", 36.35, 127.38, 5000)
+    assert idx.nearest("gs25", 36.36, 127.38, 20000)[2] == "GS25 대전점"
+    # 보증이 없는 장소명만으로는 응답하지 않음
+    idx.add("이마트", 36.35, 127.38)
+    assert idx.nearest("이마트", 36.35, 127.38, 20000) is None
+
+
+def test_complete_poi_names_and_save_load(tmp_path):
+    poi = tmp_path / "poi.csv"
+    poi.write_text("name,lat,lon,address\n이마트,36.35,127.38,a\n이마트,36.50,127.30,b\n", encoding="utf-8")
+    idx = PlaceIndex()
+    idx.import_poi_file(str(poi))
+    idx.add_result("gs25", (36.35, 127.38, "GS25 대전점", "a"), origin=(36.35, 127.38))
+    assert idx.nearest("이마트", 36.48, 127.30, 20000)[3] == "b"
+
+    path = str(tmp_path / "index.json")
+    idx.save(path)
+    loaded = PlaceIndex.load(path)
+    assert loaded.nearest("이마트", 36.48, 127.30, 20000)[3] == "b"
+    assert loaded.nearest("gs25", 36.35, 127.38, 20000)[2] == "GS25 대전점"
+    assert loaded.nearest("gs25", 36.48, 127.30, 20000) is None
+
+
+def test_concurrent_add_and_nearest():
+    idx = PlaceIndex()
+    idx.mark_complete("cu")
+    errors = []
+
+    def writer():
+        for i in range(2000):
+            idx.add("cu", 36.0 + i * 1e-4, 127.0, f"CU {i}")
+
+    def reader():
+        try:
+            for _ in range(2000):
+                hit = idx.nearest("cu", 36.1, 127.0, 50000)
+                assert hit is None or hit[2].startswith("CU")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
@@ -0,0 +1,37 @@
+from keywordCache import KeywordCache, hav_m
+
+# 같은 이름(체인점)의 지점 세 곳, 위도 방향으로 약 1.1km 간격
+STORES = [(36.300, 127.400, "GS25 A", "a"), (36.310, 127.400, "GS25 B", "b"), (36.320, 127.400, "GS25 C", "c")]
+
+
+def _ranked(lat, lon, radius=None):
+    ranked = sorted(STORES, key=lambda p: hav_m(lat, lon, p[0], p[1]))
+    return [p for p in ranked if radius is None or hav_m(lat, lon, p[0], p[1]) <= radius]
+
+
+def test_reuses_only_provably_nearest_place():
+    kc = KeywordCache(cell_deg=0.05)
+    # 첫 사고지점 근처 지점 하나만 응답에 있음 (포함 반경 = 그 지점까지 거리)
+    kc.put("GS25", 36.2995, 127.400, _ranked(36.2995, 127.400)[:1])
+    # 다음 사고지점은 B가 가장 가깝지만 캐시에는 A뿐 → 재사용하면 안 됨
+    assert kc.get("GS25", 36.309, 127.400, 20000) is None
+    # 같은 지점에서는 재사용
+    assert kc.get("GS25", 36.2995, 127.400, 20000)[2] == "GS25 A"
+
+
+def test_full_response_is_reranked_for_new_point():
+    kc = KeywordCache(cell_deg=0.05)
+    kc.put("GS25", 36.300, 127.400, _ranked(36.300, 127.400, 3000), cover_m=3000)
+    for lat in (36.301, 36.306, 36.309, 36.311):
+        hit = kc.get("GS25", lat, 127.400, 20000)
+        assert hit is None or hit == _ranked(lat, 127.400)[0]
+    assert kc.get("GS25", 36.309, 127.400, 20000)[2] == "GS25 B"
+
+
+def test_put_dedupes_and_miss_counted_once():
+    kc = KeywordCache(cell_deg=0.05)
+    for _ in range(3):
+        kc.put("GS25", 36.300, 127.400, _ranked(36.300, 127.400)[:1])
+    assert sum(len(b) for b in kc._cells.values()) == 1
+    assert kc.get("CU", 36.300, 127.400, 20000) is None
+    assert kc.stats()["misses"] == 1 and kc.stats()["hits"] == 0
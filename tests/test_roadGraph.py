@@ -0,0 +1,114 @@
+import numpy as np
+import networkx as nx
+import pytest
+
+import roadGraph
+from conftest import grid_graph
+
+STEP = 0.002
+
+
+def _random_points(rng, m, n=20):
+    span = (n - 1) * STEP
+    return 36.3 + rng.random(m) * span, 127.4 + rng.random(m) * span
+
+
+def test_snap_projects_onto_nearest_edge():
+    rg = roadGraph.RoadGraph(grid_graph())
+    # 가로 간선 위 0.0004도(약 44m) 북쪽 점 → 간선 위 같은 경도로
+    lat, lon, d, e = rg.snap([36.3 + 5 * STEP + 0.0004, 36.0], [127.4 + 3.5 * STEP, 127.0], max_dist_m=300)
+    assert abs(lat[0] - (36.3 + 5 * STEP)) < 1e-6 and abs(lon[0] - (127.4 + 3.5 * STEP)) < 1e-6
+    assert 40 < d[0] < 50 and rg.edge_name(e[0]) == "5-3"
+    # 그래프 밖 점은 찾지 못함
+    assert np.isnan(lat[1]) and e[1] == -1 and rg.edge_name(e[1]) == ""
+
+
+@pytest.mark.parametrize("attrs", [False, True])
+def test_route_many_matches_networkx(attrs):
+    G = grid_graph(attrs=attrs)
+    rg = roadGraph.RoadGraph(G)
+    rng = np.random.default_rng(1)
+    m = 120
+    s_lat, s_lon = _random_points(rng, m)
+    pick = rng.integers(0, 10, m)                 # 출발지 10곳을 여러 행이 공유
+    s_lat, s_lon = s_lat[pick], s_lon[pick]
+    e_lat, e_lon = _random_points(rng, m)
+    res = rg.route_many(s_lat, s_lon, e_lat, e_lon, max_snap_m=300)
+
+    nodes = list(G.nodes)
+    src, dst = rg.nearest_nodes(s_lat, s_lon), rg.nearest_nodes(e_lat, e_lon)
+    for k in range(m):
+        a, b = nodes[src[k]], nodes[dst[k]]
+        assert res[k]["duration"] == pytest.approx(nx.shortest_path_length(G, a, b, weight="travel_time"))
+        path = res[k]["path"]
+        assert np.allclose(path[0], [G.nodes[a]["y"], G.nodes[a]["x"]])
+        assert np.allclose(path[-1], [G.nodes[b]["y"], G.nodes[b]["x"]])
+        assert res[k]["distance"] >= 0
+
+
+def test_route_many_outside_graph_is_none():
+    rg = roadGraph.RoadGraph(grid_graph())
+    res = rg.route_many([36.31, 37.5], [127.41, 127.0], [36.33, 37.6], [127.43, 127.1], max_snap_m=300)
+    assert res[0] is not None and res[1] is None
+
+
+class FakeDownloader:
+    """ox.graph_from_polygon 대용: polygon 범위를 덮는 0.01도 격자 그래프를 만들고 호출을 기록"""
+    def __init__(self):
+        self.regions = []
+
+    def __call__(self, polygon, network_type="drive"):
+        self.regions.append(polygon)
+        minx, miny, maxx, maxy = polygon.bounds
+        n = int(np.ceil(max(maxx - minx, maxy - miny) / 0.01)) + 1
+        return grid_graph(n=n, step=0.01, lat0=miny, lon0=minx)
+
+
+@pytest.fixture
+def downloads(monkeypatch, tmp_path):
+    fake = FakeDownloader()
+    monkeypatch.setattr(roadGraph.ox, "graph_from_polygon", fake)
+    monkeypatch.chdir(tmp_path)
+    return fake
+
+
+def test_graph_file_is_keyed_by_region():
+    a, b = roadGraph.box(127.3, 36.3, 127.5, 36.5), roadGraph.box(127.3, 36.3, 127.6, 36.5)
+    assert roadGraph.graph_file(a) == roadGraph.graph_file(roadGraph.box(127.3, 36.3, 127.5, 36.5))
+    assert roadGraph.graph_file(a) != roadGraph.graph_file(b)
+
+
+def test_from_region_rebuilds_when_file_does_not_cover(downloads):
+    small, large = roadGraph.box(127.40, 36.30, 127.45, 36.35), roadGraph.box(127.40, 36.30, 127.60, 36.40)
+    roadGraph.RoadGraph.from_region(small, "g.graphml")
+    # 같은 파일, 안쪽 지역 → 다시 내려받지 않음 / 더 넓은 지역 → 다시 내려받아 덮어씀
+    inner = roadGraph.RoadGraph.from_region(roadGraph.box(127.41, 36.31, 127.44, 36.34), "g.graphml")
+    assert len(downloads.regions) == 1 and inner.covers_region(small)
+    wide = roadGraph.RoadGraph.from_region(large, "g.graphml")
+    assert len(downloads.regions) == 2 and wide.covers([36.39], [127.59]).all()
+    assert roadGraph.RoadGraph.from_region(large, "g.graphml").covers_region(large)
+    assert len(downloads.regions) == 2
+
+
+def test_extractor_grows_graph_for_later_chunks(downloads, kakao_world):
+    import routeExtract
+    ex = routeExtract.Extractor("test-key", API_DELAY=0, backend="osm")
+    ex.ROUTE_CACHE_DB = None
+    ex.DIRECTIONS_URL = f"{kakao_world.base_url}/v1/directions"
+    ex.OSM_SNAP_METERS = 1000
+    first = ex.fetch_routes(np.array([[36.31, 127.41, 36.33, 127.43]]))
+    # 두 번째 청크는 첫 청크 그래프 범위 밖 → 범위를 넓혀 다시 만들고 OSM으로 경로 탐색 (카카오 호출 없음)
+    second = ex.fetch_routes(np.array([[36.61, 127.81, 36.63, 127.83]]))
+    assert [r["source"] for r in first + second] == ["OSM", "OSM"]
+    assert len(downloads.regions) == 2 and kakao_world.calls["directions"] == 0
+    assert ex.ROAD_GRAPH.covers([36.31, 36.63], [127.41, 127.83]).all()
+
+
+def test_supplied_graph_falls_back_to_kakao_outside(kakao_world):
+    import routeExtract
+    ex = routeExtract.Extractor("test-key", API_DELAY=0, backend="osm", road_graph=roadGraph.RoadGraph(grid_graph()))
+    ex.ROUTE_CACHE_DB = None
+    ex.DIRECTIONS_URL = f"{kakao_world.base_url}/v1/directions"
+    out = ex.fetch_routes(np.array([[36.31, 127.41, 36.33, 127.43], [37.5, 127.0, 37.6, 127.1]]))
+    assert [r["source"] for r in out] == ["OSM", "Kakao"]
+    assert kakao_world.calls["directions"] == 1
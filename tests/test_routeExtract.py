@@ -0,0 +1,45 @@
+import numpy as np
+
+import routeExtract
+
+
+def _extractor(world, db_path):
+    ex = routeExtract.Extractor("test-key", API_DELAY=0)
+    ex.ROUTE_CACHE_DB = str(db_path)
+    ex.DIRECTIONS_URL = f"{world.base_url}/v1/directions"
+    return ex
+
+
+def test_failed_routes_are_negatively_cached(kakao_world, tmp_path):
+    bad = kakao_world.FAIL_ROUTE_LAT
+    coords = np.array([[36.30, 127.40, 36.31, 127.41],
+                       [bad, 127.40, 36.31, 127.41],
+                       [bad, 127.42, 36.32, 127.43]])
+    first = _extractor(kakao_world, tmp_path / "route.db").fetch_routes(coords)
+    assert first[0] is not None and first[1] is None and first[2] is None
+    assert kakao_world.calls["directions"] == 3
+
+    # 다시 실행해도 성공한 경로는 캐시, 실패한 쌍은 ROUTE_MISS_TTL 동안 다시 요청하지 않음
+    again = _extractor(kakao_world, tmp_path / "route.db").fetch_routes(coords)
+    assert kakao_world.calls["directions"] == 3
+    assert again[0]["length_m"] == first[0]["length_m"] and again[1] is None and again[2] is None
+
+
+def test_failures_not_cached_without_ttl(kakao_world, tmp_path):
+    coords = np.array([[kakao_world.FAIL_ROUTE_LAT, 127.40, 36.31, 127.41]])
+    for _ in range(2):
+        ex = _extractor(kakao_world, tmp_path / "route.db")
+        ex.ROUTE_MISS_TTL = None
+        assert ex.fetch_routes(coords) == [None]
+    assert kakao_world.calls["directions"] == 2
+
+
+def test_transport_failures_are_not_cached(kakao_world, tmp_path):
+    # 503 재시도 소진은 경로 없음이 아니므로 다음 실행에서 다시 요청
+    coords = np.array([[kakao_world.ERROR_ROUTE_LAT, 127.40, 36.31, 127.41]])
+    for _ in range(2):
+        ex = _extractor(kakao_world, tmp_path / "route.db")
+        ex.MAX_TRIES = 1
+        assert ex.fetch_routes(coords) == [None]
+        assert ex.get_route(*coords[0]) is None
+    assert kakao_world.calls["directions"] == 4
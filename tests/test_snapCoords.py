@@ -0,0 +1,41 @@
+import random
+
+from snapCoords import SegmentIndex
+
+
+def _roads(seed=0, n=40):
+    # 대전 부근 무작위 꺾은선 도로 (이름이 같은 도로, 끝점을 공유하는 선분 포함)
+    rnd = random.Random(seed)
+    roads = []
+    for k in range(n):
+        lon, lat = 127.38 + rnd.random() * 0.05, 36.33 + rnd.random() * 0.05
+        verts = [(lon, lat)]
+        for _ in range(rnd.randint(1, 6)):
+            lon, lat = lon + rnd.uniform(-0.004, 0.004), lat + rnd.uniform(-0.004, 0.004)
+            verts.append((lon, lat))
+        roads.append({"name": f"도로{k % 7}", "vertexes": verts})
+    return roads
+
+
+def test_segment_index_save_load_round_trip(tmp_path):
+    idx = SegmentIndex()
+    roads = _roads()
+    assert idx.add_roads(roads) > 0
+    path = str(tmp_path / "segments.npz")
+    idx.save(path)
+    loaded = SegmentIndex.load(path)
+
+    assert len(loaded) == len(idx)
+    assert loaded.names == idx.names
+    assert {c: sorted(s) for c, s in loaded._cells.items()} == {c: sorted(s) for c, s in idx._cells.items()}
+    assert loaded._seen == idx._seen
+
+    rnd = random.Random(1)
+    for _ in range(200):
+        lat, lon = 36.32 + rnd.random() * 0.07, 127.37 + rnd.random() * 0.07
+        assert loaded.nearest(lat, lon, 300) == idx.nearest(lat, lon, 300)
+
+    # 불러온 색인도 이미 있는 선분(방향이 반대여도)은 다시 추가하지 않음
+    reversed_roads = [{"name": r["name"], "vertexes": r["vertexes"][::-1]} for r in roads]
+    assert loaded.add_roads(roads) == 0
+    assert loaded.add_roads(reversed_roads) == 0